@@ -0,0 +1,135 @@
+"""
+In-memory, time-ordered index over the stored alerts.
+
+Alerts are kept in lists sorted by (timestamp, sequence number), one for all
+alerts and one per scenario and per MAC address, so time-range queries are
+answered with a bisect and a slice instead of a scan of the whole store.
+"""
+
+import datetime
+from bisect import bisect_left, bisect_right, insort
+
+def parse_timestamp(value) -> float:
+    """Converts an ISO 8601 timestamp (or date) to epoch seconds."""
+    if isinstance(value, datetime.datetime):
+        return value.timestamp()
+    value = str(value).strip()
+    if value.endswith("Z"):
+        value = value[:-1] + "+00:00"
+    return datetime.datetime.fromisoformat(value).timestamp()
+
+def encode_cursor(key: tuple) -> str:
+    return f"{key[0]!r}_{key[1]}"
+
+def decode_cursor(cursor: str) -> tuple:
+    """Parses a cursor returned by a previous query."""
+    try:
+        timestamp, seq = cursor.rsplit("_", 1)
+        return float(timestamp), int(seq)
+    except (AttributeError, ValueError):
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+def _insert(keys: list, key: tuple):
+    # Alerts nearly always arrive in time order, so appending is the common case
+    if not keys or keys[-1] <= key:
+        keys.append(key)
+    else:
+        insort(keys, key)
+
+class AlertIndex:
+    def __init__(self):
+        self.keys = []  # (timestamp, seq) pairs, sorted
+        self.alerts = {}  # seq -> alert
+        self.by_scenario = {}  # scenario -> sorted keys
+        self.by_mac = {}  # mac_address -> sorted keys
+        self.min_seq = None
+
+    def __len__(self):
+        return len(self.alerts)
+
+    def add(self, seq: int, alert: dict) -> tuple:
+        """Indexes an alert stored under the given sequence number and returns its (timestamp, seq) key."""
+        try:
+            timestamp = parse_timestamp(alert.get("timestamp"))
+        except (TypeError, ValueError):
+            timestamp = 0.0
+        key = (timestamp, seq)
+        self.alerts[seq] = alert
+        _insert(self.keys, key)
+        _insert(self.by_scenario.setdefault(alert.get("scenario"), []), key)
+        _insert(self.by_mac.setdefault(alert.get("mac_address"), []), key)
+        if self.min_seq is None or seq < self.min_seq:
+            self.min_seq = seq
+        return key
+
+    def evict_before(self, seq: int):
+        """Drops every alert whose sequence number is lower than seq."""
+        if self.min_seq is None or self.min_seq >= seq:
+            return
+        for old_seq in [s for s in self.alerts if s < seq]:
+            del self.alerts[old_seq]
+        self.keys = [k for k in self.keys if k[1] >= seq]
+        for index in (self.by_scenario, self.by_mac):
+            for value in list(index):
+                keys = [k for k in index[value] if k[1] >= seq]
+                if keys:
+                    index[value] = keys
+                else:
+                    del index[value]
+        self.min_seq = min(self.alerts) if self.alerts else None
+
+    def query(self, since=None, until=None, scenario=None, mac_address=None, cursor=None, limit=None):
+        """
+        Returns (alerts, next_cursor) for alerts newer than `since` (exclusive)
+        and older than `until` (exclusive), oldest first. `next_cursor` is set
+        when `limit` cut the result short and can be passed back to resume.
+        """
+        keys, next_cursor = self.select(since, until, scenario, mac_address, cursor, limit)
+        return [self.alerts[k[1]] for k in keys], next_cursor
+
+    def entries(self, **filters) -> list:
+        """Returns the (cursor, alert) pairs matching the query filters, oldest first."""
+        keys, _ = self.select(**filters)
+        return [(encode_cursor(k), self.alerts[k[1]]) for k in keys]
+
+    def select(self, since=None, until=None, scenario=None, mac_address=None, cursor=None, limit=None):
+        """Returns (keys, next_cursor) for the query filters."""
+        if scenario is not None and mac_address is not None:
+            by_scenario = self.by_scenario.get(scenario, [])
+            by_mac = self.by_mac.get(mac_address, [])
+            if len(by_scenario) <= len(by_mac):
+                keys, field, value = by_scenario, "mac_address", mac_address
+            else:
+                keys, field, value = by_mac, "scenario", scenario
+        elif scenario is not None:
+            keys, field, value = self.by_scenario.get(scenario, []), None, None
+        elif mac_address is not None:
+            keys, field, value = self.by_mac.get(mac_address, []), None, None
+        else:
+            keys, field, value = self.keys, None, None
+
+        start = 0
+        if since is not None:
+            start = bisect_right(keys, (parse_timestamp(since), float("inf")))
+        if cursor is not None:
+            start = max(start, bisect_right(keys, decode_cursor(cursor)))
+        end = len(keys)
+        if until is not None:
+            end = bisect_left(keys, (parse_timestamp(until), -1))
+
+        if field is None:
+            stop = end if limit is None else min(end, start + limit)
+            selected = keys[start:stop]
+            next_cursor = encode_cursor(selected[-1]) if selected and stop < end else None
+            return selected, next_cursor
+
+        # Both filters given: walk the narrower list and check the other field
+        selected = []
+        for position in range(start, end):
+            key = keys[position]
+            if self.alerts[key[1]].get(field) != value:
+                continue
+            if limit is not None and len(selected) >= limit:
+                return selected, encode_cursor(selected[-1])
+            selected.append(key)
+        return selected, None
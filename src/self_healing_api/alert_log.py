@@ -0,0 +1,171 @@
+"""
+Append-only, segmented storage for alerts.
+
+Every alert is written as a single JSON line at the end of the active segment,
+so the cost of storing an alert does not depend on how many alerts are already
+kept. Segments are rotated once they hold `segment_records` alerts and the
+retention limit is enforced by deleting the oldest whole segment.
+"""
+
+import os
+import json
+
+SEGMENT_SUFFIX = ".jsonl"
+
+class AlertLog:
+    def __init__(self, directory: str, segment_records: int = 1000, max_records: int = 250, fsync: bool = False):
+        self.directory = directory
+        self.segment_records = max(1, segment_records)
+        self.max_records = max(1, max_records)
+        self.fsync = fsync
+        self.segments = []  # [base_seq, record_count] pairs, oldest first
+        self.records = 0
+        self._active = None
+        os.makedirs(self.directory, exist_ok=True)
+        self._load_segments()
+
+    @property
+    def first_seq(self) -> int:
+        """Sequence number of the oldest alert still kept."""
+        return self.segments[0][0] if self.segments else 0
+
+    @property
+    def next_seq(self) -> int:
+        """Sequence number that the next appended alert will receive."""
+        if not self.segments:
+            return 0
+        base_seq, count = self.segments[-1]
+        return base_seq + count
+
+    def _segment_path(self, base_seq: int) -> str:
+        return os.path.join(self.directory, f"{base_seq:020d}{SEGMENT_SUFFIX}")
+
+    def _load_segments(self):
+        """Scans the segment directory and recovers the active segment after a crash."""
+        names = sorted(n for n in os.listdir(self.directory) if n.endswith(SEGMENT_SUFFIX))
+        for name in names:
+            base_seq = int(name[:-len(SEGMENT_SUFFIX)])
+            with open(os.path.join(self.directory, name), "rb") as file:
+                count = sum(1 for line in file if line.endswith(b"\n"))
+            self.segments.append([base_seq, count])
+            self.records += count
+
+        if self.segments:
+            self._truncate_partial_record(self._segment_path(self.segments[-1][0]))
+            self._open_active()
+
+    def _truncate_partial_record(self, path: str):
+        """Drops a trailing record that was only partially written."""
+        with open(path, "rb+") as file:
+            data = file.read()
+            end = data.rfind(b"\n") + 1
+            if end != len(data):
+                file.truncate(end)
+
+    def _open_active(self):
+        self._active = open(self._segment_path(self.segments[-1][0]), "a", encoding="utf-8")
+
+    def _rotate(self):
+        """Closes the active segment and starts a new one."""
+        base_seq = self.next_seq
+        if self._active:
+            self._active.close()
+        self.segments.append([base_seq, 0])
+        self._open_active()
+
+    def _enforce_retention(self):
+        """Deletes the oldest segments while the remaining ones still hold max_records alerts."""
+        while len(self.segments) > 1 and self.records - self.segments[0][1] >= self.max_records:
+            base_seq, count = self.segments.pop(0)
+            os.remove(self._segment_path(base_seq))
+            self.records -= count
+
+    def append(self, alerts: list) -> int:
+        """Appends alerts to the log and returns the sequence number of the first one; a failed append writes none."""
+        first_seq = self.next_seq
+        segments = [list(segment) for segment in self.segments]
+        size = os.path.getsize(self._segment_path(segments[-1][0])) if segments else 0  # Flushed by the last append
+        try:
+            for alert in alerts:
+                if not self.segments or self.segments[-1][1] >= self.segment_records:
+                    self.flush()
+                    self._rotate()
+                    self._enforce_retention()
+                self._active.write(json.dumps(alert) + "\n")
+                self.segments[-1][1] += 1
+                self.records += 1
+            self.flush()
+        except OSError:
+            self._undo_append(segments, size)
+            raise
+        return first_seq
+
+    def _undo_append(self, segments: list, size: int):
+        """Restores the log as it was before a failed append, so that retrying it does not store records twice."""
+        if self._active:
+            try:
+                self._active.close()
+            except OSError:
+                pass  # The buffered records are dropped with it
+            self._active = None
+        for base_seq, _ in self.segments:
+            if not segments or base_seq > segments[-1][0]:  # Started by the failed append
+                try:
+                    os.remove(self._segment_path(base_seq))
+                except FileNotFoundError:
+                    pass
+        if segments and os.path.exists(self._segment_path(segments[-1][0])):
+            with open(self._segment_path(segments[-1][0]), "rb+") as file:
+                file.truncate(size)
+        elif segments:  # Retention deleted every old segment, an empty one keeps the sequence numbers
+            segments = [[sum(segments[-1]), 0]]
+            open(self._segment_path(segments[0][0]), "w").close()
+        # Segments deleted by retention during the append stay deleted
+        self.segments = [segment for segment in segments if os.path.exists(self._segment_path(segment[0]))]
+        self.records = sum(count for _, count in self.segments)
+        if self.segments:
+            self._open_active()
+
+    def read(self):
+        """Yields (sequence number, alert) pairs for all stored alerts, oldest first."""
+        for base_seq, _ in list(self.segments):
+            path = self._segment_path(base_seq)
+            try:
+                file = open(path, "r", encoding="utf-8")
+            except FileNotFoundError:
+                continue  # Dropped by retention while reading
+            with file:
+                for offset, line in enumerate(file):
+                    try:
+                        yield base_seq + offset, json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+
+    def flush(self):
+        """Pushes buffered records to the OS, and to the disk when fsync is enabled."""
+        if self._active:
+            self._active.flush()
+            if self.fsync:
+                os.fsync(self._active.fileno())
+
+    def close(self):
+        if self._active:
+            self._active.flush()
+            os.fsync(self._active.fileno())
+            self._active.close()
+            self._active = None
+
+    def migrate(self, legacy_path: str) -> int:
+        """Imports alerts from a legacy JSON list file and renames it so it is only imported once."""
+        if not os.path.exists(legacy_path):
+            return 0
+        with open(legacy_path, "r") as file:
+            try:
+                alerts = json.load(file)
+            except json.JSONDecodeError:
+                alerts = []
+        if not isinstance(alerts, list) or not alerts:
+            return 0
+        self.append(alerts)
+        os.replace(legacy_path, legacy_path + ".migrated")
+        return len(alerts)
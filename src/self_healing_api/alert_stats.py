@@ -0,0 +1,83 @@
+"""
+Time-bucketed alert counters behind GET /alerts/stats.
+
+Every ingested alert increments one counter, keyed by (scenario, MAC
+address), in the bucket of its timestamp. Buckets older than the retention
+window are dropped as time passes, so the statistics cost memory and time
+in proportion to the number of buckets, never to the number of stored
+alerts. Time ranges are answered at bucket granularity.
+"""
+
+import time
+import datetime
+from collections import Counter
+
+from alert_index import parse_timestamp
+
+class AlertStats:
+    def __init__(self, bucket_seconds: int = 60, retention: int = 86400):
+        self.bucket_seconds = max(1, bucket_seconds)
+        self.retention = max(self.bucket_seconds, retention)
+        self.buckets = {}  # bucket start (epoch seconds) -> Counter of (scenario, mac_address)
+
+    def bucket_of(self, timestamp: float) -> int:
+        return int(timestamp // self.bucket_seconds) * self.bucket_seconds
+
+    def add(self, alert: dict, now: float = None):
+        """Counts an alert in the bucket of its timestamp, unless it is older than the retention window."""
+        try:
+            timestamp = parse_timestamp(alert.get("timestamp"))
+        except (TypeError, ValueError):
+            return
+        cutoff = self.roll_off(now)
+        if timestamp < cutoff:
+            return
+        bucket = self.buckets.setdefault(self.bucket_of(timestamp), Counter())
+        bucket[(alert.get("scenario"), alert.get("mac_address"))] += 1
+
+    def roll_off(self, now: float = None) -> int:
+        """Drops the buckets that left the retention window and returns the start of the oldest one kept."""
+        now = time.time() if now is None else now
+        cutoff = self.bucket_of(now - self.retention) + self.bucket_seconds
+        for start in [start for start in self.buckets if start < cutoff]:
+            del self.buckets[start]
+        return cutoff
+
+    def query(self, since=None, until=None, scenario=None, mac_address=None, now: float = None) -> dict:
+        """
+        Returns the alert counts per scenario, per MAC address and per bucket
+        for the buckets overlapping [since, until).
+        """
+        self.roll_off(now)
+        first = self.bucket_of(parse_timestamp(since)) if since is not None else None
+        end = parse_timestamp(until) if until is not None else None
+
+        scenarios, mac_addresses, buckets = Counter(), Counter(), []
+        for start in sorted(self.buckets):
+            if (first is not None and start < first) or (end is not None and start >= end):
+                continue
+            bucket_scenarios, bucket_mac_addresses = Counter(), Counter()
+            for (alert_scenario, alert_mac_address), count in self.buckets[start].items():
+                if scenario is not None and alert_scenario != scenario:
+                    continue
+                if mac_address is not None and alert_mac_address != mac_address:
+                    continue
+                bucket_scenarios[alert_scenario] += count
+                bucket_mac_addresses[alert_mac_address] += count
+            if not bucket_scenarios:
+                continue
+            scenarios.update(bucket_scenarios)
+            mac_addresses.update(bucket_mac_addresses)
+            buckets.append({
+                "start": datetime.datetime.fromtimestamp(start).isoformat(),
+                "total": sum(bucket_scenarios.values()),
+                "scenarios": dict(bucket_scenarios),
+                "mac_addresses": dict(bucket_mac_addresses),
+            })
+        return {
+            "bucket_seconds": self.bucket_seconds,
+            "total": sum(scenarios.values()),
+            "scenarios": dict(scenarios),
+            "mac_addresses": dict(mac_addresses),
+            "buckets": buckets,
+        }
@@ -0,0 +1,214 @@
+"""
+In-process alert store with a single writer task.
+
+New alerts are indexed in memory right away, so reads never touch the disk.
+Only the writer task appends to the alert log: it takes every pending alert
+in one write (group commit), in a worker thread so requests keep arriving
+meanwhile, every `flush_interval` seconds, as soon as `flush_max_pending`
+alerts are waiting, or as soon as a caller of `commit()` waits for its
+alerts to be durable. The more requests arrive during a write, the more
+alerts the next one carries. Alerts added with `add()` are only
+write-behind; `status()` reports how many are unflushed and for how long.
+
+Added alerts are visible to queries and streams at once, so a failed write
+does not drop them: they stay pending and are retried by the next commit,
+and callers of `commit()` keep waiting until a write succeeds.
+"""
+
+import time
+import asyncio
+import logging
+import datetime
+
+from alert_log import AlertLog
+from alert_index import AlertIndex, encode_cursor
+from broadcaster import Broadcaster
+from metrics import store_operation_seconds
+
+class AlertStore:
+    write_in_thread = True  # The log append runs in a worker thread, off the event loop
+    write_errors = (OSError,)
+
+    def __init__(self, log: AlertLog, flush_interval: float = 1.0, flush_max_pending: int = 100, broadcaster: Broadcaster = None):
+        self.log = log
+        self.broadcaster = broadcaster
+        self.flush_interval = flush_interval
+        self.flush_max_pending = max(1, flush_max_pending)
+        self._load()
+        self.pending = []
+        self.waiters = []  # (sequence number after the awaited alerts, future) pairs
+        self.commits = 0
+        self.pending_since = None  # Monotonic time of the oldest unflushed alert
+        self.last_flush = None
+        self._wakeup = None
+        self._task = None
+        self._stopping = False
+
+    def _load(self):
+        self.index = AlertIndex()
+        for seq, alert in self.log.read():
+            self.index.add(seq, alert)
+        self.next_seq = self.log.next_seq
+
+    def add(self, alerts: list) -> int:
+        """Indexes alerts in memory and queues them for the log. Returns the first sequence number."""
+        first_seq = self.next_seq
+        entries = self._append(alerts)
+        if self.broadcaster is not None:
+            self.broadcaster.publish(entries)
+        if alerts and not self.pending:
+            self.pending_since = time.monotonic()
+        self.pending.extend(alerts)
+
+        if self._task is None:
+            self.flush()  # No background flusher, write through
+        elif len(self.pending) >= self.flush_max_pending:
+            self._wakeup.set()
+        return first_seq
+
+    def _append(self, alerts: list) -> list:
+        """Makes alerts visible to queries and returns their (cursor, alert) pairs."""
+        entries = []
+        for alert in alerts:
+            entries.append((encode_cursor(self.index.add(self.next_seq, alert)), alert))
+            self.next_seq += 1
+        return entries
+
+    def _write(self, alerts: list):
+        """Makes alerts durable."""
+        self.log.append(alerts)
+
+    def _written(self):
+        self.index.evict_before(self.log.first_seq)
+
+    async def commit(self, alerts: list) -> int:
+        """Adds alerts and waits until the writer task has written them to the log."""
+        first_seq = self.add(alerts)
+        if self._task is None or not alerts:
+            return first_seq  # Written through by add()
+        future = asyncio.get_running_loop().create_future()
+        self.waiters.append((self.next_seq, future))
+        self._wakeup.set()
+        await future
+        return first_seq
+
+    def flush(self):
+        """Writes the pending alerts to the log right away; only used while the writer task is not running."""
+        if not self.pending:
+            return
+        alerts = self.pending
+        with store_operation_seconds.time("flush"):
+            self._write(alerts)
+        self.pending = []
+        self.pending_since = None
+        self.last_flush = datetime.datetime.now()
+        self._written()
+        self.commits += 1
+
+    async def _commit_pending(self):
+        """Writes every pending alert in one append and acknowledges the waiters."""
+        if not self.pending:
+            return
+        alerts, end_seq = self.pending, self.next_seq
+        self.pending = []
+        pending_since, self.pending_since = self.pending_since, None
+        try:
+            with store_operation_seconds.time("flush"):
+                if self.write_in_thread:
+                    await asyncio.to_thread(self._write, alerts)
+                else:
+                    self._write(alerts)
+        except self.write_errors as e:
+            logging.error(f"Failed to flush alerts to the log, retrying with the next commit: {e}")
+            self.pending = alerts + self.pending  # The waiters are acknowledged once a retry writes them
+            self.pending_since = pending_since
+            return
+        self.last_flush = datetime.datetime.now()
+        self._written()
+        self.commits += 1
+        self._resolve(end_seq)
+
+    def _resolve(self, end_seq: int, error: Exception = None):
+        waiting = []
+        for waiter in self.waiters:
+            seq, future = waiter
+            if seq > end_seq:
+                waiting.append(waiter)
+            elif not future.done():
+                if error is None:
+                    future.set_result(None)
+                else:
+                    future.set_exception(error)
+        self.waiters = waiting
+
+    def query(self, **filters):
+        with store_operation_seconds.time("query"):
+            return self.index.query(**filters)
+
+    async def query_async(self, **filters):
+        """`query()` for request handlers; backends that read from disk run it off the event loop."""
+        return self.query(**filters)
+
+    def entries(self, **filters) -> list:
+        return self.index.entries(**filters)
+
+    def count(self, **filters) -> int:
+        keys, _ = self.index.select(**filters)
+        return len(keys)
+
+    async def count_async(self, **filters) -> int:
+        return self.count(**filters)
+
+    def all(self) -> list:
+        alerts, _ = self.query()
+        return alerts
+
+    def __len__(self):
+        return len(self.index)
+
+    def status(self) -> dict:
+        """Reports the write-behind lag, which bounds how much a crash can lose."""
+        lag = time.monotonic() - self.pending_since if self.pending_since is not None else 0.0
+        return {
+            "records": len(self),
+            **self._storage_status(),
+            "pending": len(self.pending),
+            "waiting": len(self.waiters),
+            "commits": self.commits,
+            "lag_seconds": round(lag, 3),
+            "last_flush": self.last_flush.isoformat() if self.last_flush else None,
+        }
+
+    def _storage_status(self) -> dict:
+        return {"backend": "log", "segments": len(self.log.segments)}
+
+    async def _flush_loop(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self._commit_pending()
+        await self._commit_pending()
+
+    async def start(self):
+        """Starts the writer task."""
+        if self._task is None:
+            self._stopping = False
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def close(self):
+        """Lets the writer task commit what is pending, then fsyncs the log."""
+        if self._task is not None:
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        try:
+            self.flush()
+        except self.write_errors as e:
+            self._resolve(self.next_seq, e)  # Shutting down, the pending alerts are lost
+            raise
+        self.log.close()
@@ -1,12 +1,21 @@
+import json
 import uvicorn
 import datetime
-import asyncio
 import configparser
+from typing import List, Optional
+from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, Query, HTTPException
+from fastapi import FastAPI, Query, HTTPException, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 
-from alerts_service import fetch_alerts, add_alert, create_alert_object, send_alert_to_trust_manager
+from alert_index import decode_cursor
+from metrics import registry, MetricsMiddleware
+from alerts_service import (
+    query_alerts, count_alerts, alert_stats, add_alert, add_alerts, create_alert_object, forward_to_trust_manager,
+    start_store, close_store, store_status, start_outbox, close_outbox, outbox_status, close_trust_manager_client,
+    subscribe_alerts, unsubscribe_alerts, STREAM_HEARTBEAT
+)
 
 # Load Configuration
 config = configparser.ConfigParser()
@@ -14,32 +23,152 @@ config.read("config.ini")
 
 PORT = config.getint("api", "port", fallback=8500)
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Opens the alert store and the Trust Manager outbox on startup and closes them on shutdown."""
+    await start_store()
+    await start_outbox()
+    yield
+    await close_outbox()
+    await close_store()
+    await close_trust_manager_client()
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(MetricsMiddleware)
 
 class AlertRequest(BaseModel):
     timestamp: datetime.datetime
     scenario: str
     message: str
+    # Set by nodes that collapse repeated alerts into one
+    count: Optional[int] = None
+    first_seen: Optional[datetime.datetime] = None
+    last_seen: Optional[datetime.datetime] = None
 
 @app.post("/alerts", status_code=201)
 async def create_alert(alert: AlertRequest):
     """Create a new alert."""
     try:
-        alert_obj = create_alert_object(alert.scenario, alert.message)
-        add_alert(alert_obj)
-        asyncio.create_task(send_alert_to_trust_manager(alert_obj))
-        return {"result": "Alert created successfully!"}
+        alert_obj = create_alert_object(alert.scenario, alert.message, alert.count, alert.first_seen, alert.last_seen)
+        await add_alert(alert_obj)
+        forwarded = await forward_to_trust_manager([alert_obj])
+        return {"result": "Alert created successfully!", "forwarded": forwarded}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Interal Server Error: {str(e)}")
+
+@app.post("/alerts/batch", status_code=201)
+async def create_alerts(alerts: List[AlertRequest]):
+    """Create several alerts in one store operation."""
+    try:
+        alert_objs = [create_alert_object(alert.scenario, alert.message, alert.count, alert.first_seen, alert.last_seen) for alert in alerts]
+        await add_alerts(alert_objs)
+        forwarded = await forward_to_trust_manager(alert_objs)
+        return {"result": f"{len(alert_objs)} alerts created successfully!", "forwarded": forwarded}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Interal Server Error: {str(e)}")
 
 @app.get("/alerts")
-def get_alerts(since: str = Query(None, description=f"Fetch alerts after this timestamp (e.g. {datetime.datetime.now().date().isoformat()})")):
+async def get_alerts(since: str = Query(None, description=f"Fetch alerts after this timestamp (e.g. {datetime.datetime.now().date().isoformat()})"),
+                     until: str = Query(None, description="Fetch alerts before this timestamp"),
+                     scenario: str = Query(None, description="Fetch alerts of this scenario only"),
+                     mac_address: str = Query(None, description="Fetch alerts of this node only"),
+                     limit: int = Query(None, ge=1, description="Maximum number of alerts to return"),
+                     cursor: str = Query(None, description="Resume after the 'next_cursor' of a previous response")):
     """Get alerts since a given timestamp."""
     try:
-        alerts = fetch_alerts(since)
-        return {"alerts": alerts}
+        alerts, next_cursor = await query_alerts(since=since or None, until=until or None, scenario=scenario,
+                                                  mac_address=mac_address, cursor=cursor, limit=limit)
+        return {"alerts": alerts, "next_cursor": next_cursor}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Interal Server Error: {str(e)}")
 
+@app.get("/alerts/count")
+async def get_alert_count(since: str = Query(None, description="Count alerts after this timestamp"),
+                          until: str = Query(None, description="Count alerts before this timestamp"),
+                          scenario: str = Query(None, description="Count alerts of this scenario only"),
+                          mac_address: str = Query(None, description="Count alerts of this node only")):
+    """Count the stored alerts matching the filters."""
+    try:
+        count = await count_alerts(since=since or None, until=until or None, scenario=scenario, mac_address=mac_address)
+        return {"count": count}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/alerts/stats")
+async def get_alert_stats(since: str = Query(None, description="Count alerts from the time bucket of this timestamp"),
+                          until: str = Query(None, description="Count alerts of the time buckets before this timestamp"),
+                          scenario: str = Query(None, description="Count alerts of this scenario only"),
+                          mac_address: str = Query(None, description="Count alerts of this node only")):
+    """Get the alert counts per scenario, per node and per time bucket."""
+    try:
+        return alert_stats(since=since or None, until=until or None, scenario=scenario, mac_address=mac_address)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def format_alert_event(format: str, cursor: str, alert: dict) -> str:
+    if format == "sse":
+        return f"id: {cursor}\nevent: alert\ndata: {json.dumps(alert)}\n\n"
+    return json.dumps({"cursor": cursor, "alert": alert}) + "\n"
+
+def format_dropped_event(format: str, count: int) -> str:
+    if format == "sse":
+        return f"event: dropped\ndata: {json.dumps({'count': count})}\n\n"
+    return json.dumps({"dropped": count}) + "\n"
+
+async def alert_events(format: str, scenario: str, mac_address: str, cursor: str):
+    """Yields the alerts stored after the cursor, then new alerts as they are added."""
+    subscription, backlog = subscribe_alerts(scenario=scenario, mac_address=mac_address, cursor=cursor)
+    try:
+        for entry_cursor, alert in backlog:
+            yield format_alert_event(format, entry_cursor, alert)
+        while True:
+            entries, dropped = await subscription.get(timeout=STREAM_HEARTBEAT)
+            if dropped:
+                yield format_dropped_event(format, dropped)
+            if entries:
+                yield "".join(format_alert_event(format, entry_cursor, alert) for entry_cursor, alert in entries)
+            elif not dropped:
+                yield ": keep-alive\n\n" if format == "sse" else "\n"
+    finally:
+        unsubscribe_alerts(subscription)
+
+@app.get("/alerts/stream")
+async def stream_alerts(request: Request,
+                        scenario: str = Query(None, description="Stream alerts of this scenario only"),
+                        mac_address: str = Query(None, description="Stream alerts of this node only"),
+                        cursor: str = Query(None, description="Replay the alerts stored after this cursor first"),
+                        format: str = Query(None, description="'sse' or 'ndjson', by default chosen from the Accept header")):
+    """Stream new alerts as Server-Sent Events or newline-delimited JSON."""
+    cursor = cursor or request.headers.get("last-event-id")
+    if format is None:
+        format = "sse" if "text/event-stream" in request.headers.get("accept", "") else "ndjson"
+    if format not in ("sse", "ndjson"):
+        raise HTTPException(status_code=400, detail=f"Unknown stream format: {format}")
+    if cursor is not None:
+        try:
+            decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(alert_events(format, scenario, mac_address, cursor), media_type=media_type,
+                             headers={"Cache-Control": "no-cache"})
+
+@app.get("/alerts/store")
+async def get_store_status():
+    """Get the size of the alert store and how far persistence lags behind."""
+    return store_status()
+
+@app.get("/alerts/outbox")
+async def get_outbox_status():
+    """Get the backlog of alerts waiting to be delivered to the Trust Manager."""
+    return outbox_status()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Get the API metrics in the Prometheus text format."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=PORT) 
\ No newline at end of file
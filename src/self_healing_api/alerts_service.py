@@ -1,68 +1,237 @@
 import os
-import json
+import logging
 import datetime
 import configparser
 from getmac import get_mac_address
 
+from alert_log import AlertLog
+from alert_store import AlertStore
+from alert_stats import AlertStats
+from sqlite_store import AlertDatabase, SQLiteAlertStore
+from broadcaster import Broadcaster
+from outbox import Outbox, OutboxFull
 from trust_manager_client import TrustManagerClient
+from metrics import registry, alerts_received, store_operation_seconds, trust_manager_failures, Callback
 
 # Load Configuration
 config = configparser.ConfigParser()
 config.read("config.ini")
 
 ALERTS_FILE = config.get("log_file", "name", fallback="alerts.json")
+BACKEND = config.get("log_file", "backend", fallback="log")
+DATABASE_FILE = config.get("log_file", "database", fallback="alerts.db")
+SYNCHRONOUS = config.get("log_file", "synchronous", fallback="NORMAL")
 MAX_ALERTS = config.getint("log_file", "max_records", fallback=250)
+SEGMENT_DIR = config.get("log_file", "segment_dir", fallback="alerts.d")
+SEGMENT_RECORDS = config.getint("log_file", "segment_records", fallback=1000)
+FSYNC = config.getboolean("log_file", "fsync", fallback=False)
+FLUSH_INTERVAL = config.getfloat("log_file", "flush_interval", fallback=1.0)
+FLUSH_MAX_PENDING = config.getint("log_file", "flush_max_pending", fallback=100)
+ACK_AFTER_COMMIT = config.getboolean("log_file", "ack_after_commit", fallback=True)
+OUTBOX_FILE = config.get("outbox", "file", fallback="outbox.jsonl")
+OUTBOX_WORKERS = config.getint("outbox", "workers", fallback=4)
+OUTBOX_BATCH_SIZE = config.getint("outbox", "batch_size", fallback=20)
+OUTBOX_HIGH_WATER_MARK = config.getint("outbox", "high_water_mark", fallback=1000)
+OUTBOX_ENQUEUE_TIMEOUT = config.getfloat("outbox", "enqueue_timeout", fallback=5.0)
+OUTBOX_BASE_BACKOFF = config.getfloat("outbox", "base_backoff", fallback=0.5)
+OUTBOX_MAX_BACKOFF = config.getfloat("outbox", "max_backoff", fallback=60.0)
+OUTBOX_FSYNC = config.getboolean("outbox", "fsync", fallback=True)
+STREAM_BUFFER_SIZE = config.getint("stream", "buffer_size", fallback=1000)
+STREAM_HEARTBEAT = config.getfloat("stream", "heartbeat", fallback=15.0)
+STATS_BUCKET_SECONDS = config.getint("stats", "bucket_seconds", fallback=60)
+STATS_RETENTION = config.getint("stats", "retention", fallback=86400)
 MAC_ADDRESS = "fa:16:3e:5e:25:ef"
 
 FILE_PATH = os.path.join(os.path.dirname(__file__), ALERTS_FILE)
+SEGMENT_PATH = os.path.join(os.path.dirname(__file__), SEGMENT_DIR)
+DATABASE_PATH = os.path.join(os.path.dirname(__file__), DATABASE_FILE)
+OUTBOX_PATH = os.path.join(os.path.dirname(__file__), OUTBOX_FILE)
+
+store = None
+stats = None
+outbox = None
+device_mac_address = None
+tm_client = TrustManagerClient()
+broadcaster = Broadcaster(STREAM_BUFFER_SIZE)
 
 def fetch_mac_address():
-    """Get the MAC address of the device."""
-    mac_address = get_mac_address()
-    if mac_address:
-        return mac_address
-    return MAC_ADDRESS
-
-def save_alerts(alerts):
-    """Save alerts to the JSON file, keeping the latest MAX_ALERTS."""
-    alerts = alerts[-MAX_ALERTS:]  # Keep only the last MAX_ALERTS
-    with open(FILE_PATH, "w") as file:
-        json.dump(alerts, file, indent=4)
+    """Get the MAC address of the device, looked up once per process."""
+    global device_mac_address
+    if device_mac_address is None:
+        device_mac_address = get_mac_address() or MAC_ADDRESS
+    return device_mac_address
+
+def open_store():
+    """Open the alert store, migrating the legacy JSON file on first start."""
+    global store, stats
+    if store is not None:
+        return store
+    if BACKEND == "sqlite":
+        database = AlertDatabase(DATABASE_PATH, max_records=MAX_ALERTS, synchronous=SYNCHRONOUS)
+        migrated = database.migrate_log(SEGMENT_PATH) + database.migrate(FILE_PATH)
+        if migrated:
+            print(f"Migrated {migrated} alerts to {DATABASE_PATH}")
+        store = SQLiteAlertStore(database, flush_interval=FLUSH_INTERVAL, flush_max_pending=FLUSH_MAX_PENDING,
+                                 broadcaster=broadcaster)
+    else:
+        alert_log = AlertLog(SEGMENT_PATH, segment_records=SEGMENT_RECORDS, max_records=MAX_ALERTS, fsync=FSYNC)
+        migrated = alert_log.migrate(FILE_PATH)
+        if migrated:
+            print(f"Migrated {migrated} alerts from {FILE_PATH} to {SEGMENT_PATH}")
+        store = AlertStore(alert_log, flush_interval=FLUSH_INTERVAL, flush_max_pending=FLUSH_MAX_PENDING,
+                           broadcaster=broadcaster)
+
+    # The statistics are only kept in memory, rebuild them from the alerts still in their window
+    stats = AlertStats(STATS_BUCKET_SECONDS, STATS_RETENTION)
+    window_start = datetime.datetime.fromtimestamp(stats.roll_off())
+    for alert in store.query(since=window_start - datetime.timedelta(microseconds=1))[0]:
+        stats.add(alert)
+    return store
+
+async def start_store():
+    """Open the alert store and start its background flusher."""
+    await open_store().start()
+
+async def close_store():
+    """Flush pending alerts to disk and close the alert store."""
+    global store
+    if store is not None:
+        await store.close()
+        store = None
+
+def store_status():
+    """Report the size of the store and its write-behind lag."""
+    return open_store().status()
 
 def load_alerts():
-    """Load alerts from the JSON file."""
-    print(FILE_PATH)
-    if os.path.exists(FILE_PATH):
-        with open(FILE_PATH, "r") as file:
-            try:
-                return json.load(file)
-            except json.JSONDecodeError:
-                return []
-    return []
-
-def add_alert(alert: dict):
-    """Add a new alert and save it to the file."""
-    alerts = load_alerts()
-    alerts.append(alert)
-    save_alerts(alerts)
-
-def fetch_alerts(since_timestamp=None):
+    """Load all stored alerts, oldest first."""
+    return open_store().all()
+
+async def add_alert(alert: dict):
+    """Add a new alert to the store."""
+    await add_alerts([alert])
+
+async def add_alerts(alerts: list):
+    """
+    Add several alerts to the store in one operation. With ack_after_commit
+    this returns once the store's writer task has written them to the log.
+    """
+    with store_operation_seconds.time("add"):
+        if ACK_AFTER_COMMIT:
+            await open_store().commit(alerts)
+        else:
+            open_store().add(alerts)
+    for alert in alerts:
+        stats.add(alert)
+        alerts_received.inc(alert["scenario"])
+
+async def query_alerts(since=None, until=None, scenario=None, mac_address=None, cursor=None, limit=None):
+    """Retrieve a page of alerts from the store, returning (alerts, next_cursor)."""
+    return await open_store().query_async(since=since, until=until, scenario=scenario,
+                              mac_address=mac_address, cursor=cursor, limit=limit)
+
+async def count_alerts(since=None, until=None, scenario=None, mac_address=None):
+    """Count the stored alerts matching the filters."""
+    return await open_store().count_async(since=since, until=until, scenario=scenario, mac_address=mac_address)
+
+def alert_stats(since=None, until=None, scenario=None, mac_address=None):
+    """Get the alert counts per scenario, per node and per time bucket, without reading the store."""
+    open_store()
+    return stats.query(since=since, until=until, scenario=scenario, mac_address=mac_address)
+
+def subscribe_alerts(scenario=None, mac_address=None, cursor=None):
+    """
+    Subscribe to new alerts. Returns the subscription and, when resuming from
+    a cursor, the (cursor, alert) pairs stored after it to send first.
+    """
+    backlog = open_store().entries(scenario=scenario, mac_address=mac_address, cursor=cursor) if cursor else []
+    # No await between the replay and the subscription, so no alert falls in between
+    return broadcaster.subscribe(scenario, mac_address), backlog
+
+def unsubscribe_alerts(subscription):
+    broadcaster.unsubscribe(subscription)
+
+async def fetch_alerts(since_timestamp=None):
     """Retrieve alerts, optionally filtering by timestamp."""
-    alerts = load_alerts()
-    if since_timestamp:
-        return [a for a in alerts if a["timestamp"] > since_timestamp]
+    alerts, _ = await query_alerts(since=since_timestamp or None)
     return alerts
 
-def create_alert_object(scenario, message):
-    """Create an alert object."""
-    return {
+def create_alert_object(scenario, message, count=None, first_seen=None, last_seen=None):
+    """Create an alert object, with the occurrence count and first/last seen times of collapsed alerts."""
+    alert = {
         "timestamp": datetime.datetime.now().isoformat(),
         "scenario": scenario,
         "message": message,
         "mac_address": fetch_mac_address()
     }
+    if count is not None:
+        alert["count"] = count
+        alert["first_seen"] = first_seen.isoformat() if first_seen else None
+        alert["last_seen"] = last_seen.isoformat() if last_seen else None
+    return alert
 
 async def send_alert_to_trust_manager(alert: dict):
     """Send alert to the Trust Manager component."""
-    tm_client = TrustManagerClient()
-    await tm_client.post_alert_async(alert)
\ No newline at end of file
+    return await tm_client.post_alert_async(alert)
+
+async def send_alerts_to_trust_manager(alerts: list):
+    """Send several alerts to the Trust Manager component, returning the undelivered ones."""
+    return await tm_client.post_alerts_async(alerts)
+
+async def close_trust_manager_client():
+    """Close the pooled connections to the Trust Manager."""
+    await tm_client.close()
+
+def open_outbox():
+    """Open the Trust Manager outbox, recovering alerts left undelivered by a previous run."""
+    global outbox
+    if outbox is None:
+        outbox = Outbox(OUTBOX_PATH, send_alerts_to_trust_manager, workers=OUTBOX_WORKERS,
+                        batch_size=OUTBOX_BATCH_SIZE, high_water_mark=OUTBOX_HIGH_WATER_MARK,
+                        enqueue_timeout=OUTBOX_ENQUEUE_TIMEOUT, base_backoff=OUTBOX_BASE_BACKOFF,
+                        max_backoff=OUTBOX_MAX_BACKOFF, fsync=OUTBOX_FSYNC)
+    return outbox
+
+async def start_outbox():
+    """Open the Trust Manager outbox and start its delivery workers."""
+    await open_outbox().start()
+
+async def close_outbox():
+    """Stop the delivery workers, keeping undelivered alerts for the next start."""
+    global outbox
+    if outbox is not None:
+        await outbox.close()
+        outbox = None
+
+async def forward_to_trust_manager(alerts: list) -> bool:
+    """
+    Queue stored alerts for delivery to the Trust Manager, waiting while the
+    outbox is full. Returns False when they could not be queued: they stay
+    stored locally, but are not forwarded.
+    """
+    try:
+        await open_outbox().put(alerts)
+        return True
+    except (OutboxFull, OSError) as e:
+        logging.error(f"Not forwarding {len(alerts)} stored alert(s) to the Trust Manager: {e}")
+        trust_manager_failures.inc("outbox_full" if isinstance(e, OutboxFull) else "outbox_error", amount=len(alerts))
+        return False
+
+def outbox_status():
+    """Report the Trust Manager delivery backlog."""
+    return open_outbox().status()
+
+def outbox_metric(field):
+    return lambda: outbox_status()[field] if outbox is not None else None
+
+registry.register(Callback("self_healing_store_records", "Alerts kept in the store.",
+                           lambda: store_status()["records"] if store is not None else None))
+registry.register(Callback("self_healing_store_pending", "Alerts not yet flushed to the alert log.",
+                           lambda: store_status()["pending"] if store is not None else None))
+registry.register(Callback("self_healing_outbox_pending", "Alerts waiting for delivery to the Trust Manager.", outbox_metric("pending")))
+registry.register(Callback("self_healing_outbox_in_flight", "Alerts being delivered to the Trust Manager.", outbox_metric("in_flight")))
+registry.register(Callback("self_healing_outbox_delivered_total", "Alerts delivered to the Trust Manager.",
+                           outbox_metric("delivered"), kind="counter"))
+registry.register(Callback("self_healing_outbox_failed_attempts_total", "Failed Trust Manager delivery attempts.",
+                           outbox_metric("failed_attempts"), kind="counter"))
+registry.register(Callback("self_healing_stream_subscribers", "Clients subscribed to the alert stream.", lambda: len(broadcaster)))
@@ -0,0 +1,73 @@
+"""
+In-process fan-out of new alerts to streaming subscribers.
+
+Subscribers are grouped by their (scenario, mac_address) filter, so
+publishing an alert looks up at most four groups instead of testing every
+subscriber. Each subscriber has a bounded buffer and an event; an idle
+subscriber is just a coroutine waiting on its event and costs nothing
+until an alert matches it. A subscriber that falls behind loses its oldest
+alerts, and is told how many, instead of growing without bound.
+"""
+
+import asyncio
+from collections import deque
+
+class Subscription:
+    def __init__(self, scenario: str = None, mac_address: str = None, buffer_size: int = 1000):
+        self.key = (scenario, mac_address)
+        self.buffer = deque(maxlen=max(1, buffer_size))  # (cursor, alert) pairs
+        self.dropped = 0
+        self.event = asyncio.Event()
+
+    def push(self, cursor: str, alert: dict):
+        if len(self.buffer) == self.buffer.maxlen:
+            self.dropped += 1
+        self.buffer.append((cursor, alert))
+        self.event.set()
+
+    async def get(self, timeout: float = None) -> tuple:
+        """
+        Waits for new alerts and returns (entries, dropped): the buffered
+        (cursor, alert) pairs and how many alerts were lost since the last
+        call. Returns empty results when `timeout` expires first.
+        """
+        if not self.buffer:
+            try:
+                await asyncio.wait_for(self.event.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        self.event.clear()
+        entries = list(self.buffer)
+        self.buffer.clear()
+        dropped, self.dropped = self.dropped, 0
+        return entries, dropped
+
+class Broadcaster:
+    def __init__(self, buffer_size: int = 1000):
+        self.buffer_size = buffer_size
+        self.groups = {}  # (scenario, mac_address) filter -> subscriptions
+
+    def __len__(self):
+        return sum(len(group) for group in self.groups.values())
+
+    def subscribe(self, scenario: str = None, mac_address: str = None) -> Subscription:
+        subscription = Subscription(scenario, mac_address, self.buffer_size)
+        self.groups.setdefault(subscription.key, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        group = self.groups.get(subscription.key)
+        if group is not None:
+            group.discard(subscription)
+            if not group:
+                del self.groups[subscription.key]
+
+    def publish(self, entries: list):
+        """Delivers (cursor, alert) pairs to the subscribers whose filter they match."""
+        if not self.groups:
+            return
+        for cursor, alert in entries:
+            scenario, mac_address = alert.get("scenario"), alert.get("mac_address")
+            for key in {(None, None), (scenario, None), (None, mac_address), (scenario, mac_address)}:
+                for subscription in self.groups.get(key, ()):
+                    subscription.push(cursor, alert)
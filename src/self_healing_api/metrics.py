@@ -0,0 +1,178 @@
+"""
+Minimal Prometheus metrics for the self-healing API.
+
+Counters and histograms are plain Python numbers updated from the event
+loop, so recording a sample is a dict lookup and an addition: no locks and
+no client library. The values are per process: with several uvicorn
+workers, a scrape of /metrics reaches one of them and only reports that
+worker's counters, so run a single worker for complete figures. Values that
+already live elsewhere (store size, outbox backlog) are read by callbacks
+when the metrics are rendered instead of being mirrored on every update.
+"""
+
+import time
+from bisect import bisect_left
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values = {}  # label values -> count
+
+    def inc(self, *labels, amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def samples(self):
+        for labels, value in self.values.items():
+            yield self.name, format_labels(self.labelnames, labels), value
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self.values = {}  # label values -> [bucket counts..., sum, count]
+
+    def observe(self, value: float, *labels):
+        series = self.values.get(labels)
+        if series is None:
+            series = self.values[labels] = [0] * len(self.buckets) + [0.0, 0]
+        series[bisect_left(self.buckets, value)] += 1  # Counted in its own bucket, made cumulative on render
+        series[-2] += value
+        series[-1] += 1
+
+    def time(self, *labels):
+        return Timer(self, labels)
+
+    def samples(self):
+        for labels, series in self.values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                le = f'le="{format_value(bound)}"'
+                yield f"{self.name}_bucket", format_labels(self.labelnames, labels, le), cumulative
+            yield f"{self.name}_sum", format_labels(self.labelnames, labels), series[-2]
+            yield f"{self.name}_count", format_labels(self.labelnames, labels), series[-1]
+
+class Timer:
+    """Context manager observing the elapsed time into a histogram."""
+
+    def __init__(self, histogram: Histogram, labels: tuple):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start, *self.labels)
+
+class Callback:
+    """Gauge or counter whose value is read from `function` at render time."""
+
+    def __init__(self, name: str, documentation: str, function, kind: str = "gauge", labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.function = function
+        self.kind = kind
+        self.labelnames = tuple(labelnames)
+
+    def samples(self):
+        value = self.function()
+        if value is None:
+            return
+        if not isinstance(value, dict):
+            value = {(): value}
+        for labels, sample in value.items():
+            labels = labels if isinstance(labels, tuple) else (labels,)
+            yield self.name, format_labels(self.labelnames, labels), sample
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Renders every metric in the Prometheus text exposition format."""
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            try:
+                for name, labels, value in metric.samples():
+                    lines.append(f"{name}{labels} {format_value(value)}")
+            except Exception as e:
+                lines.append(f"# {metric.name} unavailable: {e}")
+        return "\n".join(lines) + "\n"
+
+registry = Registry()
+
+http_requests = registry.register(Counter(
+    "self_healing_http_requests_total", "HTTP requests handled, by route and status code.", ("method", "route", "status")))
+http_request_seconds = registry.register(Histogram(
+    "self_healing_http_request_duration_seconds", "HTTP request latency, by route.", ("method", "route")))
+alerts_received = registry.register(Counter(
+    "self_healing_alerts_total", "Alerts added to the store, by scenario.", ("scenario",)))
+store_operation_seconds = registry.register(Histogram(
+    "self_healing_store_operation_seconds", "Alert store operation latency.", ("operation",)))
+trust_manager_request_seconds = registry.register(Histogram(
+    "self_healing_trust_manager_request_duration_seconds", "Trust Manager request latency."))
+trust_manager_failures = registry.register(Counter(
+    "self_healing_trust_manager_failures_total", "Trust Manager requests that failed, by reason.", ("reason",)))
+
+class MetricsMiddleware:
+    """ASGI middleware counting requests and timing them per route template."""
+
+    def __init__(self, app):
+        self.app = app
+        self.routes = None  # endpoint -> route path, built on the first request
+
+    def route_of(self, scope) -> str:
+        if self.routes is None:
+            self.routes = {route.endpoint: route.path for route in scope["app"].routes if hasattr(route, "endpoint")}
+        return self.routes.get(scope.get("endpoint"), "unmatched")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = [500]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = self.route_of(scope)
+            http_request_seconds.observe(time.perf_counter() - start, scope["method"], route)
+            http_requests.inc(scope["method"], route, str(status[0]))
@@ -0,0 +1,209 @@
+"""
+Durable outbox for forwarding alerts to the Trust Manager.
+
+Alerts are journaled to disk, and fsynced once per batch unless `fsync` is
+off, before they are acknowledged to the caller, and removed from the journal
+only once the Trust Manager accepted them, so they survive a Trust Manager
+outage, a restart of the API and, with `fsync`, a crash of the host. A fixed
+pool of workers delivers them in batches, retrying failures with exponential
+backoff. Once `high_water_mark` alerts are waiting, new alerts wait for room
+(up to `enqueue_timeout` seconds) instead of piling up without bound.
+"""
+
+import os
+import json
+import random
+import asyncio
+import logging
+
+class OutboxFull(Exception):
+    """Raised when the outbox stays above its high-water mark for too long."""
+
+class Outbox:
+    def __init__(self, path: str, deliver, workers: int = 4, batch_size: int = 20, high_water_mark: int = 1000,
+                 enqueue_timeout: float = 5.0, base_backoff: float = 0.5, max_backoff: float = 60.0,
+                 compact_threshold: int = 1000, fsync: bool = True):
+        self.path = path
+        self.deliver = deliver  # async callable(alerts) -> alerts that could not be delivered
+        self.workers = max(1, workers)
+        self.batch_size = max(1, batch_size)
+        self.high_water_mark = max(1, high_water_mark)
+        self.enqueue_timeout = enqueue_timeout
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.compact_threshold = compact_threshold
+        self.fsync = fsync
+
+        self.pending = {}  # id -> alert, in enqueue order
+        self.attempts = {}  # id -> failed deliveries so far
+        self.next_id = 0
+        self.in_flight = 0
+        self.reserved = 0  # Room taken by producers that waited for it and are about to enqueue
+        self.delivered = 0
+        self.failed = 0
+        self._acked_since_compaction = 0
+        self._journal = None
+        self._queue = None
+        self._room = asyncio.Condition()
+        self._retries = {}  # id -> scheduled retry
+        self._tasks = []
+        self._replay()
+
+    def __len__(self):
+        return len(self.pending)
+
+    def _replay(self):
+        """Rebuilds the pending alerts from the journal."""
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as file:
+                for line in file:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # Partially written entry
+                    if "ack" in entry:
+                        for entry_id in entry["ack"]:
+                            self.pending.pop(entry_id, None)
+                    else:
+                        self.pending[entry["id"]] = entry["alert"]
+                        self.next_id = max(self.next_id, entry["id"] + 1)
+        self._compact()
+
+    def _compact(self):
+        """Rewrites the journal so that it only holds the pending alerts."""
+        if self._journal:
+            self._journal.close()
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            for entry_id, alert in self.pending.items():
+                file.write(json.dumps({"id": entry_id, "alert": alert}) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, self.path)
+        self._journal = open(self.path, "a", encoding="utf-8")
+        self._acked_since_compaction = 0
+
+    def _write(self, entries: list):
+        self._journal.write("".join(json.dumps(entry) + "\n" for entry in entries))
+        self._journal.flush()
+        if self.fsync:
+            os.fsync(self._journal.fileno())
+
+    async def put(self, alerts: list):
+        """Journals alerts for delivery, waiting while the outbox is above its high-water mark."""
+        reserved = 0
+        if len(self.pending) + self.reserved + len(alerts) > self.high_water_mark:
+            try:
+                await asyncio.wait_for(self._reserve_room(len(alerts)), timeout=self.enqueue_timeout)
+            except asyncio.TimeoutError:
+                raise OutboxFull(f"Trust Manager outbox is full ({len(self.pending)} alerts pending)")
+            reserved = len(alerts)
+
+        entries = []
+        for alert in alerts:
+            entries.append({"id": self.next_id, "alert": alert})
+            self.pending[self.next_id] = alert
+            self.next_id += 1
+        self.reserved -= reserved
+        self._write(entries)
+        if self._queue is not None:
+            for entry in entries:
+                self._queue.put_nowait(entry["id"])
+
+    async def _reserve_room(self, count: int):
+        """Waits until `count` alerts fit and takes their room before releasing the lock, so woken producers cannot overfill it."""
+        async with self._room:
+            # An oversized batch only waits for the outbox to drain completely
+            await self._room.wait_for(lambda: len(self.pending) + self.reserved + count <= self.high_water_mark
+                                      or not (self.pending or self.reserved))
+            self.reserved += count
+
+    async def _ack(self, entry_ids: list):
+        for entry_id in entry_ids:
+            self.pending.pop(entry_id, None)
+            self.attempts.pop(entry_id, None)
+        self._write([{"ack": entry_ids}])
+        self.delivered += len(entry_ids)
+        self._acked_since_compaction += len(entry_ids)
+        if self._acked_since_compaction >= self.compact_threshold:
+            self._compact()
+        async with self._room:
+            self._room.notify_all()
+
+    def _retry_later(self, entry_id: int):
+        attempts = self.attempts.get(entry_id, 0) + 1
+        self.attempts[entry_id] = attempts
+        delay = min(self.max_backoff, self.base_backoff * 2 ** (attempts - 1))
+        delay *= random.uniform(0.5, 1.0)  # Jitter, so retries do not arrive in waves
+        self._retries[entry_id] = asyncio.get_running_loop().call_later(delay, self._requeue, entry_id)
+
+    def _requeue(self, entry_id: int):
+        self._retries.pop(entry_id, None)
+        if entry_id in self.pending:
+            self._queue.put_nowait(entry_id)
+
+    async def _worker(self):
+        while True:
+            entry_ids = [await self._queue.get()]
+            while len(entry_ids) < self.batch_size and not self._queue.empty():
+                entry_ids.append(self._queue.get_nowait())
+            entry_ids = [entry_id for entry_id in entry_ids if entry_id in self.pending]
+            if not entry_ids:
+                continue
+
+            alerts = [self.pending[entry_id] for entry_id in entry_ids]
+            self.in_flight += len(alerts)
+            try:
+                undelivered = await self.deliver(alerts)
+            except Exception as e:
+                logging.error(f"Failed to deliver alerts to the Trust Manager component: {e}")
+                undelivered = alerts
+            finally:
+                self.in_flight -= len(alerts)
+
+            # deliver() hands back the very alert objects it could not deliver
+            undelivered = {id(alert) for alert in undelivered}
+            acked = []
+            for entry_id, alert in zip(entry_ids, alerts):
+                if id(alert) in undelivered:
+                    self.failed += 1
+                    self._retry_later(entry_id)
+                else:
+                    acked.append(entry_id)
+            if acked:
+                await self._ack(acked)
+
+    def status(self) -> dict:
+        return {
+            "pending": len(self.pending),
+            "in_flight": self.in_flight,
+            "retrying": len(self.attempts),
+            "delivered": self.delivered,
+            "failed_attempts": self.failed,
+            "high_water_mark": self.high_water_mark,
+        }
+
+    async def start(self):
+        """Starts the workers and schedules the alerts left over from the journal."""
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue()
+        for entry_id in self.pending:
+            self._queue.put_nowait(entry_id)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def close(self):
+        """Stops the workers. Undelivered alerts stay in the journal for the next start."""
+        for handle in self._retries.values():
+            handle.cancel()
+        self._retries.clear()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+        if self._journal:
+            self._journal.flush()
+            os.fsync(self._journal.fileno())
+            self._journal.close()
+            self._journal = None
@@ -0,0 +1,240 @@
+"""
+SQLite backend for the alert store.
+
+Alerts are rows of a single table, indexed on timestamp, scenario and MAC
+address, and every filter of GET /alerts (time range, scenario, node,
+cursor, limit) becomes a WHERE clause on those indexes. Only the rows asked
+for are read, so queries stay fast however much history is kept, and the
+history is not limited by memory.
+
+The database runs in WAL mode and its connection is only used from the
+event loop. `AlertStore.add()` inserts new alerts in one prepared batch, inside a
+transaction that stays open until the writer task commits it, so queries on
+the same connection see them right away. With WAL and synchronous=NORMAL a
+commit is an append to the WAL file without an fsync, cheap enough to run
+on the event loop; synchronous=FULL fsyncs every commit. Requests query the
+database in a worker thread, on a read-only connection of their own, so a
+long scan does not hold up ingestion or the streams; that connection only
+sees committed alerts, which with ack_after_commit are all acknowledged ones.
+"""
+
+import os
+import json
+import asyncio
+import pathlib
+import sqlite3
+import threading
+
+from alert_log import AlertLog
+from alert_index import parse_timestamp, encode_cursor, decode_cursor
+from alert_store import AlertStore
+from broadcaster import Broadcaster
+from metrics import store_operation_seconds
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS alerts (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    scenario TEXT,
+    mac_address TEXT,
+    alert TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS alerts_ts ON alerts (ts);
+CREATE INDEX IF NOT EXISTS alerts_scenario_ts ON alerts (scenario, ts);
+CREATE INDEX IF NOT EXISTS alerts_mac_address_ts ON alerts (mac_address, ts);
+"""
+
+INSERT = "INSERT INTO alerts (id, ts, scenario, mac_address, alert) VALUES (?, ?, ?, ?, ?)"
+
+def where_clause(since=None, until=None, scenario=None, mac_address=None, cursor=None) -> tuple:
+    """Translates the query filters to a WHERE clause and its parameters."""
+    clauses, params = [], []
+    if since is not None:
+        clauses.append("ts > ?")
+        params.append(parse_timestamp(since))
+    if until is not None:
+        clauses.append("ts < ?")
+        params.append(parse_timestamp(until))
+    if scenario is not None:
+        clauses.append("scenario = ?")
+        params.append(scenario)
+    if mac_address is not None:
+        clauses.append("mac_address = ?")
+        params.append(mac_address)
+    if cursor is not None:
+        clauses.append("(ts, id) > (?, ?)")
+        params.extend(decode_cursor(cursor))
+    return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+class AlertDatabase:
+    def __init__(self, path: str, max_records: int = 250, synchronous: str = "NORMAL"):
+        self.path = path
+        self.max_records = max(1, max_records)
+        self.connection = sqlite3.connect(path, isolation_level=None)  # Transactions are managed explicitly
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(f"PRAGMA synchronous={synchronous}")
+        self.connection.executescript(SCHEMA)
+        first, last = self.connection.execute("SELECT MIN(id), MAX(id) FROM alerts").fetchone()
+        self.first_seq = first if first is not None else 0
+        self.next_seq = last + 1 if last is not None else 0
+        self.uncommitted = []  # Rows of the open transaction, inserted again if a failed commit rolls it back
+        self.reader = None  # Read-only connection of the worker threads, opened on first use
+        self.read_lock = threading.Lock()
+
+    def __len__(self):
+        return self.next_seq - self.first_seq
+
+    def insert(self, alerts: list) -> list:
+        """Inserts alerts in the open transaction and returns their (timestamp, seq) keys."""
+        rows, keys = [], []
+        for alert in alerts:
+            try:
+                timestamp = parse_timestamp(alert.get("timestamp"))
+            except (TypeError, ValueError):
+                timestamp = 0.0
+            rows.append((self.next_seq, timestamp, alert.get("scenario"), alert.get("mac_address"), json.dumps(alert)))
+            keys.append((timestamp, self.next_seq))
+            self.next_seq += 1
+        if not self.connection.in_transaction:
+            self._begin()
+        self.connection.executemany(INSERT, rows)
+        self.uncommitted.extend(rows)
+        return keys
+
+    def _begin(self):
+        self.connection.execute("BEGIN")
+        if self.uncommitted:
+            self.connection.executemany(INSERT, self.uncommitted)
+
+    def commit(self):
+        """Applies the retention limit and commits the inserted rows; after a failure they are all written again."""
+        if not self.uncommitted and not self.connection.in_transaction:
+            return
+        first_seq = max(self.first_seq, self.next_seq - self.max_records)
+        try:
+            if not self.connection.in_transaction:
+                self._begin()
+            if first_seq > self.first_seq:
+                self.connection.execute("DELETE FROM alerts WHERE id < ?", (first_seq,))
+            self.connection.execute("COMMIT")
+        except sqlite3.Error:
+            if self.connection.in_transaction:  # SQLite does not always roll back a failed COMMIT by itself
+                self.connection.execute("ROLLBACK")
+            raise
+        self.first_seq = first_seq
+        self.uncommitted = []
+
+    def read(self, query, **filters):
+        """Runs `select` or `count` on the read-only connection; safe to call from any thread."""
+        with self.read_lock:
+            if self.reader is None:
+                uri = pathlib.Path(os.path.abspath(self.path)).as_uri() + "?mode=ro"
+                self.reader = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            return query(connection=self.reader, **filters)
+
+    def select(self, since=None, until=None, scenario=None, mac_address=None, cursor=None, limit=None,
+               connection=None) -> tuple:
+        """Returns (rows, next_cursor) for the query filters, with the same semantics as `AlertIndex.select`."""
+        connection = connection or self.connection
+        where, params = where_clause(since, until, scenario, mac_address, cursor)
+        sql = f"SELECT ts, id, alert FROM alerts{where} ORDER BY ts, id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit + 1)  # One more row tells whether there is a next page
+        rows = connection.execute(sql, params).fetchall()
+        next_cursor = None
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1][:2])
+        return rows, next_cursor
+
+    def count(self, connection=None, **filters) -> int:
+        connection = connection or self.connection
+        where, params = where_clause(**filters)
+        return connection.execute(f"SELECT COUNT(*) FROM alerts{where}", params).fetchone()[0]
+
+    def migrate(self, legacy_path: str) -> int:
+        """Imports alerts from a legacy JSON list file and renames it so it is only imported once."""
+        if not os.path.exists(legacy_path):
+            return 0
+        with open(legacy_path, "r") as file:
+            try:
+                alerts = json.load(file)
+            except json.JSONDecodeError:
+                alerts = []
+        if not isinstance(alerts, list) or not alerts:
+            return 0
+        self.insert(alerts)
+        self.commit()
+        os.replace(legacy_path, legacy_path + ".migrated")
+        return len(alerts)
+
+    def migrate_log(self, directory: str) -> int:
+        """Imports the alerts of a segmented alert log into an empty database."""
+        if len(self) or not os.path.isdir(directory):
+            return 0
+        alerts = [alert for _, alert in AlertLog(directory, max_records=self.max_records).read()]
+        if alerts:
+            self.insert(alerts)
+            self.commit()
+        return len(alerts)
+
+    def close(self):
+        self.commit()
+        with self.read_lock:
+            if self.reader is not None:
+                self.reader.close()
+                self.reader = None
+        self.connection.close()
+
+class SQLiteAlertStore(AlertStore):
+    write_in_thread = False  # The connection belongs to the event loop thread
+    write_errors = (sqlite3.Error,)
+
+    def __init__(self, database: AlertDatabase, flush_interval: float = 1.0, flush_max_pending: int = 100,
+                 broadcaster: Broadcaster = None):
+        super().__init__(database, flush_interval, flush_max_pending, broadcaster)
+
+    def _load(self):
+        self.index = None
+        self.next_seq = self.log.next_seq
+
+    def _append(self, alerts: list) -> list:
+        keys = self.log.insert(alerts)
+        self.next_seq = self.log.next_seq
+        return [(encode_cursor(key), alert) for key, alert in zip(keys, alerts)]
+
+    def _write(self, alerts: list):
+        self.log.commit()
+
+    def _written(self):
+        pass  # Retention is applied by the commit itself
+
+    def query(self, **filters):
+        with store_operation_seconds.time("query"):
+            rows, next_cursor = self.log.select(**filters)
+            return [json.loads(row[2]) for row in rows], next_cursor
+
+    async def query_async(self, **filters):
+        with store_operation_seconds.time("query"):
+            return await asyncio.to_thread(self._read_query, **filters)
+
+    def _read_query(self, **filters):
+        rows, next_cursor = self.log.read(self.log.select, **filters)
+        return [json.loads(row[2]) for row in rows], next_cursor
+
+    def entries(self, **filters) -> list:
+        rows, _ = self.log.select(**filters)
+        return [(encode_cursor(row[:2]), json.loads(row[2])) for row in rows]
+
+    def count(self, **filters) -> int:
+        return self.log.count(**filters)
+
+    async def count_async(self, **filters) -> int:
+        return await asyncio.to_thread(self.log.read, self.log.count, **filters)
+
+    def __len__(self):
+        return len(self.log)
+
+    def _storage_status(self) -> dict:
+        return {"backend": "sqlite", "database": self.log.path}
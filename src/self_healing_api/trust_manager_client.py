@@ -1,9 +1,10 @@
-import datetime
+import asyncio
 import logging
 import httpx
-import uuid
 import configparser
 
+from metrics import trust_manager_request_seconds, trust_manager_failures
+
 # Load Configuration
 config = configparser.ConfigParser()
 config.read("config.ini")
@@ -12,21 +13,64 @@ DOMAIN_URL = config.get("trust_manager", "domain_url", fallback="10.254.102.73")
 DOMAIN_PORT = config.get("trust_manager", "domain_port", fallback="3000")
 REQUEST_TIMEOUT = config.getint("trust_manager", "request_timeout", fallback=15)
 ASYNC_REQUEST_TIMEOUT = config.getint("trust_manager", "async_request_timeout", fallback=15)
+BATCH_DELIVERY = config.getboolean("trust_manager", "batch_delivery", fallback=False)
+MAX_CONNECTIONS = config.getint("http_client", "max_connections", fallback=10)
+MAX_KEEPALIVE_CONNECTIONS = config.getint("http_client", "max_keepalive_connections", fallback=5)
+KEEPALIVE_EXPIRY = config.getfloat("http_client", "keepalive_expiry", fallback=30.0)
 
 class TrustManagerClient:
     def __init__(self):
         self.domain_url = DOMAIN_URL
         self.domain_port = DOMAIN_PORT
+        self.health_url = f"http://{self.domain_url}:{self.domain_port}/health"
+        self.client = None
+
+    def get_client(self) -> httpx.AsyncClient:
+        """
+        Returns the pooled client, creating it on first use. Only the outbox
+        workers post through it, so waiting for a free connection of the
+        bounded pool is what limits the requests in flight.
+        """
+        if self.client is None or self.client.is_closed:
+            limits = httpx.Limits(
+                max_connections=MAX_CONNECTIONS,
+                max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=KEEPALIVE_EXPIRY,
+            )
+            self.client = httpx.AsyncClient(limits=limits, timeout=httpx.Timeout(ASYNC_REQUEST_TIMEOUT, pool=None))
+        return self.client
+
+    async def close(self):
+        """Closes the pooled connections."""
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    async def post_alert_async(self, alert: dict) -> bool:
+        return await self._post(alert)
+
+    async def post_alerts_async(self, alerts: list) -> list:
+        """
+        Posts the alerts to the Trust Manager and returns the ones that were not accepted.
+        With batch_delivery enabled they are sent as one JSON array, otherwise one
+        request per alert is made concurrently through the shared connection pool.
+        """
+        if BATCH_DELIVERY:
+            return [] if await self._post(alerts) else list(alerts)
+        accepted = await asyncio.gather(*(self._post(alert) for alert in alerts))
+        return [alert for alert, ok in zip(alerts, accepted) if not ok]
 
-    async def post_alert_async(self, alert: dict):
-        url = f"http://{self.domain_url}:{self.domain_port}/health"
-        print(f"Sending alert to Trust Manager: {url} component: {alert}")
-        async with httpx.AsyncClient(timeout=ASYNC_REQUEST_TIMEOUT) as client:
-            try:
-                response = await client.post(url, json=alert)
-                if response.status_code in [200, 201]:
-                    logging.info(f"Alert added successfully to the Trust Manager component")
-                else:
-                    logging.error(f"Failed to add alert to the Trust Manager component")
-            except httpx.RequestError as e:
-                logging.error(f"Failed to add alert to the Trust Manager component: {e}")
+    async def _post(self, payload) -> bool:
+        logging.debug("Sending alert to Trust Manager: %s component: %s", self.health_url, payload)
+        try:
+            with trust_manager_request_seconds.time():
+                response = await self.get_client().post(self.health_url, json=payload)
+            if response.status_code in [200, 201]:
+                logging.info(f"Alert added successfully to the Trust Manager component")
+                return True
+            trust_manager_failures.inc(str(response.status_code))
+            logging.error(f"Failed to add alert to the Trust Manager component: {response.status_code}")
+        except httpx.RequestError as e:
+            trust_manager_failures.inc(type(e).__name__)
+            logging.error(f"Failed to add alert to the Trust Manager component: {e!r}")
+        return False
@@ -0,0 +1,52 @@
+"""
+Process-wide pooled HTTP client shared by the API clients.
+
+Connections are kept alive between alerts instead of being opened and closed
+for every request, the pool size is bounded and at most `max_concurrency`
+requests are in flight at once.
+"""
+
+import asyncio
+import httpx
+
+from config.loader import get_settings
+
+# The pool is sized once, a change takes effect on restart
+http_settings = get_settings().http_client
+MAX_CONNECTIONS = http_settings.max_connections
+MAX_KEEPALIVE_CONNECTIONS = http_settings.max_keepalive_connections
+KEEPALIVE_EXPIRY = http_settings.keepalive_expiry
+MAX_CONCURRENCY = http_settings.max_concurrency
+REQUEST_TIMEOUT = http_settings.request_timeout
+
+client = None
+semaphore = None
+
+def get_http_client() -> httpx.AsyncClient:
+    """Returns the shared client, creating it on first use."""
+    global client, semaphore
+    if client is None or client.is_closed:
+        limits = httpx.Limits(
+            max_connections=MAX_CONNECTIONS,
+            max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=KEEPALIVE_EXPIRY,
+        )
+        client = httpx.AsyncClient(limits=limits, timeout=REQUEST_TIMEOUT)
+        semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
+    return client
+
+async def post(url: str, payload, timeout=None) -> httpx.Response:
+    """Posts JSON through the shared client, waiting for a free slot first."""
+    http_client = get_http_client()
+    async with semaphore:
+        if timeout is None:
+            return await http_client.post(url, json=payload)
+        return await http_client.post(url, json=payload, timeout=timeout)
+
+async def close_http_client():
+    """Closes the shared client and its pooled connections."""
+    global client, semaphore
+    if client is not None:
+        await client.aclose()
+        client = None
+        semaphore = None
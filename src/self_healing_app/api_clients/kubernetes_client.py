@@ -0,0 +1,221 @@
+"""
+In-cluster Kubernetes API client and watch-backed pod cache.
+
+The client authenticates with the pod's service account (bearer token and
+cluster CA from the mounted secret) and keeps one connection pool to the API
+server, separate from the shared HTTP client so a long-running watch never
+takes a slot from the alert requests. The token file is re-read when the
+kubelet rotates it.
+
+`PodCache` lists the pods matching a label selector once and then follows a
+watch, so looking up a pod is a dict read instead of an API round trip. It
+lists again when the watch expires (410 Gone) and backs off when the API
+server is unreachable.
+"""
+
+import os
+import json
+import random
+import asyncio
+import logging
+import httpx
+
+from config.loader import get_settings
+
+SERVICE_ACCOUNT_DIR = "/var/run/secrets/kubernetes.io/serviceaccount"
+
+kubernetes_settings = get_settings().kubernetes
+API_URL = kubernetes_settings.api_url
+NAMESPACE = kubernetes_settings.namespace
+LABEL_SELECTOR = kubernetes_settings.label_selector
+REQUEST_TIMEOUT = kubernetes_settings.request_timeout
+WATCH_TIMEOUT = kubernetes_settings.watch_timeout
+MAX_BACKOFF = kubernetes_settings.max_backoff
+
+class KubernetesError(Exception):
+    def __init__(self, status_code: int, message: str):
+        super().__init__(f"Kubernetes API error {status_code}: {message}")
+        self.status_code = status_code
+
+class KubernetesClient:
+    def __init__(self, api_url: str, token_path: str = None, ca_path: str = None, namespace: str = "default",
+                 timeout: float = REQUEST_TIMEOUT):
+        self.api_url = api_url.rstrip("/")
+        self.token_path = token_path
+        self.namespace = namespace
+        self.timeout = timeout
+        self._token = None
+        self._token_mtime = None
+        verify = ca_path if ca_path and os.path.exists(ca_path) else True
+        self.client = httpx.AsyncClient(base_url=self.api_url, verify=verify, timeout=timeout)
+
+    @classmethod
+    def from_service_account(cls, directory: str = SERVICE_ACCOUNT_DIR):
+        """Builds a client from the service account mounted in the pod; raises FileNotFoundError outside a cluster."""
+        token_path = os.path.join(directory, "token")
+        if not os.path.exists(token_path):
+            raise FileNotFoundError(f"No service account token in {directory}")
+        api_url = API_URL
+        if not api_url:
+            host = os.environ.get("KUBERNETES_SERVICE_HOST")
+            port = os.environ.get("KUBERNETES_SERVICE_PORT", "443")
+            if not host:
+                raise FileNotFoundError("KUBERNETES_SERVICE_HOST is not set")
+            api_url = f"https://[{host}]:{port}" if ":" in host else f"https://{host}:{port}"
+        namespace = NAMESPACE
+        namespace_path = os.path.join(directory, "namespace")
+        if not namespace and os.path.exists(namespace_path):
+            with open(namespace_path, "r") as file:
+                namespace = file.read().strip()
+        return cls(api_url, token_path, os.path.join(directory, "ca.crt"), namespace or "default")
+
+    def headers(self) -> dict:
+        """Returns the Authorization header, re-reading the token whenever its file changes."""
+        if self.token_path is None:
+            return {}
+        mtime = os.stat(self.token_path).st_mtime
+        if mtime != self._token_mtime:
+            with open(self.token_path, "r") as file:
+                self._token = file.read().strip()
+            self._token_mtime = mtime
+        return {"Authorization": f"Bearer {self._token}"}
+
+    def pods_path(self) -> str:
+        return f"/api/v1/namespaces/{self.namespace}/pods"
+
+    async def list_pods(self, label_selector: str = None) -> tuple:
+        """Returns (pods, resource version of the list)."""
+        params = {"labelSelector": label_selector} if label_selector else {}
+        response = await self.client.get(self.pods_path(), params=params, headers=self.headers())
+        if response.status_code != 200:
+            raise KubernetesError(response.status_code, response.text)
+        body = response.json()
+        return body.get("items", []), body.get("metadata", {}).get("resourceVersion")
+
+    async def watch_pods(self, label_selector: str = None, resource_version: str = None, timeout: int = WATCH_TIMEOUT):
+        """Yields the watch events (dicts with 'type' and 'object') of the matching pods."""
+        params = {"watch": "1", "allowWatchBookmarks": "true", "timeoutSeconds": str(timeout)}
+        if label_selector:
+            params["labelSelector"] = label_selector
+        if resource_version:
+            params["resourceVersion"] = resource_version
+        stream_timeout = httpx.Timeout(self.timeout, read=timeout + self.timeout)
+        async with self.client.stream("GET", self.pods_path(), params=params, headers=self.headers(),
+                                      timeout=stream_timeout) as response:
+            if response.status_code != 200:
+                await response.aread()
+                raise KubernetesError(response.status_code, response.text)
+            async for line in response.aiter_lines():
+                if line.strip():
+                    yield json.loads(line)
+
+    async def delete_pod(self, name: str, grace_period: int = None) -> bool:
+        """Deletes a pod, letting its controller replace it. Returns False when the pod does not exist."""
+        params = {"gracePeriodSeconds": str(grace_period)} if grace_period is not None else {}
+        response = await self.client.delete(f"{self.pods_path()}/{name}", params=params, headers=self.headers())
+        if response.status_code == 404:
+            return False
+        if response.status_code not in (200, 202):
+            raise KubernetesError(response.status_code, response.text)
+        return True
+
+    async def close(self):
+        await self.client.aclose()
+
+class PodCache:
+    def __init__(self, client: KubernetesClient, label_selector: str = LABEL_SELECTOR, max_backoff: float = MAX_BACKOFF):
+        self.client = client
+        self.label_selector = label_selector
+        self.max_backoff = max_backoff
+        self.pods = {}  # name -> pod object
+        self.resource_version = None
+        self.synced = asyncio.Event()
+        self.relists = 0
+        self._task = None
+
+    def running(self) -> list:
+        """Names of the running pods that are not being deleted, oldest first."""
+        pods = [pod for pod in self.pods.values()
+                if pod.get("status", {}).get("phase") == "Running" and not pod["metadata"].get("deletionTimestamp")]
+        pods.sort(key=lambda pod: (pod["metadata"].get("creationTimestamp") or "", pod["metadata"]["name"]))
+        return [pod["metadata"]["name"] for pod in pods]
+
+    def get_pod_name(self) -> str:
+        """Returns the first running pod, or None (also before the first list completed)."""
+        names = self.running()
+        return names[0] if names else None
+
+    async def relist(self):
+        pods, self.resource_version = await self.client.list_pods(self.label_selector)
+        self.pods = {pod["metadata"]["name"]: pod for pod in pods}
+        self.relists += 1
+        self.synced.set()
+
+    def apply(self, event: dict):
+        """Applies a watch event to the cache."""
+        kind, pod = event.get("type"), event.get("object", {})
+        if kind == "ERROR":
+            raise KubernetesError(pod.get("code", 500), pod.get("message", "watch failed"))
+        self.resource_version = pod.get("metadata", {}).get("resourceVersion", self.resource_version)
+        if kind in ("ADDED", "MODIFIED"):
+            self.pods[pod["metadata"]["name"]] = pod
+        elif kind == "DELETED":
+            self.pods.pop(pod["metadata"]["name"], None)
+
+    async def run(self):
+        """Keeps the cache in sync until cancelled."""
+        failures = 0
+        while True:
+            try:
+                if self.resource_version is None:
+                    await self.relist()
+                async for event in self.client.watch_pods(self.label_selector, self.resource_version):
+                    self.apply(event)
+                failures = 0
+            except KubernetesError as e:
+                if e.status_code == 410:  # The resource version is too old to watch from, list again
+                    self.resource_version = None
+                    continue
+                failures += 1
+                logging.error(f"Pod cache: {e}")
+            except (httpx.HTTPError, ValueError) as e:
+                failures += 1
+                logging.error(f"Pod cache lost the API server: {e}")
+            if failures:
+                await asyncio.sleep(min(self.max_backoff, 0.5 * 2 ** (failures - 1)) * random.uniform(0.5, 1.0))
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+pod_cache = None
+in_cluster = True
+
+def get_pod_cache() -> PodCache:
+    """Returns the started pod cache of the in-cluster client, or None outside a cluster."""
+    global pod_cache, in_cluster
+    if pod_cache is None and in_cluster:
+        try:
+            pod_cache = PodCache(KubernetesClient.from_service_account())
+        except FileNotFoundError as e:
+            logging.warning(f"Kubernetes API not available: {e}")
+            in_cluster = False
+            return None
+        pod_cache.start()
+    return pod_cache
+
+async def close_pod_cache():
+    global pod_cache
+    if pod_cache is not None:
+        await pod_cache.stop()
+        await pod_cache.client.close()
+        pod_cache = None
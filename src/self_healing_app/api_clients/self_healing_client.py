@@ -1,47 +1,62 @@
-import os
 import datetime
 import logging
 import httpx
 
-from config.loader import load_config
+from api_clients import http_client
+from config.loader import get_settings
 
-config = load_config()
-
-LOCAL = config.getboolean("self_healing_api", "local", fallback=False)
+settings = get_settings()
+LOCAL = settings.self_healing_api.local
 if LOCAL:
-    DOMAIN_URL = config.get("self_healing_api", "local_domain_url", fallback="self-healing-api")
+    DOMAIN_URL = settings.self_healing_api.local_domain_url
 else:
-    DOMAIN_URL = config.get("self_healing_api", "domain_url", fallback="10.0.0.238")
-DOMAIN_PORT = config.get("self_healing_api", "domain_port", fallback="8500")
-REQUEST_TIMEOUT = config.getint("self_healing_api", "request_timeout", fallback=15)
-ASYNC_REQUEST_TIMEOUT = config.getint("self_healing_api", "async_request_timeout", fallback=15)
-MAC_ADDRESS = config.get("alerts", "mac_address", fallback="fa:16:3e:5e:25:ef")
+    DOMAIN_URL = settings.self_healing_api.domain_url
+DOMAIN_PORT = settings.self_healing_api.domain_port
+REQUEST_TIMEOUT = settings.self_healing_api.request_timeout
+ASYNC_REQUEST_TIMEOUT = settings.self_healing_api.async_request_timeout
+MAC_ADDRESS = settings.alerts.mac_address
 
 class SelfHealingClient:
     def __init__(self):
         self.domain_url = DOMAIN_URL
         self.domain_port = DOMAIN_PORT
+        self.alerts_url = f"http://{self.domain_url}:{self.domain_port}/alerts"
+        self.batch_url = f"{self.alerts_url}/batch"
 
-    def build_payload(self, scenario: str, message: str) -> dict:
+    def build_payload(self, scenario: str, message: str, **details) -> dict:
+        """Builds an alert; details are the count, first_seen and last_seen of collapsed repeats."""
         return {
             'timestamp': datetime.datetime.now().isoformat(),
             'scenario': scenario,
-            'message': message
+            'message': message,
+            **details
         }
     
-    async def post_alert_async(self, scenario: str, message: str):
-        url = f"http://{self.domain_url}:{self.domain_port}/alerts"
-        print(f"Self-healing API endpoint URL: {url}")
-        payload = self.build_payload(scenario, message)
-        logging.info(f"Sending alert to Self-healing API: {payload}")
-
-        async with httpx.AsyncClient(timeout=ASYNC_REQUEST_TIMEOUT) as client:
-            try:
-                response = await client.post(url, json=payload)
-                if response.status_code in [200, 201]:
-                    # logging.info(f"Alert added successfully to the Self-healing API")
-                    print(f"[SUCCESS] Alert added successfully to the Self-healing API: {response.status_code}")
-                else:
-                    logging.error(f"Failed to add alert to the Self-healing API. The response status code is {response.status_code} and the message: {response.text}")
-            except httpx.RequestError as e:
-                logging.error(f"Failed to add alert to the the Self-healing API: {e}")
+    async def post_alert_async(self, scenario: str, message: str, **details):
+        payload = self.build_payload(scenario, message, **details)
+        logging.debug("Sending alert to Self-healing API: %s", payload)
+        await self._post(self.alerts_url, payload)
+
+    async def post_alerts_async(self, payloads: list):
+        """Sends several alerts, built with build_payload, in a single request."""
+        logging.debug("Sending %d alerts to Self-healing API", len(payloads))
+        await self._post(self.batch_url, payloads)
+
+    async def _post(self, url: str, payload):
+        try:
+            response = await http_client.post(url, payload, timeout=ASYNC_REQUEST_TIMEOUT)
+            if response.status_code in [200, 201]:
+                logging.debug("Alert added successfully to the Self-healing API: %s", response.status_code)
+            else:
+                logging.error(f"Failed to add alert to the Self-healing API. The response status code is {response.status_code} and the message: {response.text}")
+        except httpx.RequestError as e:
+            logging.error(f"Failed to add alert to the the Self-healing API: {e}")
+
+client = None
+
+def get_self_healing_client() -> SelfHealingClient:
+    """Returns the process-wide Self-healing API client."""
+    global client
+    if client is None:
+        client = SelfHealingClient()
+    return client
@@ -2,20 +2,21 @@ import datetime
 import logging
 import httpx
 
-from config.loader import load_config
+from api_clients import http_client
+from config.loader import get_settings
 
-config = load_config()
-
-DOMAIN_URL = config.get("TrustManager", "domain_url", fallback="10.254.102.73")
-DOMAIN_PORT = config.get("TrustManager", "domain_port", fallback="3000")
-REQUEST_TIMEOUT = config.getint("TrustManager", "request_timeout", fallback=15)
-ASYNC_REQUEST_TIMEOUT = config.getint("TrustManager", "async_request_timeout", fallback=15)
-MAC_ADDRESS = config.get("Alerts", "mac_address", fallback="fa:16:3e:5e:25:ef")
+settings = get_settings()
+DOMAIN_URL = settings.trust_manager.domain_url
+DOMAIN_PORT = settings.trust_manager.domain_port
+REQUEST_TIMEOUT = settings.trust_manager.request_timeout
+ASYNC_REQUEST_TIMEOUT = settings.trust_manager.async_request_timeout
+MAC_ADDRESS = settings.alerts.mac_address
 
 class TrustManagerClient:
     def __init__(self):
         self.domain_url = DOMAIN_URL
         self.domain_port = DOMAIN_PORT
+        self.health_url = f"http://{self.domain_url}:{self.domain_port}/health"
 
     def get_mac_address(self) -> str:
         return MAC_ADDRESS  
@@ -33,16 +34,14 @@ class TrustManagerClient:
         }
     
     async def post_alert_async(self, scenario: str, message: str):
-        url = f"http://{self.domain_url}:{self.domain_port}/health"
         payload = self.build_payload(scenario, message)
-        logging.info(f"Sending alert to TrustManager: {payload}")
+        logging.debug("Sending alert to TrustManager: %s", payload)
 
-        async with httpx.AsyncClient(timeout=ASYNC_REQUEST_TIMEOUT) as client:
-            try:
-                response = await client.post(url, json=payload)
-                if response.status_code in [200, 201]:
-                    logging.info(f"Alert added successfully to the Trust Manager component")
-                else:
-                    logging.error(f"Failed to add alert to the Trust Manager component")
-            except httpx.RequestError as e:
-                logging.error(f"Failed to add alert to the Trust Manager component: {e}")
\ No newline at end of file
+        try:
+            response = await http_client.post(self.health_url, payload, timeout=ASYNC_REQUEST_TIMEOUT)
+            if response.status_code in [200, 201]:
+                logging.info(f"Alert added successfully to the Trust Manager component")
+            else:
+                logging.error(f"Failed to add alert to the Trust Manager component")
+        except httpx.RequestError as e:
+            logging.error(f"Failed to add alert to the Trust Manager component: {e}")
@@ -1,11 +1,93 @@
+"""
+Process-wide configuration, parsed once and reloaded when config.ini changes.
+
+`load_config()` and `get_settings()` return the current parsed file and its
+typed settings; modules that can apply new values at run time register a
+callback with `subscribe()`. `watch_config()` polls the file's modification
+time (a ConfigMap update swaps the mounted file, which changes it) and, when
+the new file is valid, swaps the parsed config and the settings in one step
+and calls the subscribers before any check runs again. An invalid file is
+reported and the previous settings are kept.
+"""
+
 import os
+import asyncio
+import logging
 import configparser
 
+from config.settings import Settings, SettingsError
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config.ini")
+
+config = None
+settings = None
+config_version = None  # (mtime, size) of the file that was parsed last
+subscribers = []
+
+def file_version(path: str) -> tuple:
+    try:
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size
+    except FileNotFoundError:
+        return None
+
+def read_config(path: str = CONFIG_PATH) -> configparser.ConfigParser:
+    parser = configparser.ConfigParser(inline_comment_prefixes=("#",))
+    parser.read(path)
+    return parser
+
 def load_config():
-    """Loads and returns the global config."""
-    base_dir = os.path.dirname(os.path.abspath(__file__))
-    config_path = os.path.join(base_dir, "config.ini")
-    config = configparser.ConfigParser()
-    config.read(config_path)
-    print(f"Loaded config from {config_path}")
+    """Returns the global config, parsing config.ini on first use only."""
+    if config is None:
+        get_settings()
     return config
+
+def get_settings() -> Settings:
+    """Returns the typed settings of the current config."""
+    global config, settings, config_version
+    if settings is None:
+        config_version = file_version(CONFIG_PATH)
+        parsed = read_config(CONFIG_PATH)
+        settings = Settings.from_config(parsed)  # Invalid settings stop the start
+        config = parsed
+        print(f"Loaded config from {CONFIG_PATH}")
+    return settings
+
+def subscribe(callback):
+    """Calls `callback(settings)` now and after every reload."""
+    subscribers.append(callback)
+    callback(get_settings())
+
+def reload_config() -> bool:
+    """Reloads config.ini if it changed; returns whether new settings were applied."""
+    global config, settings, config_version
+    get_settings()
+    version = file_version(CONFIG_PATH)
+    if version is None or version == config_version:
+        return False
+    config_version = version  # A broken file is reported once, not on every poll
+    parsed = read_config(CONFIG_PATH)
+    try:
+        new_settings = Settings.from_config(parsed)
+    except SettingsError as e:
+        logging.error(f"Keeping the previous settings, {CONFIG_PATH} is invalid: {e}")
+        return False
+    if new_settings == settings:
+        return False
+    config, settings = parsed, new_settings
+    for callback in subscribers:
+        try:
+            callback(settings)
+        except Exception as e:
+            logging.error(f"Failed to apply the reloaded settings in {callback.__module__}: {e}")
+    print(f"Reloaded config from {CONFIG_PATH}")
+    return True
+
+async def watch_config(interval: float = None):
+    """Polls config.ini and applies its changes until cancelled."""
+    interval = interval or get_settings().reload.reload_interval
+    if not interval:
+        return
+    while True:
+        await asyncio.sleep(interval)
+        reload_config()
@@ -0,0 +1,303 @@
+"""
+Typed, validated view of config.ini.
+
+Every config section is a frozen dataclass whose field names are the option
+names, whose types say how the option is parsed and whose defaults are the
+fallbacks. `Settings.from_config` parses the whole file at once and collects
+every invalid value, so a bad edit is rejected as a whole instead of being
+half applied.
+"""
+
+import configparser
+from dataclasses import dataclass, fields, replace
+
+class SettingsError(ValueError):
+    pass
+
+def parse_section(cls, config: configparser.ConfigParser, section: str, errors: list):
+    """Builds the dataclass of a section, reading every field with the parser of its type."""
+    values = {}
+    for field in fields(cls):
+        if not config.has_option(section, field.name):
+            continue
+        try:
+            if field.type is bool:
+                values[field.name] = config.getboolean(section, field.name)
+            elif field.type is int:
+                values[field.name] = config.getint(section, field.name)
+            elif field.type is float:
+                raw = config.get(section, field.name).strip()
+                values[field.name] = float(raw) if raw else field.default
+            elif field.type is tuple:
+                values[field.name] = tuple(v.strip() for v in config.get(section, field.name).split(",") if v.strip())
+            else:
+                values[field.name] = config.get(section, field.name)
+        except ValueError as e:
+            errors.append(f"[{section}] {field.name}: {e}")
+    section_settings = cls(**values)
+    errors.extend(f"[{section}] {error}" for error in section_settings.validate())
+    return section_settings
+
+def one_of(name: str, value: str, choices: tuple) -> list:
+    return [] if value in choices else [f"{name} must be one of {', '.join(choices)}, not '{value}'"]
+
+def ordered(low_name: str, low, high_name: str, high) -> list:
+    return [] if low < high else [f"{low_name} ({low}) must be lower than {high_name} ({high})"]
+
+def positive(**values) -> list:
+    return [f"{name} must be positive" for name, value in values.items() if value is not None and value <= 0]
+
+@dataclass(frozen=True)
+class MonitoringSettings:
+    interval: float = 60.0
+
+    def validate(self):
+        return positive(interval=self.interval)
+
+@dataclass(frozen=True)
+class ScenariosSettings:
+    enabled: tuple = ()
+    jitter: float = 0.1
+    stagger: bool = True
+
+    def validate(self):
+        return [] if 0 <= self.jitter <= 1 else ["jitter must be between 0 and 1"]
+
+@dataclass(frozen=True)
+class CpuSettings:
+    scenario_name: str = "Device Power Alert"
+    check_interval: float = None  # [Monitoring] interval when unset
+    high_threshold: float = 85.0
+    low_threshold: float = 80.0
+    window_size: int = 600
+    min_duration: float = 60.0
+    hysteresis: float = 5.0
+
+    def validate(self):
+        errors = ordered("low_threshold", self.low_threshold, "high_threshold", self.high_threshold)
+        errors += positive(check_interval=self.check_interval, window_size=self.window_size)
+        if self.min_duration < 0 or self.hysteresis < 0:
+            errors.append("min_duration and hysteresis cannot be negative")
+        return errors
+
+@dataclass(frozen=True)
+class CpuMessages:
+    high_alert: str = "\033[0;31mHIGH THRESHOLD\033[0m"
+    low_alert: str = "\033[0;33mLOW THRESHOLD\033[0m"
+    normal: str = "\033[0;32mNORMAL OPERATION\033[0m"
+
+    def validate(self):
+        return []
+
+@dataclass(frozen=True)
+class SensorSettings:
+    scenario_name: str = "Sensor Failure"
+    check_interval: float = None  # [Monitoring] interval when unset
+    low_temperature_threshold: int = -20
+    high_temperature_threshold: int = 60
+    low_humidity_threshold: int = 10
+    high_humidity_threshold: int = 90
+    sensor_power_pin: int = 90
+    sensor_check_max: int = 5
+    sensors: str = "4"
+    backend: str = "dht22"
+    sample_interval: float = 2.0
+    buffer_size: int = 30
+    filter: str = "hampel"
+    hampel_k: float = 3.0
+    max_age: float = 30.0
+
+    def validate(self):
+        errors = ordered("low_temperature_threshold", self.low_temperature_threshold,
+                         "high_temperature_threshold", self.high_temperature_threshold)
+        errors += ordered("low_humidity_threshold", self.low_humidity_threshold,
+                          "high_humidity_threshold", self.high_humidity_threshold)
+        errors += one_of("backend", self.backend, ("dht22", "simulated"))
+        errors += one_of("filter", self.filter, ("hampel", "median", "none"))
+        errors += positive(check_interval=self.check_interval, sample_interval=self.sample_interval,
+                           buffer_size=self.buffer_size, max_age=self.max_age)
+        return errors
+
+@dataclass(frozen=True)
+class SensorMessages:
+    no_measurement: str = "\033[0;33mNO MEASUREMENT\033[0m"
+    outlier_detected: str = "\033[0;31mOUTLIER DETECTED\033[0m"
+    sensor_ok: str = "\033[0;32mSENSOR OK\033[0m"
+
+    def validate(self):
+        return []
+
+@dataclass(frozen=True)
+class CommunicationSettings:
+    scenario_name: str = "Communication Failure Indication"
+    check_interval: float = 5.0
+    device_ip: str = "10.0.0.238"
+    device_name: str = "Node"
+    targets: str = ""
+    ping_count: int = 2
+    ping_timeout: float = 1.0
+    probe_method: str = "auto"
+    max_parallel: int = 512
+    history_size: int = 20
+
+    def validate(self):
+        errors = one_of("probe_method", self.probe_method, ("auto", "tcp", "icmp", "ping"))
+        errors += positive(check_interval=self.check_interval, ping_count=self.ping_count, ping_timeout=self.ping_timeout,
+                           max_parallel=self.max_parallel, history_size=self.history_size)
+        return errors
+
+@dataclass(frozen=True)
+class LinkQualitySettings:
+    scenario_name: str = "Link Quality Issues"
+    check_interval: float = 5.0
+    communication_type: str = "wifi"
+    serial_port: str = "/dev/ttyS0"
+    baud_rate: int = 9600
+    lora_queue_size: int = 1000
+    history_size: int = 10
+    min_samples: int = 10
+    threshold_method: str = "sigma"
+    threshold_k: float = 2.0
+    threshold_percentile: float = 0.05
+    rssi_margin: int = 5
+    link_quality_margin: int = 10
+    snr_margin: int = 3
+    sf_margin: int = 1
+    healing_cooldown: int = 30
+
+    def validate(self):
+        errors = one_of("communication_type", self.communication_type, ("wifi", "lora"))
+        errors += one_of("threshold_method", self.threshold_method, ("sigma", "percentile"))
+        errors += positive(check_interval=self.check_interval, history_size=self.history_size)
+        if not 0 < self.threshold_percentile < 1:
+            errors.append("threshold_percentile must be between 0 and 1")
+        return errors
+
+@dataclass(frozen=True)
+class NetworkProtocolSettings:
+    scenario_name: str = "Network Protocol Violation"
+    check_interval: float = 5.0
+    interfaces: tuple = ()
+    dc_limit: float = 0.001
+    cycle_period: int = 30
+    sample_resolution: float = 0.1
+
+    def validate(self):
+        errors = positive(check_interval=self.check_interval, cycle_period=self.cycle_period,
+                          sample_resolution=self.sample_resolution)
+        if not 0 < self.dc_limit <= 1:
+            errors.append("dc_limit must be a fraction between 0 and 1")
+        return errors
+
+@dataclass(frozen=True)
+class AlertSettings:
+    mac_address: str = "fa:16:3e:5e:25:ef"
+    batch_window: float = 0.5
+    batch_max_size: int = 50
+    dedup_window: float = 300.0
+    rate_limit: float = 0.1
+    rate_burst: int = 5
+
+    def validate(self):
+        return positive(batch_max_size=self.batch_max_size, rate_limit=self.rate_limit, rate_burst=self.rate_burst)
+
+@dataclass(frozen=True)
+class TrustManagerSettings:
+    domain_url: str = "10.254.102.73"
+    domain_port: str = "3000"
+    request_timeout: int = 15
+    async_request_timeout: int = 15
+
+    def validate(self):
+        return positive(request_timeout=self.request_timeout, async_request_timeout=self.async_request_timeout)
+
+@dataclass(frozen=True)
+class SelfHealingApiSettings:
+    domain_url: str = "10.0.0.238"
+    local_domain_url: str = "self-healing-api"
+    domain_port: str = "8500"
+    request_timeout: int = 15
+    async_request_timeout: int = 15
+    local: bool = False
+
+    def validate(self):
+        return positive(request_timeout=self.request_timeout, async_request_timeout=self.async_request_timeout)
+
+@dataclass(frozen=True)
+class HttpClientSettings:
+    max_connections: int = 10
+    max_keepalive_connections: int = 5
+    keepalive_expiry: float = 30.0
+    max_concurrency: int = 10
+    request_timeout: float = 15.0
+
+    def validate(self):
+        return positive(max_connections=self.max_connections, max_concurrency=self.max_concurrency)
+
+@dataclass(frozen=True)
+class KubernetesSettings:
+    api_url: str = ""
+    namespace: str = ""
+    label_selector: str = "app=self-healing"
+    request_timeout: float = 10.0
+    watch_timeout: int = 300
+    max_backoff: float = 30.0
+
+    def validate(self):
+        return positive(request_timeout=self.request_timeout, watch_timeout=self.watch_timeout)
+
+@dataclass(frozen=True)
+class ReloadSettings:
+    reload_interval: float = 5.0  # 0 disables hot reload
+
+    def validate(self):
+        return [] if self.reload_interval >= 0 else ["reload_interval cannot be negative"]
+
+SECTIONS = {  # Settings attribute -> (config section, dataclass)
+    "monitoring": ("Monitoring", MonitoringSettings),
+    "scenarios": ("Scenarios", ScenariosSettings),
+    "cpu": ("CPU_Monitoring", CpuSettings),
+    "cpu_messages": ("CPU_Messages", CpuMessages),
+    "sensor": ("Sensor_Monitoring", SensorSettings),
+    "sensor_messages": ("Sensor_Messages", SensorMessages),
+    "communication": ("Communication_Monitoring", CommunicationSettings),
+    "link_quality": ("Link_Quality", LinkQualitySettings),
+    "network_protocol": ("Network_Protocol", NetworkProtocolSettings),
+    "alerts": ("alerts", AlertSettings),
+    "trust_manager": ("TrustManager", TrustManagerSettings),
+    "self_healing_api": ("self_healing_api", SelfHealingApiSettings),
+    "http_client": ("http_client", HttpClientSettings),
+    "kubernetes": ("Kubernetes", KubernetesSettings),
+    "reload": ("Settings", ReloadSettings),
+}
+
+@dataclass(frozen=True)
+class Settings:
+    monitoring: MonitoringSettings
+    scenarios: ScenariosSettings
+    cpu: CpuSettings
+    cpu_messages: CpuMessages
+    sensor: SensorSettings
+    sensor_messages: SensorMessages
+    communication: CommunicationSettings
+    link_quality: LinkQualitySettings
+    network_protocol: NetworkProtocolSettings
+    alerts: AlertSettings
+    trust_manager: TrustManagerSettings
+    self_healing_api: SelfHealingApiSettings
+    http_client: HttpClientSettings
+    kubernetes: KubernetesSettings
+    reload: ReloadSettings
+
+    @classmethod
+    def from_config(cls, config: configparser.ConfigParser):
+        """Parses and validates every section; raises SettingsError listing all the invalid values."""
+        errors = []
+        sections = {name: parse_section(section_cls, config, section, errors) for name, (section, section_cls) in SECTIONS.items()}
+        if errors:
+            raise SettingsError("Invalid settings: " + "; ".join(errors))
+        interval = sections["monitoring"].interval
+        for name in ("cpu", "sensor"):
+            if sections[name].check_interval is None:
+                sections[name] = replace(sections[name], check_interval=interval)
+        return cls(**sections)
@@ -1,25 +1,46 @@
+import time
+started = time.perf_counter()  # Taken before the imports below so they count towards the startup profile
+
+import sys
 import asyncio
+import resource
+
+from api_clients.http_client import close_http_client
+from api_clients.kubernetes_client import close_pod_cache
+from utils.alerts_service import flush_alerts
+from utils.scheduler import Scheduler
+from config.loader import get_settings, subscribe, watch_config
+from scenarios import load_scenarios
 
-from scenarios import (
-    cpu_power,
-    sensor_failure,
-    network_protocol_violation,
-    link_quality_issues,
-    communication_failure_indication
-)
+def startup_profile(timings: dict) -> str:
+    """Summarizes the start-up time, the import time of each scenario and the peak memory."""
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+    imports = ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in timings.items()) or "none"
+    return f"Started in {time.perf_counter() - started:.2f}s (scenario imports: {imports}), peak memory {peak_mb:.1f} MB"
 
 async def main():
     print("Starting self-healing module...")
 
-    tasks = [
-        asyncio.create_task(cpu_power.monitor_cpu_power()),
-        # asyncio.create_task(sensor_failure.monitor_sensor()),
-        # asyncio.create_task(network_protocol_violation.enable_monitoring_agent()),
-        # asyncio.create_task(link_quality_issues.monitor_link_quality()),
-        # asyncio.create_task(communication_failure_indication.monitor_communication()),
-    ]
+    # Only the scenarios enabled in config.ini, [Scenarios] enabled, are imported and scheduled
+    settings = get_settings()
+    timings = load_scenarios(settings.scenarios.enabled)
+    scheduler = Scheduler.from_settings(settings)
+    print(f"Running scenarios: {', '.join(f'{job.name} every {job.interval:g}s' for job in scheduler.jobs)}")
+    print(startup_profile(timings))
+    subscribe(scheduler.reconfigure)
 
-    await asyncio.gather(*tasks)
+    # Changes to config.ini are applied without a restart, [Settings] reload_interval
+    watcher = asyncio.create_task(watch_config())
+    try:
+        await scheduler.run()
+    finally:
+        watcher.cancel()
+        await flush_alerts()
+        await close_http_client()
+        await close_pod_cache()
+        sensor_failure = sys.modules.get("scenarios.sensor_failure")
+        if sensor_failure is not None:
+            sensor_failure.close_sensor_sessions()
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main())
@@ -0,0 +1,32 @@
+"""
+Monitoring scenarios, one module per scenario, named after it.
+
+Importing a scenario module registers its check with the scheduler and may
+open hardware or start background work, so modules are discovered with
+pkgutil and only the ones enabled in `[Scenarios] enabled` are imported.
+"""
+
+import time
+import pkgutil
+import logging
+import importlib
+
+def available() -> list:
+    """Lists the scenario modules of the package, without importing them."""
+    return sorted(module.name for module in pkgutil.iter_modules(__path__) if not module.ispkg)
+
+def load_scenarios(enabled) -> dict:
+    """Imports the enabled scenario modules; returns the seconds each import took."""
+    names = available()
+    timings = {}
+    for name in enabled:
+        if name not in names:
+            continue  # Reported by the scheduler as not registered
+        start = time.perf_counter()
+        try:
+            importlib.import_module(f"{__name__}.{name}")
+        except Exception as e:
+            logging.error(f"Failed to load scenario '{name}': {e}")
+            continue
+        timings[name] = time.perf_counter() - start
+    return timings
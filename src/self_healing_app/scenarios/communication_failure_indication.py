@@ -1,43 +1,61 @@
-import subprocess
 import asyncio
 
 from utils.alerts_service import handle_alert
-from config.loader import load_config
-
-config = load_config()
-
-SCENARIO = config.get("Communication_Monitoring", "scenario_name", fallback="Communication Failure Indication")
-DEVICE_IP = config.get("Communication_Monitoring", "device_ip", fallback="10.0.0.238")
-DEVICE_NAME = config.get("Communication_Monitoring", "device_name", fallback="Node")
-CHECK_INTERVAL = config.getint("Communication_Monitoring", "check_interval", fallback=5)
-PING_COUNT = config.getint("Communication_Monitoring", "ping_count", fallback=2)
-PING_TIMEOUT = config.getint("Communication_Monitoring", "ping_timeout", fallback=1)
-
-def healing_action():
-    print(f"Communication failure detected for device {DEVICE_NAME}...")
-
-def check_device_connectivity(ip_address: str, count=PING_COUNT, timeout=PING_TIMEOUT):
-    command = ["ping", "-c", str(count), "-W", str(timeout), ip_address]
-    try:
-        result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=True)
-        return result.returncode == 0
-    except subprocess.CalledProcessError as e:
-        print(f"Failed to ping {ip_address}: {e}")
-        return False
-    
+from utils.scheduler import register, run_periodically
+from utils.reachability import ReachabilityProber, parse_targets, REACHABLE, UNREACHABLE
+from config.loader import subscribe
+
+prober = None
+TARGETS = PING_COUNT = PING_TIMEOUT = PROBE_METHOD = MAX_PARALLEL = HISTORY_SIZE = None
+
+def apply_settings(settings):
+    """Applies the [Communication_Monitoring] settings, at import and after every reload."""
+    global SCENARIO, DEVICE_IP, DEVICE_NAME, TARGETS, CHECK_INTERVAL, PING_COUNT, PING_TIMEOUT
+    global PROBE_METHOD, MAX_PARALLEL, HISTORY_SIZE, prober
+    communication = settings.communication
+    probing = (TARGETS, PING_COUNT, PING_TIMEOUT, PROBE_METHOD, MAX_PARALLEL, HISTORY_SIZE)
+    SCENARIO = communication.scenario_name
+    DEVICE_IP = communication.device_ip
+    DEVICE_NAME = communication.device_name
+    TARGETS = parse_targets(communication.targets) or [{"name": DEVICE_NAME, "host": DEVICE_IP, "port": None}]
+    CHECK_INTERVAL = communication.check_interval
+    PING_COUNT = communication.ping_count
+    PING_TIMEOUT = communication.ping_timeout
+    PROBE_METHOD = communication.probe_method
+    MAX_PARALLEL = communication.max_parallel
+    HISTORY_SIZE = communication.history_size
+    if prober is not None and probing != (TARGETS, PING_COUNT, PING_TIMEOUT, PROBE_METHOD, MAX_PARALLEL, HISTORY_SIZE):
+        previous, prober = prober, None
+        get_prober().carry_over(previous)  # Targets that are kept do not start over as UNKNOWN
+
+subscribe(apply_settings)
+
+def get_prober():
+    global prober
+    if prober is None:
+        # A target is reported unreachable after PING_COUNT failed probes in a row
+        prober = ReachabilityProber(TARGETS, timeout=PING_TIMEOUT, max_parallel=MAX_PARALLEL,
+                                    history_size=HISTORY_SIZE, down_after=PING_COUNT, method=PROBE_METHOD)
+    return prober
+
+def healing_action(target):
+    print(f"Communication failure detected for device {target['name']}...")
+
+@register("communication_failure_indication", section="Communication_Monitoring")
+async def check_communication():
+    """Probes every target once and alerts on the ones that became unreachable."""
+    for target, old, new in await get_prober().sweep():
+        if new == UNREACHABLE:
+            await handle_alert(scenario=SCENARIO, alert_msg=f"Communication failure detected for device {target['name']} at {target['host']}.", dedup_key=target["host"])
+            healing_action(target)
+        elif new == REACHABLE:
+            print(f"{target['name']} is active and reachable.")
+
 async def monitor_communication():
     """
-    Periodically checks whether the device is able to communicate.
+    Periodically checks whether the devices are able to communicate.
     """
-    while True:
-        is_connected = await asyncio.to_thread(check_device_connectivity, DEVICE_IP)
-        
-        if not is_connected:
-            await handle_alert(scenario=SCENARIO, alert_msg=f"Communication failure detected for device {DEVICE_NAME} at {DEVICE_IP}.")
-            healing_action()
-        else:
-            print(f"{DEVICE_NAME} is active and reachable.")
-        await asyncio.sleep(60)
+    await run_periodically(check_communication, CHECK_INTERVAL)
         
 if __name__ == "__main__":
-    monitor_communication()
+    asyncio.run(monitor_communication())
@@ -3,27 +3,47 @@ Checks the CPU temperature periodically and detects any instances of
 high temp. If high temp detected, appropriate action is taken.
 """
 
-import subprocess
+import time
 import asyncio
 import datetime
+import httpx
 
+from api_clients.kubernetes_client import get_pod_cache, KubernetesError
 from utils.alerts_service import handle_alert
+from utils.cpu_sampler import CpuSampler
+from utils.cpu_detector import CpuStateDetector, NORMAL, LOW, HIGH
 from utils.module_utils import is_running_on_rpi
-from config.loader import load_config
-
-config = load_config()
-
-LABEL_SELECTOR = "app=self-healing"
-NAMESPACE = "default"
-
-SCENARIO = config.get("CPU_Monitoring", "scenario_name", fallback="Device Power Alert")
-
-HIG_THRESHOLD = config.getfloat("CPU_Monitoring", "high_threshold", fallback=85.0)
-LOW_THRESHOLD = config.getfloat("CPU_Monitoring", "low_threshold", fallback=80.0)
-
-HIGTHR_MSG = config.get("CPU_Messages", "high_alert", fallback="\033[0;31mHIGH THRESHOLD\033[0m")
-LOWTHR_MSG = config.get("CPU_Messages", "low_alert", fallback="\033[0;33mLOW THRESHOLD\033[0m")
-NORMAL_MSG = config.get("CPU_Messages", "normal", fallback="\033[0;32mNORMAL OPERATION\033[0m")
+from utils.scheduler import register, run_periodically
+from config.loader import subscribe
+
+cpu_sampler = None
+detector = None
+
+def apply_settings(settings):
+    """Applies the [CPU_Monitoring] and [CPU_Messages] settings, at import and after every reload."""
+    global SCENARIO, CHECK_INTERVAL, HIG_THRESHOLD, LOW_THRESHOLD, WINDOW_SIZE, MIN_DURATION, HYSTERESIS
+    global HIGTHR_MSG, LOWTHR_MSG, NORMAL_MSG, detector
+    cpu, messages = settings.cpu, settings.cpu_messages
+    SCENARIO = cpu.scenario_name
+    CHECK_INTERVAL = cpu.check_interval
+    HIG_THRESHOLD = cpu.high_threshold
+    LOW_THRESHOLD = cpu.low_threshold
+    WINDOW_SIZE = cpu.window_size
+    MIN_DURATION = cpu.min_duration
+    HYSTERESIS = cpu.hysteresis
+    HIGTHR_MSG = messages.high_alert
+    LOWTHR_MSG = messages.low_alert
+    NORMAL_MSG = messages.normal
+
+    if detector is None or len(detector.values) != max(2, WINDOW_SIZE):
+        detector = CpuStateDetector(LOW_THRESHOLD, HIG_THRESHOLD, window=WINDOW_SIZE, min_duration=MIN_DURATION, hysteresis=HYSTERESIS)
+    else:  # Keep the window and the state, only the rules change
+        detector.low_threshold = LOW_THRESHOLD
+        detector.high_threshold = HIG_THRESHOLD
+        detector.min_duration = MIN_DURATION
+        detector.hysteresis = HYSTERESIS
+
+subscribe(apply_settings)
 
 # def get_cpu_temp() -> float:
 #     """Retrieve CPU temperature in Celsius, supporting both Raspberry Pi and general Linux systems."""
@@ -44,29 +64,26 @@ NORMAL_MSG = config.get("CPU_Messages", "normal", fallback="\033[0;32mNORMAL OPE
 #     return None
 
 def get_pod_name():
-    """Finds the current running self-healing-app pod dynamically using `kubectl` shell command."""
-    try:
-        command = f"kubectl get pods -n {NAMESPACE} -l {LABEL_SELECTOR} --no-headers -o custom-columns=:metadata.name"
-        result = subprocess.run(command, shell=True, capture_output=True, text=True, check=True)
-        pod_name = result.stdout.strip().split("\n")[0]  # Get the first pod name
-        return pod_name if pod_name else None
-    except subprocess.CalledProcessError:
-        print("Failed to get pod name")
-        return None
+    """Finds the current running self-healing-app pod in the watch-backed pod cache."""
+    pod_cache = get_pod_cache()
+    return pod_cache.get_pod_name() if pod_cache else None
 
-def restart_pod():
-    """Deletes the pod using `kubectl delete pod`, allowing Kubernetes to restart it."""
+async def restart_pod():
+    """Deletes the pod through the Kubernetes API, allowing Kubernetes to restart it."""
     pod_name = get_pod_name()
     if not pod_name:
         print("No running pod found to restart.")
         return
 
     print(f"Restarting pod: {pod_name}")
-    subprocess.run(f"kubectl delete pod {pod_name} -n {NAMESPACE}", shell=True)
+    try:
+        await get_pod_cache().client.delete_pod(pod_name)
+    except (KubernetesError, httpx.HTTPError) as e:
+        print(f"Failed to restart pod {pod_name}: {e}")
 
-def healing_action(cpu_usage, msg):
+async def healing_action(cpu_usage, msg):
     """Takes the healing action for the detected anomaly."""
-    if cpu_usage > HIG_THRESHOLD:
+    if detector.state == HIGH:
         print(f"CPU power is too high at {cpu_usage} 'C. Taking healing action...")
         if is_running_on_rpi():
             print("Restarting the Raspberry Pi...")
@@ -74,7 +91,7 @@ def healing_action(cpu_usage, msg):
         else:
             pod_name = get_pod_name()
             print(f"Restarting the self-healing-app pod: {pod_name} ...")
-            # restart_pod()
+            # await restart_pod()
 
 def status_report(cpu_usage):
     """Reports the status of CPU power."""
@@ -85,35 +102,56 @@ def status_report(cpu_usage):
         status = LOWTHR_MSG
     return status
 
-def detect_anomaly(cpu_usage: float):
-    """Detects anomalies in CPU temperature and usage."""
-    if cpu_usage is not None and status_report(cpu_usage) != NORMAL_MSG:
-        return f"Exceeded threshold: {cpu_usage}%"
-    
-    return None
-
-def get_cpu_usage() -> float:
-    """Returns the CPU usage percentage using the 'top' command."""
+def detect_anomaly(cpu_usage: float, now: float = None):
+    """Feeds a sample to the windowed detector and reports when the CPU state escalates to LOW or HIGH."""
+    if cpu_usage is None:
+        return None
+    state, previous = detector.update(cpu_usage, time.monotonic() if now is None else now)
+    if state == previous or state == NORMAL or (state == LOW and previous == HIGH):
+        return None
+    stats = detector.statistics()
+    threshold = HIG_THRESHOLD if state == HIGH else LOW_THRESHOLD
+    above = stats["seconds_above_high"] if state == HIGH else stats["seconds_above_low"]
+    return f"Exceeded threshold: {cpu_usage}% ({state}, mean {stats['mean']}%, p95 {stats['p95']}%, {above:g}s above {threshold:g}%)"
+
+def get_cpu_sample() -> dict:
+    """Returns the CPU usage since the previous sample, read from /proc/stat."""
+    global cpu_sampler
     try:
-        output = subprocess.check_output("""top -bn1 | grep "Cpu(s)" | awk -F ',' '{print 100 - $4}' | awk '{print $1}'""", shell=True, text=True)
-        return float(output.strip())  # Convert to float
+        if cpu_sampler is None:
+            cpu_sampler = CpuSampler()
+        return cpu_sampler.sample()
     except Exception as e:
         print(f"Error retrieving CPU usage: {e}")
         return None
 
-async def monitor_cpu_power():
-    """Monitors CPU periodically, to detect threshold violations."""
-    while True:
-        print(f"Monitoring CPU power at {datetime.datetime.now()}...")
-        cpu_usage = get_cpu_usage()
-        anomaly = detect_anomaly(cpu_usage)
-        if anomaly:
-            await handle_alert(scenario=SCENARIO, alert_msg= anomaly)
-            healing_action(cpu_usage, anomaly)
+def get_cpu_usage() -> float:
+    """Returns the aggregate CPU usage percentage since the previous sample."""
+    sample = get_cpu_sample()
+    return sample["usage"] if sample else None
+
+@register("cpu_power", section="CPU_Monitoring")
+async def check_cpu_power():
+    """Checks the CPU usage once, to detect threshold violations."""
+    print(f"Monitoring CPU power at {datetime.datetime.now()}...")
+    if not is_running_on_rpi():
+        get_pod_cache()  # Starts the pod watch early, so the pod is known when a restart is needed
+    sample = get_cpu_sample()
+    cpu_usage = sample["usage"] if sample else None
+    anomaly = detect_anomaly(cpu_usage)
+    if anomaly:
+        await handle_alert(scenario=SCENARIO, alert_msg= anomaly)
+        await healing_action(cpu_usage, anomaly)
+    else:
+        await handle_alert(scenario=SCENARIO, alert_msg= "Test connection between services")
+        if sample:
+            print(f"CPU Power: {cpu_usage}% [{detector.state}] (iowait {sample['iowait']}%, steal {sample['steal']}%, load {sample['load_average']})")
         else:
-            await handle_alert(scenario=SCENARIO, alert_msg= "Test connection between services")
             print(f"CPU Power: {cpu_usage}%")
-        await asyncio.sleep(60)
+
+async def monitor_cpu_power():
+    """Monitors CPU periodically, to detect threshold violations."""
+    await run_periodically(check_cpu_power, CHECK_INTERVAL)
 
 if __name__ == "__main__":
-    monitor_cpu_power()
\ No newline at end of file
+    asyncio.run(monitor_cpu_power())
\ No newline at end of file
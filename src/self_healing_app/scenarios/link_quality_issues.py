@@ -1,45 +1,57 @@
 import re
 import time
-import serial
 import asyncio
+import logging
 import subprocess
 
 from utils.alerts_service import handle_alert
-from config.loader import load_config
-
-config = load_config()
-
-SCENARIO = config.get("Link_Quality", "scenario_name", fallback="Link Quality Issues")
-# INTERFACE = config.get("Link_Quality", "interface", fallback="wlan0")
-SERIAL_PORT = config.get("Link_Quality", "serial_port", fallback="/dev/ttyS0")
-BAUD_RATE = config.getint("Link_Quality", "baud_rate", fallback=9600)
-COMM_TYPE = config.get("Link_Quality", "communication_type", fallback="wifi")
-CHECK_INTERVAL = config.getint("Link_Quality", "check_interval", fallback=5)
-HISTORY_SIZE = config.getint("Link_Quality", "history_size", fallback=10)
-RSSI_MARGIN = config.getint("Link_Quality", "rssi_margin", fallback=5)
-LINK_QUALITY_MARGIN = config.getint("Link_Quality", "link_quality_margin", fallback=10)
-SNR_MARGIN = config.getint("Link_Quality", "snr_margin", fallback=3)
-HEALING_COOLDOWN = config.getint("Link_Quality", "healing_cooldown", fallback=30)
+from utils.lora_reader import LoRaReader
+from utils.scheduler import register, run_periodically
+from utils.rolling_stats import RollingStats
+from utils.net_stats import get_primary_network_interface
+from config.loader import subscribe
 
 last_healing_time = 0
-rssi_history_data = []
-link_quality_history_data = []
-snr_history_data = []
-sf_history_data = []
-
-def get_primary_network_interface():
-    """Finds the primary network interface dynamically."""
-    try:
-        output = subprocess.check_output(['ip', 'route'], text=True)
-        match = re.search(r'default via .* dev (\S+)', output)
-        if match:
-            return match.group(1)  # Extracts interface name
-    except Exception as e:
-        print(f"Error detecting network interface: {e}")
-    return "eth0"  # Default to eth0 if detection fails
-
-# Dynamically detect network interface
-INTERFACE = get_primary_network_interface()
+HISTORY_SIZE = None
+
+def apply_settings(settings):
+    """
+    Applies the [Link_Quality] settings, at import and after every reload.
+    The serial port and communication type only change with a restart.
+    """
+    global SCENARIO, SERIAL_PORT, BAUD_RATE, LORA_QUEUE_SIZE, COMM_TYPE, CHECK_INTERVAL, HISTORY_SIZE
+    global RSSI_MARGIN, LINK_QUALITY_MARGIN, SNR_MARGIN, SF_MARGIN, HEALING_COOLDOWN, THRESHOLD_METHOD
+    global THRESHOLD_K, THRESHOLD_PERCENTILE, MIN_SAMPLES
+    global rssi_history_data, link_quality_history_data, snr_history_data, sf_history_data
+    link_quality = settings.link_quality
+    SCENARIO = link_quality.scenario_name
+    if HISTORY_SIZE is None:
+        SERIAL_PORT = link_quality.serial_port
+        BAUD_RATE = link_quality.baud_rate
+        LORA_QUEUE_SIZE = link_quality.lora_queue_size
+        COMM_TYPE = link_quality.communication_type
+    CHECK_INTERVAL = link_quality.check_interval
+    RSSI_MARGIN = link_quality.rssi_margin
+    LINK_QUALITY_MARGIN = link_quality.link_quality_margin
+    SNR_MARGIN = link_quality.snr_margin
+    SF_MARGIN = link_quality.sf_margin
+    HEALING_COOLDOWN = link_quality.healing_cooldown
+    THRESHOLD_METHOD = link_quality.threshold_method
+    THRESHOLD_K = link_quality.threshold_k
+    THRESHOLD_PERCENTILE = link_quality.threshold_percentile
+    MIN_SAMPLES = link_quality.min_samples
+
+    if link_quality.history_size != HISTORY_SIZE:  # Resizing the windows starts the histories over
+        HISTORY_SIZE = link_quality.history_size
+        rssi_history_data = RollingStats(HISTORY_SIZE, low=-150, high=0)  # dBm
+        link_quality_history_data = RollingStats(HISTORY_SIZE, low=0, high=100)  # %
+        snr_history_data = RollingStats(HISTORY_SIZE, low=-30, high=30, bin_width=0.25)  # dB
+        sf_history_data = RollingStats(HISTORY_SIZE, low=5, high=13)
+
+subscribe(apply_settings)
+
+lora_reader = None
+lora_consumer = None
 
 def healing_action():
     """Reports a link quality issue and applies a healing action to reconfigure link parameters."""
@@ -52,62 +64,28 @@ def healing_action():
     last_healing_time = current_time
 
 def store_radio_values(rssi, link_quality=None, snr=None, sf=None):
-    """Stores the radio values in the memory, maintaining history size limits."""
+    """Stores the radio values in their rolling windows, which keep the history size limits."""
     if rssi is not None:
-        rssi_history_data.append(rssi)
-        if len(rssi_history_data) > HISTORY_SIZE:
-            rssi_history_data.pop(0)
+        rssi_history_data.add(rssi)
     if COMM_TYPE == "wifi" and link_quality is not None:
-        link_quality_history_data.append(link_quality)
-        if len(link_quality_history_data) > HISTORY_SIZE:
-            link_quality_history_data.pop(0)
+        link_quality_history_data.add(link_quality)
     if COMM_TYPE == "lora":
         if snr is not None:
-            snr_history_data.append(snr)
-            if len(snr_history_data) > HISTORY_SIZE:
-                snr_history_data.pop(0)
+            snr_history_data.add(snr)
         if sf is not None:
-            sf_history_data.append(sf)
-            if len(sf_history_data) > HISTORY_SIZE:
-                sf_history_data.pop(0)
+            sf_history_data.add(sf)
 
 def set_threshold_based_on_past_values(history, margin):
-    """Sets a dynamic threshold based on past values."""
-    if len(history) == 0:
+    """Sets a dynamic lower threshold (k*sigma or percentile based) from the past values."""
+    if len(history) < MIN_SAMPLES:
         return None
-    avg_value = sum(history) / len(history)
-    return avg_value - margin
-
-def extract_spreading_factor(packet):
-    """Extracts spreading factor (SF) from LoRa packet."""
-    match = re.search(r'SF: (\d+)', packet)
-    return int(match.group(1)) if match else None
-
-def extract_snr(packet):
-    """Extracts SNR value from LoRa packet."""
-    match = re.search(r'SNR: (-?\d+\.\d+) dB', packet)
-    return float(match.group(1)) if match else None
-
-def extract_rssi(packet):
-    """Extracts RSSI value from LoRa packet."""
-    match = re.search(r'RSSI: (-?\d+) dBm', packet)
-    return int(match.group(1)) if match else None
-
-def get_lora_radio_values():
-    """Retrieves radio values (RSSI, SNR, SF) for LoRa."""
-    try:
-        with serial.Serial(SERIAL_PORT, BAUD_RATE, timeout=1) as ser:
-            if ser.in_waiting > 0:
-                packet = ser.readline().decode('utf-8').strip()
-                print(f"Received LoRa Packet: {packet}")
-                rssi = extract_rssi(packet)
-                snr = extract_snr(packet)
-                sf = extract_spreading_factor(packet)
-                print(f"RSSI: {rssi} dBm, SNR: {snr} dB, SF: {sf}")
-                return rssi, snr, sf
-    except Exception as e:
-        print(f"Error retrieving LoRa values: {e}")
-    return None, None, None
+    return history.lower_threshold(THRESHOLD_METHOD, k=THRESHOLD_K, percentile=THRESHOLD_PERCENTILE, margin=margin)
+
+def set_upper_threshold_based_on_past_values(history, margin):
+    """Sets a dynamic upper threshold, for values such as SF that rise when the link degrades."""
+    if len(history) < MIN_SAMPLES:
+        return None
+    return history.upper_threshold(THRESHOLD_METHOD, k=THRESHOLD_K, percentile=1 - THRESHOLD_PERCENTILE, margin=margin)
 
 def get_wifi_radio_values(interface):
     """Retrieves radio values (RSSI and Link Quality) for the given interface."""
@@ -127,54 +105,83 @@ def get_wifi_radio_values(interface):
         print(f"Error retrieving values: {e}")
     return None, None
 
-def check_radio_values():
-    """Checks if current radio values are below the dynamic threshold and triggers a healing action if needed."""
-    if COMM_TYPE == "wifi":
-        rssi, link_quality = get_wifi_radio_values(INTERFACE)
-        radio_values = {
-            "rssi": rssi,
-            "link_quality": link_quality,
-            "snr": None,
-            "sf": None
-        }
-    elif COMM_TYPE == "lora":
-        radio_values = {
-            "rssi": get_lora_radio_values()[0],
-            "snr": get_lora_radio_values()[1],
-            "sf": get_lora_radio_values()[2],
-            "link_quality": None
-        }
-
-    store_radio_values(
-        radio_values["rssi"], 
-        radio_values["link_quality"],
-        radio_values["snr"], 
-        radio_values["sf"]
-    )
+def get_radio_values():
+    """Reads the current WiFi radio values."""
+    rssi, link_quality = get_wifi_radio_values(get_primary_network_interface())
+    return {"rssi": rssi, "link_quality": link_quality, "snr": None, "sf": None}
 
+def check_radio_values(radio_values):
+    """Compares the radio values with thresholds learned from past values, stores them and returns the ones that crossed."""
     thresholds = {
         "rssi": set_threshold_based_on_past_values(rssi_history_data, RSSI_MARGIN),
         "link_quality": set_threshold_based_on_past_values(link_quality_history_data, LINK_QUALITY_MARGIN) if COMM_TYPE == "wifi" else None,
-        "snr": set_threshold_based_on_past_values(snr_history_data, SNR_MARGIN) if COMM_TYPE == "lora" else None
+        "snr": set_threshold_based_on_past_values(snr_history_data, SNR_MARGIN) if COMM_TYPE == "lora" else None,
     }
+    sf_threshold = set_upper_threshold_based_on_past_values(sf_history_data, SF_MARGIN) if COMM_TYPE == "lora" else None
 
+    issues = []
     for key, value in radio_values.items():
         threshold = thresholds.get(key)
         if value is not None and threshold is not None and value < threshold:
-            handle_alert(scenario=SCENARIO, alert_msg=f"Link quality issue detected. Adjusting transmission parameters.")
-            healing_action()
-        else:
-            print(f"No link quality issue detected for {key} with value {value}.") if value is not None else ""
+            issues.append(key)
+        elif key == "sf" and value is not None and sf_threshold is not None and value > sf_threshold:
+            issues.append(key)
+        elif value is not None:
+            print(f"No link quality issue detected for {key} with value {value}.")
 
+    store_radio_values(
+        radio_values["rssi"], 
+        radio_values["link_quality"],
+        radio_values["snr"], 
+        radio_values["sf"]
+    )
+    return issues
+
+async def report_radio_values(radio_values):
+    """Checks the radio values and reports the issues found."""
+    issues = check_radio_values(radio_values)
+    if issues:
+        await handle_alert(scenario=SCENARIO, alert_msg=f"Link quality issue detected ({', '.join(issues)}). Adjusting transmission parameters.")
+        healing_action()
+
+async def consume_lora_packets(reader):
+    """Feeds every received LoRa packet into the link quality history."""
+    while True:
+        packet = await reader.get()
+        logging.debug("Received LoRa Packet: %s", packet["raw"])
+        try:
+            await report_radio_values({"rssi": packet["rssi"], "snr": packet["snr"], "sf": packet["sf"], "link_quality": None})
+        except Exception as e:
+            print(f"Error processing LoRa packet: {e}")
+
+async def start_lora_reader():
+    """Opens the LoRa serial port once and keeps streaming its packets."""
+    global lora_reader, lora_consumer
+    if lora_reader is None:
+        reader = LoRaReader(SERIAL_PORT, BAUD_RATE, queue_size=LORA_QUEUE_SIZE)
+        try:
+            await reader.start()
+        except Exception as e:
+            print(f"Error opening LoRa serial port {SERIAL_PORT}: {e}")
+            return None
+        lora_reader = reader
+        lora_consumer = asyncio.create_task(consume_lora_packets(reader))
+    return lora_reader
+
+@register("link_quality_issues", section="Link_Quality")
 async def check_radio_values_async():
-    """Async wrapper for checking radio values without blocking."""
-    await asyncio.to_thread(check_radio_values)
+    """Checks the WiFi radio values without blocking, or makes sure the LoRa stream is running."""
+    if COMM_TYPE == "lora":
+        reader = await start_lora_reader()
+        if reader:
+            print(f"LoRa packets received: {reader.packets}, dropped: {reader.dropped}")
+        return
+    radio_values = await asyncio.to_thread(get_radio_values)
+    await report_radio_values(radio_values)
 
 async def monitor_link_quality():
     """Main loop for monitoring link quality."""
-    while True:
-        await check_radio_values_async()
-        await asyncio.sleep(60)
+    await run_periodically(check_radio_values_async, CHECK_INTERVAL)
         
 if __name__ == "__main__":
-    monitor_link_quality()
+    asyncio.run(monitor_link_quality())
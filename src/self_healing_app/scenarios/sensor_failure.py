@@ -1,21 +1,45 @@
-import adafruit_dht
-import board
 import asyncio
 import datetime
 
 from utils.alerts_service import handle_alert
 from utils.module_utils import is_running_on_rpi
-from config.loader import load_config
+from utils.scheduler import register, run_periodically
+from utils.sensor_session import SensorSession, SimulatedDHT22, open_dht22, parse_sensors
+from config.loader import subscribe
 
-config = load_config()
+sessions = None
+SENSORS = SENSOR_BACKEND = BUFFER_SIZE = None
 
-SCENARIO = config.get("Sensor_Monitoring", "scenario_name", fallback="Sensor Failure")
-LOW_TEMPERATURE_THRESHOLD = config.getint("Sensor_Monitoring", "low_temperature_threshold", fallback=-20)
-HIGH_TEMPERATURE_THRESHOLD = config.getint("Sensor_Monitoring", "high_temperature_threshold", fallback=60)
-LOW_HUMIDITY_THRESHOLD = config.getint("Sensor_Monitoring", "low_humidity_threshold", fallback=10)
-HIGH_HUMIDITY_THRESHOLD = config.getint("Sensor_Monitoring", "high_humidity_threshold", fallback=90)
-SENSOR_POWER_PIN = config.getint("Sensor_Monitoring", "sensor_power_pin", fallback=90)
-SENSOR_CHECK_MAX = config.getint("Sensor_Monitoring", "sensor_check_max", fallback=5)
+def apply_settings(settings):
+    """Applies the [Sensor_Monitoring] and [Sensor_Messages] settings, at import and after every reload."""
+    global SCENARIO, CHECK_INTERVAL, LOW_TEMPERATURE_THRESHOLD, HIGH_TEMPERATURE_THRESHOLD, LOW_HUMIDITY_THRESHOLD
+    global HIGH_HUMIDITY_THRESHOLD, SENSOR_POWER_PIN, SENSOR_CHECK_MAX, NO_MEASUREMENT_MSG, OUTLIER_DETECTED_MSG
+    global SENSOR_OK_MSG, SENSORS, SENSOR_BACKEND, SAMPLE_INTERVAL, BUFFER_SIZE, FILTER_METHOD, HAMPEL_K, MAX_AGE
+    sensor, messages = settings.sensor, settings.sensor_messages
+    hardware = (SENSORS, SENSOR_BACKEND, BUFFER_SIZE)
+    SCENARIO = sensor.scenario_name
+    CHECK_INTERVAL = sensor.check_interval
+    LOW_TEMPERATURE_THRESHOLD = sensor.low_temperature_threshold
+    HIGH_TEMPERATURE_THRESHOLD = sensor.high_temperature_threshold
+    LOW_HUMIDITY_THRESHOLD = sensor.low_humidity_threshold
+    HIGH_HUMIDITY_THRESHOLD = sensor.high_humidity_threshold
+    SENSOR_POWER_PIN = sensor.sensor_power_pin
+    SENSOR_CHECK_MAX = sensor.sensor_check_max
+    NO_MEASUREMENT_MSG = messages.no_measurement
+    OUTLIER_DETECTED_MSG = messages.outlier_detected
+    SENSOR_OK_MSG = messages.sensor_ok
+    SENSORS = parse_sensors(sensor.sensors)
+    SENSOR_BACKEND = sensor.backend
+    SAMPLE_INTERVAL = sensor.sample_interval
+    BUFFER_SIZE = sensor.buffer_size
+    FILTER_METHOD = sensor.filter
+    HAMPEL_K = sensor.hampel_k
+    MAX_AGE = sensor.max_age
+
+    if sessions and hardware != (SENSORS, SENSOR_BACKEND, BUFFER_SIZE):
+        close_sensor_sessions()  # Reopened with the new sensors by the next check
+    for session in sessions or []:
+        session.interval, session.method, session.k = SAMPLE_INTERVAL, FILTER_METHOD, HAMPEL_K
 
 def reset_sensor():
     if is_running_on_rpi():
@@ -42,49 +66,66 @@ def check_outlier_values(humidity, temperature) -> bool:
         humidity <= LOW_HUMIDITY_THRESHOLD or humidity >= HIGH_HUMIDITY_THRESHOLD
     )
 
-def read_sensor_data(device) -> tuple:
-    try:
-        humidity, temperature = device.humidity, device.temperature
-        return (humidity, temperature)
-    except RuntimeError as e:
-        return None, None
-
-def init_sensor():
-    try:    
-        device = adafruit_dht.DHT22(board.D4, use_pulseio=False)
-    except AttributeError as e:
-        device = None
-    
-    return device
+def status_report(humidity, temperature):
+    """Reports the status of the sensor measurements."""
+    if humidity is None or temperature is None:
+        return NO_MEASUREMENT_MSG
+    if check_outlier_values(humidity, temperature):
+        return OUTLIER_DETECTED_MSG
+    return SENSOR_OK_MSG
 
-async def monitor_sensor():
-    """Monitors the sensor periodically, to detect threshold violations."""
+def open_sensor(pin: int):
+    """Returns a function opening the configured sensor backend on the given pin."""
+    if SENSOR_BACKEND == "simulated":
+        return lambda: SimulatedDHT22(seed=pin)
+    return lambda: open_dht22(pin)
+
+def get_sensor_sessions() -> list:
+    """Returns the sessions of the configured sensors, started on first use and kept open."""
+    global sessions
+    if sessions is None:
+        sessions = [SensorSession(name, open_sensor(pin), interval=SAMPLE_INTERVAL, buffer_size=BUFFER_SIZE,
+                                  method=FILTER_METHOD, k=HAMPEL_K) for name, pin in SENSORS]
+        for session in sessions:
+            session.start()
+    return sessions
+
+def close_sensor_sessions():
+    global sessions
+    for session in sessions or []:
+        session.stop()
+    sessions = None
+
+subscribe(apply_settings)
+
+@register("sensor_failure", section="Sensor_Monitoring")
+async def check_sensor():
+    """Checks the buffered, filtered readings of every sensor once, to detect threshold violations."""
     print(f"Monitoring sensors at {datetime.datetime.now()}...")
-    while True:
-        device = init_sensor()
-
-        if device is None:
-            print("Failed to initialize the sensor. Exiting sensor monitoring...")
-            return
-        
-        for attempt in range(SENSOR_CHECK_MAX):
-            humidity, temperature = read_sensor_data(device)
-            
-            if humidity is not None and temperature is not None:
-                print(f"Sensor measurements are: Temperature {temperature}°C, Humidity {humidity}%")
-                if check_outlier_values(humidity, temperature):
-                    await handle_alert(scenario=SCENARIO, alert_msg= "Sensor measurement detected as an outlier.")
-                    healing_action()
-
-                break
-            else:
-                print("Failed to read sensor data. Retrying...")
-                await asyncio.sleep(2)
-        else:
-            print("Failed to read sensor data after multiple attempts. Exclude sensor from monitoring...")
+    for session in get_sensor_sessions():
+        if session.error is not None:
+            print(f"Failed to initialize the sensor {session.name}. Skipping sensor check...")
+            continue
+
+        humidity, temperature = session.reading(MAX_AGE)
+        if humidity is not None and temperature is not None:
+            print(f"Sensor {session.name} measurements are: Temperature {temperature}°C, Humidity {humidity}%: {status_report(humidity, temperature)}")
+            if check_outlier_values(humidity, temperature):
+                await handle_alert(scenario=SCENARIO, alert_msg= f"Sensor {session.name} measurement detected as an outlier.", dedup_key=session.name)
+                healing_action()
+        elif session.consecutive_failures >= SENSOR_CHECK_MAX:
+            print(f"Failed to read sensor {session.name} after multiple attempts. Exclude sensor from monitoring...")
             healing_action()
-    await asyncio.sleep(60)
+        else:
+            print(f"No recent measurement from sensor {session.name} yet.")
+
+async def monitor_sensor():
+    """Monitors the sensor periodically, to detect threshold violations."""
+    await run_periodically(check_sensor, CHECK_INTERVAL)
 
 if __name__ == "__main__":
     print("Starting sensor monitoring...")
-    monitor_sensor()
+    try:
+        asyncio.run(monitor_sensor())
+    finally:
+        close_sensor_sessions()
@@ -1,9 +1,234 @@
+import re
+import time
 import asyncio
+import datetime
 
-from api_clients.self_healing_client import SelfHealingClient
+from api_clients.self_healing_client import get_self_healing_client
+from config.loader import get_settings, subscribe
 
-async def handle_alert(scenario: str, alert_msg: str):
-    """Handles the alert by storing it in log file and sending it to Self-healing API."""
-    # add_alert(scenario, alert_msg)
-    sh_client = SelfHealingClient()
-    asyncio.create_task(sh_client.post_alert_async(scenario, alert_msg))
+alert_settings = get_settings().alerts
+BATCH_WINDOW = alert_settings.batch_window
+BATCH_MAX_SIZE = alert_settings.batch_max_size
+DEDUP_WINDOW = alert_settings.dedup_window
+RATE_LIMIT = alert_settings.rate_limit
+RATE_BURST = alert_settings.rate_burst
+
+# Measurements (CPU usage, duty cycle, ...) and ANSI colours do not make an alert different; names,
+# addresses and interfaces do, so only numbers followed by a unit are dropped
+FINGERPRINT_PATTERN = re.compile(r"\x1b\[[0-9;]*m|\\033\[[0-9;]*m|(?<![\w.])-?\d+(?:\.\d+)?\s*(?:%|dBm|dB|ms|s|°C)(?![\w%])")
+
+def fingerprint(message: str) -> str:
+    return FINGERPRINT_PATTERN.sub("#", message).strip().lower()
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = None
+
+    def take(self, now: float) -> bool:
+        if self.updated is not None:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+class AlertDeduplicator:
+    """
+    Collapses repeated alerts. The first alert of a (scenario, message
+    fingerprint) pair, or of a (scenario, dedup key) pair when the caller
+    names what the alert is about, is released at once; repeats within `window` seconds are
+    only counted, and reported as one alert with their count and first/last
+    seen times when the window ends. Every release takes a token from the
+    scenario's bucket, so a scenario cannot exceed `rate` alerts per second
+    after a burst of `burst`; held back alerts wait for a later window.
+    """
+
+    def __init__(self, window: float = DEDUP_WINDOW, rate: float = RATE_LIMIT, burst: int = RATE_BURST):
+        self.window = window
+        self.rate = rate
+        self.burst = burst
+        self.entries = {}  # (scenario, dedup key or fingerprint) -> occurrences not reported yet
+        self.buckets = {}  # scenario -> TokenBucket
+        self.suppressed = 0
+
+    def add(self, scenario: str, message: str, now: float = None, dedup_key: str = None) -> list:
+        """Records an alert and returns the alerts to send now, as dicts of build_payload arguments."""
+        now = time.time() if now is None else now
+        key = (scenario, fingerprint(message) if dedup_key is None else dedup_key)
+        entry = self.entries.get(key)
+        if entry is not None:
+            entry["count"] += 1
+            entry["first_seen"] = entry["first_seen"] or now
+            entry["last_seen"] = now
+            entry["message"] = message
+            self.suppressed += 1
+            return []
+        entry = {"scenario": scenario, "message": message, "count": 1, "first_seen": now, "last_seen": now, "window_end": now + self.window}
+        self.entries[key] = entry
+        alert = self._release(entry, now, collapsed=False)
+        return [alert] if alert else []
+
+    def due(self, now: float = None, force: bool = False) -> list:
+        """Returns the collapsed alerts of the windows that ended (all of them with force)."""
+        now = time.time() if now is None else now
+        alerts = []
+        for key, entry in list(self.entries.items()):
+            if not force and entry["window_end"] > now:
+                continue
+            if entry["count"] == 0:
+                del self.entries[key]  # No repeats during the window
+                continue
+            alert = self._release(entry, now, collapsed=True, force=force)
+            if alert:
+                alerts.append(alert)
+            entry["window_end"] = now + self.window
+        return alerts
+
+    def next_deadline(self):
+        return min((entry["window_end"] for entry in self.entries.values()), default=None)
+
+    def _release(self, entry: dict, now: float, collapsed: bool, force: bool = False):
+        bucket = self.buckets.get(entry["scenario"])
+        if bucket is None:
+            bucket = self.buckets[entry["scenario"]] = TokenBucket(self.rate, self.burst)
+        if not bucket.take(now) and not force:
+            return None
+        alert = {"scenario": entry["scenario"], "alert_msg": entry["message"]}
+        if collapsed or entry["count"] > 1:
+            alert["count"] = entry["count"]
+            alert["first_seen"] = datetime.datetime.fromtimestamp(entry["first_seen"]).isoformat()
+            alert["last_seen"] = datetime.datetime.fromtimestamp(entry["last_seen"]).isoformat()
+        entry["count"] = 0
+        entry["first_seen"] = None
+        return alert
+
+class AlertBatcher:
+    """Coalesces alerts raised within a short window and sends them as one request."""
+
+    def __init__(self, window: float = BATCH_WINDOW, max_size: int = BATCH_MAX_SIZE, deduplicator: AlertDeduplicator = None):
+        self.window = window
+        self.max_size = max(1, max_size)
+        self.client = get_self_healing_client()
+        self.deduplicator = deduplicator
+        self.pending = []
+        self.tasks = set()  # Keeps references to the in-flight requests
+        self._timer = None
+        self._dedup_timer = None
+
+    def add(self, scenario: str, alert_msg: str, dedup_key: str = None):
+        if self.deduplicator is None:
+            self.enqueue(scenario, alert_msg)
+            return
+        for alert in self.deduplicator.add(scenario, alert_msg, dedup_key=dedup_key):
+            self.enqueue(**alert)
+        self._schedule_dedup()
+
+    def enqueue(self, scenario: str, alert_msg: str, **details):
+        """Queues an alert for the next batch; details are the count and first/last seen of collapsed alerts."""
+        self.pending.append(self.client.build_payload(scenario, alert_msg, **details))
+        if len(self.pending) >= self.max_size:
+            self.send()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.window, self.send)
+
+    def set_deduplicator(self, deduplicator: AlertDeduplicator):
+        """Replaces the deduplicator, sending the repeats the previous one still holds."""
+        if self._dedup_timer is not None:
+            self._dedup_timer.cancel()
+            self._dedup_timer = None
+        previous, self.deduplicator = self.deduplicator, deduplicator
+        if previous is not None:
+            for alert in previous.due(force=True):
+                self.enqueue(**alert)
+
+    def _schedule_dedup(self):
+        deadline = self.deduplicator.next_deadline()
+        if self._dedup_timer is not None or deadline is None:
+            return
+        delay = max(0.0, deadline - time.time())
+        self._dedup_timer = asyncio.get_running_loop().call_later(delay, self._release_collapsed)
+
+    def _release_collapsed(self):
+        self._dedup_timer = None
+        for alert in self.deduplicator.due():
+            self.enqueue(**alert)
+        self._schedule_dedup()
+
+    def send(self):
+        """Sends the pending alerts, as a single alert or as a batch."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self.pending = self.pending, []
+        if not batch:
+            return
+        if len(batch) == 1:
+            payload = batch[0]
+            details = {key: payload[key] for key in ("count", "first_seen", "last_seen") if key in payload}
+            coroutine = self.client.post_alert_async(payload["scenario"], payload["message"], **details)
+        else:
+            coroutine = self.client.post_alerts_async(batch)
+        task = asyncio.create_task(coroutine)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def flush(self):
+        """Sends what is pending, including the repeats still being collapsed, and waits for the in-flight requests."""
+        if self.deduplicator is not None:
+            if self._dedup_timer is not None:
+                self._dedup_timer.cancel()
+                self._dedup_timer = None
+            for alert in self.deduplicator.due(force=True):
+                self.enqueue(**alert)
+        self.send()
+        if self.tasks:
+            await asyncio.gather(*self.tasks, return_exceptions=True)
+
+batcher = None
+
+def apply_settings(settings):
+    """Applies the [alerts] settings after a reload, to the running batcher as well."""
+    global BATCH_WINDOW, BATCH_MAX_SIZE, DEDUP_WINDOW, RATE_LIMIT, RATE_BURST
+    alerts = settings.alerts
+    BATCH_WINDOW = alerts.batch_window
+    BATCH_MAX_SIZE = alerts.batch_max_size
+    DEDUP_WINDOW = alerts.dedup_window
+    RATE_LIMIT = alerts.rate_limit
+    RATE_BURST = alerts.rate_burst
+    if batcher is None:
+        return
+    batcher.window = BATCH_WINDOW
+    batcher.max_size = max(1, BATCH_MAX_SIZE)
+    deduplicator = batcher.deduplicator
+    if DEDUP_WINDOW <= 0:
+        if deduplicator is not None:
+            batcher.set_deduplicator(None)
+    elif deduplicator is None:
+        batcher.set_deduplicator(AlertDeduplicator(DEDUP_WINDOW, RATE_LIMIT, RATE_BURST))
+    else:
+        deduplicator.window, deduplicator.rate, deduplicator.burst = DEDUP_WINDOW, RATE_LIMIT, RATE_BURST
+        for bucket in deduplicator.buckets.values():
+            bucket.rate, bucket.burst = RATE_LIMIT, max(1, RATE_BURST)
+
+subscribe(apply_settings)
+
+async def handle_alert(scenario: str, alert_msg: str, dedup_key: str = None):
+    """
+    Handles the alert by queuing it for the next batch sent to Self-healing API.
+    `dedup_key` names what the alert is about (a target, an interface), so
+    repeats are only collapsed for the same one.
+    """
+    global batcher
+    if batcher is None:
+        deduplicator = AlertDeduplicator(DEDUP_WINDOW, RATE_LIMIT, RATE_BURST) if DEDUP_WINDOW > 0 else None
+        batcher = AlertBatcher(BATCH_WINDOW, BATCH_MAX_SIZE, deduplicator=deduplicator)
+    batcher.add(scenario, alert_msg, dedup_key=dedup_key)
+
+async def flush_alerts():
+    """Sends any alerts still waiting for their batch window."""
+    if batcher is not None:
+        await batcher.flush()
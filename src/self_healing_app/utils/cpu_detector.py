@@ -0,0 +1,96 @@
+"""
+Windowed CPU state detector with hysteresis.
+
+Samples are kept with their times in fixed-size numpy ring buffers, and the
+window statistics (mean, percentiles, time spent above each threshold) are
+computed over them in a few vectorized operations.
+
+The state moves between NORMAL, LOW and HIGH only when a condition has held
+for `min_duration` seconds, not on a single sample:
+
+- NORMAL -> LOW when usage has stayed at or above the low threshold,
+- LOW or NORMAL -> HIGH when it has stayed at or above the high threshold,
+- HIGH -> LOW when it has stayed below the low threshold (so the band
+  between the two thresholds keeps HIGH instead of flapping),
+- LOW -> NORMAL when it has stayed below the low threshold minus the
+  hysteresis margin.
+
+Because the rules are based on durations rather than sample counts,
+decisions are the same whatever the sampling rate.
+"""
+
+import numpy as np
+
+NORMAL, LOW, HIGH = "NORMAL", "LOW", "HIGH"
+
+class CpuStateDetector:
+    def __init__(self, low_threshold: float, high_threshold: float, window: int = 600,
+                 min_duration: float = 60.0, hysteresis: float = 5.0):
+        self.low_threshold = low_threshold
+        self.high_threshold = high_threshold
+        self.min_duration = min_duration
+        self.hysteresis = hysteresis
+        self.values = np.zeros(max(2, window))
+        self.times = np.zeros(max(2, window))
+        self.position = 0
+        self.count = 0
+        self.state = NORMAL
+
+    def __len__(self):
+        return self.count
+
+    def add(self, value: float, now: float):
+        self.values[self.position] = value
+        self.times[self.position] = now
+        self.position = (self.position + 1) % len(self.values)
+        self.count = min(self.count + 1, len(self.values))
+
+    def window(self) -> tuple:
+        """Returns the (times, values) arrays of the window, oldest first."""
+        if self.count < len(self.values):
+            return self.times[:self.count], self.values[:self.count]
+        order = np.r_[self.position:len(self.values), 0:self.position]
+        return self.times[order], self.values[order]
+
+    def held_for(self, condition: np.ndarray, times: np.ndarray, now: float) -> float:
+        """Seconds for which the condition has been true up to the latest sample."""
+        if not condition[-1]:
+            return 0.0
+        broken = np.flatnonzero(~condition)
+        start = broken[-1] + 1 if len(broken) else 0
+        return now - times[start]
+
+    def statistics(self) -> dict:
+        """Mean, percentiles and seconds spent above each threshold over the window."""
+        times, values = self.window()
+        if not len(values):
+            return {}
+        durations = np.diff(times, append=times[-1])  # Each sample holds until the next one
+        p50, p95 = np.percentile(values, [50, 95])
+        return {
+            "samples": int(len(values)),
+            "mean": round(float(values.mean()), 2),
+            "p50": round(float(p50), 2),
+            "p95": round(float(p95), 2),
+            "max": round(float(values.max()), 2),
+            "seconds_above_low": round(float(durations[values >= self.low_threshold].sum()), 2),
+            "seconds_above_high": round(float(durations[values >= self.high_threshold].sum()), 2),
+        }
+
+    def update(self, value: float, now: float) -> tuple:
+        """Adds a sample and returns (state, previous state)."""
+        self.add(value, now)
+        times, values = self.window()
+        previous = self.state
+
+        if self.held_for(values >= self.high_threshold, times, now) >= self.min_duration:
+            self.state = HIGH
+        elif self.state == HIGH:
+            if self.held_for(values < self.low_threshold, times, now) >= self.min_duration:
+                self.state = LOW
+        elif self.state == LOW:
+            if self.held_for(values < self.low_threshold - self.hysteresis, times, now) >= self.min_duration:
+                self.state = NORMAL
+        elif self.held_for(values >= self.low_threshold, times, now) >= self.min_duration:
+            self.state = LOW
+        return self.state, previous
@@ -0,0 +1,68 @@
+"""
+CPU usage sampler reading /proc/stat directly.
+
+Usage is computed from the difference between the jiffy counters of two
+consecutive samples, for the aggregate CPU and for every core, so taking a
+sample costs one small file read instead of a `top` pipeline.
+"""
+
+import os
+
+PROC_STAT = "/proc/stat"
+PROC_LOADAVG = "/proc/loadavg"
+
+# Column positions in the cpu lines of /proc/stat
+USER, NICE, SYSTEM, IDLE, IOWAIT, IRQ, SOFTIRQ, STEAL = range(8)
+
+def read_cpu_times(path: str = PROC_STAT) -> dict:
+    """Returns the jiffy counters of the 'cpu' and 'cpuN' lines, keyed by name."""
+    times = {}
+    with open(path, "r") as file:
+        for line in file:
+            if not line.startswith("cpu"):
+                break  # The cpu lines come first, skip the long interrupt counters
+            fields = line.split()
+            # guest and guest_nice are already included in user and nice
+            times[fields[0]] = [int(value) for value in fields[1:9]]
+    return times
+
+def read_load_average(path: str = PROC_LOADAVG) -> tuple:
+    """Returns the 1, 5 and 15 minutes load averages."""
+    try:
+        with open(path, "r") as file:
+            return tuple(float(value) for value in file.read().split()[:3])
+    except (OSError, ValueError):
+        return os.getloadavg() if hasattr(os, "getloadavg") else (None, None, None)
+
+def usage_between(previous: list, current: list) -> dict:
+    """Returns the busy, iowait and steal percentages between two counter snapshots."""
+    deltas = [max(0, c - p) for c, p in zip(current, previous)]
+    total = sum(deltas)
+    if total == 0:
+        return {"usage": 0.0, "iowait": 0.0, "steal": 0.0}
+    idle = deltas[IDLE] + deltas[IOWAIT]
+    return {
+        "usage": round(100.0 * (total - idle) / total, 2),
+        "iowait": round(100.0 * deltas[IOWAIT] / total, 2),
+        "steal": round(100.0 * deltas[STEAL] / total, 2),
+    }
+
+class CpuSampler:
+    def __init__(self, stat_path: str = PROC_STAT, loadavg_path: str = PROC_LOADAVG):
+        self.stat_path = stat_path
+        self.loadavg_path = loadavg_path
+        self.previous = {}  # The first sample covers the time since boot
+
+    def sample(self) -> dict:
+        """
+        Returns the usage since the previous sample:
+        {"usage", "iowait", "steal", "per_core": [usage of cpu0, cpu1, ...], "load_average": (1m, 5m, 15m)}
+        """
+        current = read_cpu_times(self.stat_path)
+        zeros = [0] * 8
+        result = usage_between(self.previous.get("cpu", zeros), current["cpu"])
+        cores = sorted((name for name in current if name != "cpu"), key=lambda name: int(name[3:]))
+        result["per_core"] = [usage_between(self.previous.get(name, zeros), current[name])["usage"] for name in cores]
+        result["load_average"] = read_load_average(self.loadavg_path)
+        self.previous = current
+        return result
@@ -0,0 +1,143 @@
+"""
+Continuous duty-cycle accounting for network interfaces.
+
+A background task samples the TX byte counters of every tracked interface
+at a fixed resolution. Each sample turns the bytes sent since the previous
+one into radio-on time at the current bit rate, and stores it with the
+sample's duration in a fixed-size ring buffer per interface. The duty cycle
+over the whole window is kept as running sums, so reading it is O(1), and
+shorter sliding windows only sum the slots they cover. The bit rates are
+re-read every `bitrate_interval` seconds in a worker thread, since querying
+nl80211 blocks.
+"""
+
+import asyncio
+import logging
+from array import array
+
+from utils.net_stats import InterfaceStats
+
+class DutyCycleRing:
+    """Fixed-size ring buffer of (active time, elapsed time) slots with running totals."""
+
+    def __init__(self, slots: int):
+        self.slots = max(1, slots)
+        self.active = array("d", bytes(8 * self.slots))
+        self.elapsed = array("d", bytes(8 * self.slots))
+        self.position = 0
+        self.count = 0
+        self.active_total = 0.0
+        self.elapsed_total = 0.0
+
+    def push(self, active: float, elapsed: float):
+        position = self.position
+        self.active_total += active - self.active[position]
+        self.elapsed_total += elapsed - self.elapsed[position]
+        self.active[position] = active
+        self.elapsed[position] = elapsed
+        self.position = (position + 1) % self.slots
+        self.count = min(self.count + 1, self.slots)
+
+    def totals(self, last: int = None) -> tuple:
+        """Returns (active, elapsed) seconds over the last `last` slots, or the whole ring."""
+        if last is None or last >= self.count:
+            return self.active_total, self.elapsed_total
+        active = elapsed = 0.0
+        for step in range(1, last + 1):
+            position = (self.position - step) % self.slots
+            active += self.active[position]
+            elapsed += self.elapsed[position]
+        return active, elapsed
+
+class DutyCycleTracker:
+    def __init__(self, interfaces: list, window: float = 30.0, resolution: float = 0.1, stats: InterfaceStats = None,
+                 bitrate_interval: float = 10.0):
+        self.interfaces = list(interfaces)
+        self.window = window
+        self.resolution = resolution
+        self.stats = stats or InterfaceStats()
+        self.bitrate_interval = bitrate_interval
+        self.bitrates = {}  # interface -> bytes per second, refreshed by run()
+        self.rings = {interface: DutyCycleRing(int(round(window / resolution))) for interface in self.interfaces}
+        self.previous = {}  # interface -> last counter sample
+        self._task = None
+
+    def record(self, samples: dict):
+        """Accounts one counter sample per interface, as returned by InterfaceStats.sample()."""
+        for interface, sample in samples.items():
+            previous = self.previous.get(interface)
+            self.previous[interface] = sample
+            if previous is None or sample["tx_bytes"] is None or previous["tx_bytes"] is None:
+                continue
+            elapsed = sample["timestamp"] - previous["timestamp"]
+            if elapsed <= 0:
+                continue
+            bytes_sent = max(0, sample["tx_bytes"] - previous["tx_bytes"])  # Counters may reset
+            # The radio cannot be busy for longer than the time that passed
+            bitrate = self.bitrates.get(interface) or self.stats.bitrate(interface)
+            active = min(elapsed, bytes_sent / bitrate)
+            self.rings[interface].push(active, elapsed)
+
+    def poll(self):
+        self.record(self.stats.sample(self.interfaces))
+
+    def read_bitrates(self) -> dict:
+        return {interface: self.stats.bitrate(interface) for interface in self.interfaces}
+
+    async def refresh_bitrates(self):
+        """Re-reads the bit rates in a worker thread every `bitrate_interval` seconds."""
+        while True:
+            await asyncio.sleep(self.bitrate_interval)
+            try:
+                self.bitrates = await asyncio.to_thread(self.read_bitrates)
+            except Exception as e:
+                logging.error(f"Failed to read interface bit rates: {e}")
+
+    def duty_cycle(self, interface: str, window: float = None):
+        """Returns the fraction of time the interface transmitted over the last `window` seconds."""
+        ring = self.rings[interface]
+        slots = None if window is None else max(1, int(round(window / self.resolution)))
+        active, elapsed = ring.totals(slots)
+        return active / elapsed if elapsed > 0 else None
+
+    def duty_cycles(self, window: float = None) -> dict:
+        return {interface: self.duty_cycle(interface, window) for interface in self.interfaces}
+
+    async def run(self):
+        """Samples the counters every `resolution` seconds without accumulating drift."""
+        self.bitrates = await asyncio.to_thread(self.read_bitrates)
+        refresher = asyncio.create_task(self.refresh_bitrates())
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        try:
+            while True:
+                try:
+                    self.poll()
+                except Exception as e:
+                    logging.error(f"Failed to sample interface counters: {e}")
+                next_tick += self.resolution
+                now = loop.time()
+                if next_tick < now:
+                    next_tick = now  # Overrun, skip the missed ticks instead of bursting
+                await asyncio.sleep(next_tick - now)
+        finally:
+            refresher.cancel()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    def cancel(self):
+        """Stops sampling without waiting for the sampling task to end."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
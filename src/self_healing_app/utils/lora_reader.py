@@ -0,0 +1,83 @@
+"""
+Long-lived asyncio reader for the LoRa serial link.
+
+The serial port is opened once and watched by the event loop, so every
+packet is read as soon as it arrives instead of being polled once per tick.
+Packets are parsed in a single regex pass and handed out through a bounded
+queue; when consumers fall behind the oldest packets are dropped and counted.
+"""
+
+import os
+import re
+import asyncio
+import logging
+
+PACKET_PATTERN = re.compile(r"RSSI: (?P<rssi>-?\d+) dBm|SNR: (?P<snr>-?\d+(?:\.\d+)?) dB|SF: (?P<sf>\d+)")
+MAX_LINE_LENGTH = 4096
+
+def parse_packet(line: str) -> dict:
+    """Extracts RSSI, SNR and spreading factor (SF) from a LoRa packet line."""
+    packet = {"rssi": None, "snr": None, "sf": None}
+    for match in PACKET_PATTERN.finditer(line):
+        if match.group("rssi") is not None:
+            packet["rssi"] = int(match.group("rssi"))
+        elif match.group("snr") is not None:
+            packet["snr"] = float(match.group("snr"))
+        else:
+            packet["sf"] = int(match.group("sf"))
+    return packet
+
+class LoRaReader:
+    def __init__(self, port: str, baud_rate: int = 9600, queue_size: int = 1000):
+        self.port = port
+        self.baud_rate = baud_rate
+        self.queue = asyncio.Queue(maxsize=max(1, queue_size))
+        self.packets = 0
+        self.dropped = 0
+        self.serial = None
+        self._buffer = b""
+        self._loop = None
+
+    async def start(self):
+        """Opens the serial port and starts streaming packets into the queue."""
+        import serial  # Only needed on nodes with a LoRa radio
+
+        self.serial = serial.Serial(self.port, self.baud_rate, timeout=0)
+        self._loop = asyncio.get_running_loop()
+        self._loop.add_reader(self.serial.fileno(), self._on_readable)
+
+    def _on_readable(self):
+        try:
+            data = os.read(self.serial.fileno(), 4096)
+        except BlockingIOError:
+            return
+        except OSError as e:
+            logging.error(f"Error reading LoRa serial port {self.port}: {e}")
+            return
+        self._buffer += data
+        *lines, self._buffer = self._buffer.split(b"\n")
+        if len(self._buffer) > MAX_LINE_LENGTH:
+            self._buffer = b""  # Garbage without line breaks
+        for line in lines:
+            line = line.decode("utf-8", errors="replace").strip()
+            if line:
+                self._publish(line)
+
+    def _publish(self, line: str):
+        packet = parse_packet(line)
+        packet["raw"] = line
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(packet)
+        self.packets += 1
+
+    async def get(self) -> dict:
+        """Waits for the next packet."""
+        return await self.queue.get()
+
+    async def stop(self):
+        if self.serial is not None:
+            self._loop.remove_reader(self.serial.fileno())
+            self.serial.close()
+            self.serial = None
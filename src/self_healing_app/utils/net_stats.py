@@ -0,0 +1,120 @@
+"""
+Network interface statistics read from sysfs.
+
+Transmit counters come from /sys/class/net/<if>/statistics, so sampling any
+number of interfaces costs a couple of small file reads each instead of an
+`ifconfig` subprocess. The transmit bit rate of wireless links is queried
+over nl80211 when pyroute2 is installed, and falls back to the link speed
+reported by sysfs for wired interfaces. The nl80211 query opens a netlink
+socket and blocks, so callers on the event loop read bit rates in a thread.
+"""
+
+import os
+import time
+import socket
+import logging
+import functools
+
+SYS_CLASS_NET = "/sys/class/net"
+PROC_NET_ROUTE = "/proc/net/route"
+DEFAULT_BITRATE = (1 * 1e6) / 8  # 1 Mbps in bytes per second
+RTF_UP = 0x1
+
+nl80211_failures = set()  # Interfaces whose failed nl80211 query was already logged
+
+def read_int(path: str):
+    try:
+        with open(path, "r") as file:
+            return int(file.read().strip())
+    except (OSError, ValueError):
+        return None
+
+def get_wireless_bitrate(interface: str):
+    """Returns the TX bit rate of a wireless interface in bytes per second, using nl80211."""
+    try:
+        from pyroute2 import IW
+    except ImportError:
+        return None
+    try:
+        iw = IW()
+        try:
+            for station in iw.get_stations(socket.if_nametoindex(interface)):
+                rate = station.get_attr("NL80211_ATTR_STA_INFO").get_attr("NL80211_STA_INFO_TX_BITRATE")
+                if rate is None:
+                    continue
+                bitrate = rate.get_attr("NL80211_RATE_INFO_BITRATE32") or rate.get_attr("NL80211_RATE_INFO_BITRATE")
+                if bitrate:
+                    return bitrate * 100_000 / 8  # Reported in units of 100 kbit/s
+        finally:
+            iw.close()
+    except Exception as e:
+        if interface not in nl80211_failures:
+            nl80211_failures.add(interface)
+            logging.warning(f"nl80211 is unavailable for {interface}, using the link speed instead: {e}")
+    return None
+
+@functools.lru_cache(maxsize=None)
+def get_primary_network_interface(route_table: str = PROC_NET_ROUTE) -> str:
+    """Finds the interface of the default route, reading the routing table on first use only."""
+    interface = "eth0"  # Default to eth0 if detection fails
+    try:
+        with open(route_table, "r") as file:
+            for line in file.readlines()[1:]:  # Skips the header
+                fields = line.split()
+                if len(fields) > 3 and fields[1] == "00000000" and int(fields[3], 16) & RTF_UP:
+                    interface = fields[0]
+                    break
+    except (OSError, ValueError) as e:
+        print(f"Error detecting network interface: {e}")
+    print(f"Using Network Interface: {interface}")
+    return interface
+
+class InterfaceStats:
+    def __init__(self, root: str = SYS_CLASS_NET, bitrate_ttl: float = 10.0):
+        self.root = root
+        self.bitrate_ttl = bitrate_ttl
+        self._bitrates = {}  # interface -> (bytes per second, monotonic time read)
+
+    def interfaces(self) -> list:
+        """Lists the interfaces known to the kernel."""
+        try:
+            return sorted(os.listdir(self.root))
+        except OSError:
+            return []
+
+    def is_wireless(self, interface: str) -> bool:
+        return os.path.isdir(os.path.join(self.root, interface, "wireless"))
+
+    def tx_counters(self, interface: str) -> dict:
+        """Returns the cumulative tx_packets and tx_bytes of an interface (None when unknown)."""
+        statistics = os.path.join(self.root, interface, "statistics")
+        return {
+            "tx_packets": read_int(os.path.join(statistics, "tx_packets")),
+            "tx_bytes": read_int(os.path.join(statistics, "tx_bytes")),
+        }
+
+    def sample(self, interfaces: list) -> dict:
+        """Reads the TX counters of several interfaces in one pass, stamped with a monotonic time."""
+        timestamp = time.monotonic()
+        samples = {}
+        for interface in interfaces:
+            counters = self.tx_counters(interface)
+            counters["timestamp"] = timestamp
+            samples[interface] = counters
+        return samples
+
+    def bitrate(self, interface: str) -> float:
+        """Returns the current transmission speed in bytes per second, cached for bitrate_ttl seconds."""
+        cached = self._bitrates.get(interface)
+        if cached and time.monotonic() - cached[1] < self.bitrate_ttl:
+            return cached[0]
+
+        speed = get_wireless_bitrate(interface) if self.is_wireless(interface) else None
+        if speed is None:
+            link_speed = read_int(os.path.join(self.root, interface, "speed"))  # Mb/s, -1 when unknown
+            if link_speed is not None and link_speed > 0:
+                speed = link_speed * 1e6 / 8
+        if speed is None:
+            speed = DEFAULT_BITRATE
+        self._bitrates[interface] = (speed, time.monotonic())
+        return speed
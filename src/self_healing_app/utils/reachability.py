@@ -0,0 +1,211 @@
+"""
+Concurrent reachability prober for a fleet of nodes.
+
+Every target of a sweep is probed at the same time, bounded by a semaphore,
+so a sweep takes about one timeout regardless of the fleet size. Targets
+with a port are probed with an asyncio TCP connect (a refused connection
+still proves the host is up); the others with an unprivileged ICMP echo
+socket when the kernel allows it (net.ipv4.ping_group_range), or with the
+`ping` command otherwise. The RTT and loss of the last probes are kept per
+target, and a target only changes state after `down_after` failed sweeps,
+so callers can alert on transitions instead of on every failed probe.
+"""
+
+import re
+import time
+import socket
+import struct
+import asyncio
+import logging
+from collections import deque
+
+UNKNOWN = "unknown"
+REACHABLE = "reachable"
+UNREACHABLE = "unreachable"
+
+ICMP_ECHO_REQUEST = 8
+ICMP_ECHO_REPLY = 0
+PING_TIME_PATTERN = re.compile(r"time[=<]([\d.]+) ms")
+
+def parse_targets(value: str) -> list:
+    """
+    Parses a comma separated list of targets, each written as `host`,
+    `host:port`, `name=host` or `name=host:port`.
+    """
+    targets = []
+    for item in value.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        name, _, address = item.rpartition("=")
+        host, _, port = address.partition(":")
+        targets.append({"name": name or host, "host": host, "port": int(port) if port else None})
+    return targets
+
+def icmp_checksum(data: bytes) -> int:
+    if len(data) % 2:
+        data += b"\x00"
+    total = sum(struct.unpack(f"!{len(data) // 2}H", data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
+def icmp_echo_request(sequence: int, payload: bytes = b"self-healing") -> bytes:
+    header = struct.pack("!BBHHH", ICMP_ECHO_REQUEST, 0, 0, 0, sequence)
+    checksum = icmp_checksum(header + payload)
+    # The identifier is replaced by the kernel with the port of the ping socket
+    return struct.pack("!BBHHH", ICMP_ECHO_REQUEST, 0, checksum, 0, sequence) + payload
+
+def icmp_available() -> bool:
+    """Checks whether unprivileged ICMP echo sockets can be opened."""
+    try:
+        socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_ICMP).close()
+        return True
+    except OSError:
+        return False
+
+class TargetHistory:
+    """RTT and loss of the last probes of one target, with its reachability state."""
+
+    def __init__(self, size: int = 20):
+        self.rtts = deque(maxlen=max(1, size))  # Seconds, None for a lost probe
+        self.state = UNKNOWN
+        self.consecutive_failures = 0
+        self.last_change = None
+
+    def record(self, rtt):
+        self.rtts.append(rtt)
+        self.consecutive_failures = 0 if rtt is not None else self.consecutive_failures + 1
+
+    @property
+    def loss(self) -> float:
+        return sum(1 for rtt in self.rtts if rtt is None) / len(self.rtts) if self.rtts else 0.0
+
+    @property
+    def average_rtt(self):
+        received = [rtt for rtt in self.rtts if rtt is not None]
+        return sum(received) / len(received) if received else None
+
+class ReachabilityProber:
+    def __init__(self, targets: list, timeout: float = 1.0, max_parallel: int = 512,
+                 history_size: int = 20, down_after: int = 1, method: str = "auto"):
+        self.targets = list(targets)
+        self.timeout = timeout
+        self.semaphore = asyncio.Semaphore(max(1, max_parallel))
+        self.down_after = max(1, down_after)
+        self.method = method
+        self.history = {target["name"]: TargetHistory(history_size) for target in self.targets}
+        self._icmp = None
+        self._sequence = 0
+
+    def carry_over(self, previous: "ReachabilityProber"):
+        """Keeps the history and state of the targets that were already probed by the previous prober."""
+        for target in self.targets:
+            history = previous.history.get(target["name"])
+            if history is not None and target in previous.targets:
+                history.rtts = deque(history.rtts, maxlen=self.history[target["name"]].rtts.maxlen)
+                self.history[target["name"]] = history
+
+    def probe_method(self, target: dict) -> str:
+        if self.method != "auto":
+            return self.method
+        if target["port"] is not None:
+            return "tcp"
+        if self._icmp is None:
+            self._icmp = icmp_available()
+        return "icmp" if self._icmp else "ping"
+
+    async def probe(self, target: dict):
+        """Probes a target once, returning the round-trip time in seconds or None when it did not answer."""
+        method = self.probe_method(target)
+        async with self.semaphore:
+            try:
+                if method == "tcp":
+                    return await self.probe_tcp(target["host"], target["port"] or 22)
+                if method == "icmp":
+                    return await self.probe_icmp(target["host"])
+                return await self.probe_ping(target["host"])
+            except Exception as e:
+                logging.debug(f"Probe of {target['name']} ({target['host']}) failed: {e}")
+                return None
+
+    async def probe_tcp(self, host: str, port: int):
+        start = time.monotonic()
+        try:
+            _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), self.timeout)
+        except ConnectionRefusedError:
+            return time.monotonic() - start  # The host answered with a reset
+        except (OSError, asyncio.TimeoutError):
+            return None
+        rtt = time.monotonic() - start
+        writer.close()
+        return rtt
+
+    async def probe_icmp(self, host: str):
+        loop = asyncio.get_running_loop()
+        self._sequence = (self._sequence + 1) & 0xFFFF
+        sequence = self._sequence
+        address = (await loop.getaddrinfo(host, None, family=socket.AF_INET))[0][4]
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_ICMP) as sock:
+            sock.setblocking(False)
+            start = time.monotonic()
+            sock.sendto(icmp_echo_request(sequence), address)
+            deadline = start + self.timeout
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                try:
+                    reply = await asyncio.wait_for(loop.sock_recv(sock, 1024), remaining)
+                except asyncio.TimeoutError:
+                    return None
+                # Ping sockets return the ICMP message without the IP header
+                if len(reply) >= 8:
+                    kind, _, _, _, reply_sequence = struct.unpack("!BBHHH", reply[:8])
+                    if kind == ICMP_ECHO_REPLY and reply_sequence == sequence:
+                        return time.monotonic() - start
+
+    async def probe_ping(self, host: str):
+        timeout = max(1, int(round(self.timeout)))
+        process = await asyncio.create_subprocess_exec(
+            "ping", "-c", "1", "-W", str(timeout), host,
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL,
+        )
+        output, _ = await process.communicate()
+        if process.returncode != 0:
+            return None
+        match = PING_TIME_PATTERN.search(output.decode(errors="replace"))
+        return float(match.group(1)) / 1000 if match else self.timeout
+
+    def update(self, target: dict, rtt) -> tuple:
+        """Records a probe result and returns (old state, new state) when the target changed state."""
+        history = self.history[target["name"]]
+        history.record(rtt)
+        old = history.state
+        if rtt is not None:
+            new = REACHABLE
+        elif history.consecutive_failures >= self.down_after:
+            new = UNREACHABLE
+        else:
+            return None
+        if new == old:
+            return None
+        history.state = new
+        history.last_change = time.time()
+        return old, new
+
+    async def sweep(self) -> list:
+        """Probes every target concurrently and returns the (target, old state, new state) transitions."""
+        rtts = await asyncio.gather(*(self.probe(target) for target in self.targets))
+        transitions = []
+        for target, rtt in zip(self.targets, rtts):
+            change = self.update(target, rtt)
+            if change:
+                transitions.append((target, *change))
+        return transitions
+
+    def status(self) -> dict:
+        return {
+            name: {"state": history.state, "loss": history.loss, "average_rtt": history.average_rtt}
+            for name, history in self.history.items()
+        }
@@ -0,0 +1,97 @@
+"""
+Rolling-window statistics with constant-time updates.
+
+Values are kept in a fixed-size ring buffer. Adding a value (and evicting the
+oldest one once the window is full) updates the mean and variance with a
+windowed Welford step, the EWMA, and a fixed-bin histogram used for
+approximate quantiles. None of these costs depends on the window size, so
+histories of thousands of samples are as cheap as histories of ten.
+"""
+
+import math
+from array import array
+
+class RollingStats:
+    def __init__(self, size: int, low: float, high: float, bin_width: float = 1.0, alpha: float = 0.1):
+        self.size = max(1, size)
+        self.values = array("d", bytes(8 * self.size))
+        self.position = 0
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0  # Sum of squared deviations from the mean
+        self.alpha = alpha
+        self.ewma = None
+        self.low = low
+        self.bin_width = bin_width
+        self.bins = [0] * max(1, int(math.ceil((high - low) / bin_width)))
+
+    def __len__(self):
+        return self.count
+
+    def _bin(self, value: float) -> int:
+        index = int((value - self.low) // self.bin_width)
+        return min(max(index, 0), len(self.bins) - 1)  # Out-of-range values land in the edge bins
+
+    def add(self, value: float):
+        value = float(value)
+        if self.count < self.size:
+            self.count += 1
+            delta = value - self.mean
+            self.mean += delta / self.count
+            self._m2 += delta * (value - self.mean)
+        else:
+            evicted = self.values[self.position]
+            old_mean = self.mean
+            self.mean += (value - evicted) / self.count
+            self._m2 += (value - evicted) * (value - self.mean + evicted - old_mean)
+            self.bins[self._bin(evicted)] -= 1
+        self._m2 = max(self._m2, 0.0)  # Guard against rounding below zero
+        self.values[self.position] = value
+        self.position = (self.position + 1) % self.size
+        self.bins[self._bin(value)] += 1
+        self.ewma = value if self.ewma is None else self.alpha * value + (1 - self.alpha) * self.ewma
+
+    @property
+    def variance(self) -> float:
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+    def quantile(self, q: float):
+        """Returns the approximate q-quantile, interpolated within its histogram bin."""
+        if self.count == 0:
+            return None
+        target = q * self.count
+        seen = 0
+        for index, bin_count in enumerate(self.bins):
+            if bin_count and seen + bin_count >= target:
+                fraction = (target - seen) / bin_count
+                return self.low + (index + fraction) * self.bin_width
+            seen += bin_count
+        return self.low + len(self.bins) * self.bin_width
+
+    def lower_threshold(self, method: str = "sigma", k: float = 2.0, percentile: float = 0.05, margin: float = 0.0):
+        """
+        Returns the value below which a new sample is abnormal: mean - k*sigma
+        ("sigma") or the given lower percentile ("percentile"). The threshold is
+        never closer to the mean than `margin`.
+        """
+        if self.count == 0:
+            return None
+        if method == "percentile":
+            threshold = self.quantile(percentile)
+        else:
+            threshold = self.mean - k * self.std
+        return min(threshold, self.mean - margin)
+
+    def upper_threshold(self, method: str = "sigma", k: float = 2.0, percentile: float = 0.95, margin: float = 0.0):
+        """Mirror of lower_threshold for metrics where high values are abnormal."""
+        if self.count == 0:
+            return None
+        if method == "percentile":
+            threshold = self.quantile(percentile)
+        else:
+            threshold = self.mean + k * self.std
+        return max(threshold, self.mean + margin)
@@ -0,0 +1,120 @@
+"""
+Config-driven scheduler for the monitoring scenarios.
+
+Scenarios register a one-shot check with `@register(name, section)`. The
+scheduler is built from the typed settings and runs the checks enabled in
+`[Scenarios] enabled`, each every `check_interval` seconds of its config
+section (`[Monitoring] interval` by default). Ticks are anchored to a fixed grid, so the time a check takes does
+not shift the following ones; a small random jitter is added on top of the
+grid without accumulating. A check that runs past its next tick skips the
+missed ticks instead of stacking them up, and the first tick of every
+scenario is staggered across its interval so probes do not all fire at once.
+"""
+
+import random
+import asyncio
+import logging
+
+from config.settings import SECTIONS
+
+scenarios = {}  # name -> {"check": async callable, "section": config section}
+
+def register(name: str, section: str = None):
+    """Registers the decorated coroutine function as the periodic check of a scenario."""
+    def decorator(check):
+        scenarios[name] = {"check": check, "section": section}
+        return check
+    return decorator
+
+class Job:
+    def __init__(self, name: str, check, interval: float):
+        self.name = name
+        self.check = check
+        self.interval = interval
+        self.runs = 0
+        self.overruns = 0
+        self.skipped = 0
+        self.last_duration = None
+
+def check_interval(settings, section: str) -> float:
+    """Returns the validated check_interval of a config section, [Monitoring] interval when it has none."""
+    for name, (config_section, _) in SECTIONS.items():
+        if config_section == section:
+            return getattr(getattr(settings, name), "check_interval", settings.monitoring.interval)
+    return settings.monitoring.interval
+
+class Scheduler:
+    def __init__(self, jobs: list, jitter: float = 0.1, stagger: bool = True):
+        self.jobs = list(jobs)
+        self.jitter = jitter  # Fraction of the interval
+        self.stagger = stagger
+
+    @classmethod
+    def from_settings(cls, settings):
+        """Builds the scheduler for the scenarios enabled in the settings."""
+        jobs = []
+        for name in settings.scenarios.enabled:
+            scenario = scenarios.get(name)
+            if scenario is None:
+                print(f"Scenario '{name}' is enabled but not registered, skipping it.")
+                continue
+            jobs.append(Job(name, scenario["check"], check_interval(settings, scenario["section"])))
+        return cls(jobs, jitter=settings.scenarios.jitter, stagger=settings.scenarios.stagger)
+
+    def reconfigure(self, settings):
+        """Applies reloaded intervals, jitter and stagger; enabling or disabling scenarios needs a restart."""
+        enabled = set(settings.scenarios.enabled) & set(scenarios)
+        for job in self.jobs:
+            if job.name in scenarios:
+                job.interval = check_interval(settings, scenarios[job.name]["section"])  # Takes effect from the next tick
+        if enabled != {job.name for job in self.jobs}:
+            logging.warning("The enabled scenarios changed, restart the module to apply it.")
+        self.jitter = settings.scenarios.jitter
+        self.stagger = settings.scenarios.stagger  # Only spreads the first ticks of a run
+
+    async def run_job(self, job: Job, offset: float = 0.0):
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time() + offset
+        while True:
+            delay = next_tick - loop.time() + random.uniform(0, self.jitter * job.interval)
+            await asyncio.sleep(max(0.0, delay))
+
+            start = loop.time()
+            try:
+                await job.check()
+            except Exception as e:
+                logging.error(f"Scenario '{job.name}' failed: {e}")
+            job.runs += 1
+            job.last_duration = loop.time() - start
+
+            next_tick += job.interval
+            now = loop.time()
+            if next_tick <= now:
+                missed = int((now - next_tick) // job.interval) + 1
+                next_tick += missed * job.interval
+                job.overruns += 1
+                job.skipped += missed
+                logging.warning(f"Scenario '{job.name}' took {job.last_duration:.2f}s, skipping {missed} missed tick(s).")
+
+    async def run(self):
+        """Runs every job until cancelled."""
+        tasks = []
+        for index, job in enumerate(self.jobs):
+            offset = job.interval * index / len(self.jobs) if self.stagger else 0.0
+            tasks.append(asyncio.create_task(self.run_job(job, offset)))
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def status(self) -> dict:
+        return {
+            job.name: {"interval": job.interval, "runs": job.runs, "overruns": job.overruns,
+                       "skipped": job.skipped, "last_duration": job.last_duration}
+            for job in self.jobs
+        }
+
+async def run_periodically(check, interval: float, jitter: float = 0.0):
+    """Runs a single check on a drift-free grid, for scenarios started on their own."""
+    await Scheduler([Job(check.__name__, check, interval)], jitter=jitter, stagger=False).run()
@@ -0,0 +1,159 @@
+"""
+Long-lived sensor sessions with buffered, filtered sampling.
+
+A session owns one DHT22 for its whole lifetime: a worker thread opens the
+device once, reads it every `interval` seconds (the DHT22 needs about two
+seconds between reads) and keeps the successful readings in a ring buffer.
+The event loop never blocks on the sensor; a check asks the session for its
+filtered reading, which is the median of the buffer or the latest reading
+with Hampel outlier rejection, so a single glitched read does not raise an
+alert. A simulated backend stands in for the hardware off-device.
+"""
+
+import time
+import random
+import logging
+import threading
+from collections import deque
+
+import numpy as np
+
+MAD_SCALE = 1.4826  # Makes the median absolute deviation estimate the standard deviation of normal data
+
+def parse_sensors(value: str) -> list:
+    """Parses a comma separated list of `name=pin` or `pin` entries into (name, pin) pairs."""
+    sensors = []
+    for entry in value.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        name, _, pin = entry.rpartition("=")
+        sensors.append((name.strip() or f"D{pin.strip()}", int(pin)))
+    return sensors
+
+def hampel(values, k: float = 3.0) -> float:
+    """Returns the latest value, or the window median when it is more than k scaled MADs away from it."""
+    values = np.asarray(values, dtype=float)
+    median = float(np.median(values))
+    mad = MAD_SCALE * float(np.median(np.abs(values - median)))
+    latest = float(values[-1])
+    if abs(latest - median) > k * mad and len(values) >= 3:
+        return median
+    return latest
+
+def apply_filter(values, method: str = "hampel", k: float = 3.0) -> float:
+    if method == "median":
+        return float(np.median(values))
+    if method == "hampel":
+        return hampel(values, k)
+    return float(values[-1])
+
+def open_dht22(pin: int):
+    """Opens a DHT22 on the given GPIO pin."""
+    import adafruit_dht  # Only available on nodes with the sensor attached
+    import board
+
+    return adafruit_dht.DHT22(getattr(board, f"D{pin}"), use_pulseio=False)
+
+class SimulatedDHT22:
+    """Stand-in for a DHT22: noisy readings that sometimes fail (RuntimeError, like the real driver) or spike."""
+
+    def __init__(self, temperature: float = 22.0, humidity: float = 45.0, noise: float = 0.3,
+                 failure_rate: float = 0.1, spike_rate: float = 0.02, seed: int = None):
+        self.temperature_value = temperature
+        self.humidity_value = humidity
+        self.noise = noise
+        self.failure_rate = failure_rate
+        self.spike_rate = spike_rate
+        self.random = random.Random(seed)
+
+    def _read(self, value: float, spike: float) -> float:
+        if self.random.random() < self.failure_rate:
+            raise RuntimeError("Checksum did not validate. Try again.")
+        if self.random.random() < self.spike_rate:
+            return value + spike
+        return round(value + self.random.gauss(0, self.noise), 1)
+
+    @property
+    def temperature(self) -> float:
+        return self._read(self.temperature_value, 80.0)
+
+    @property
+    def humidity(self) -> float:
+        return self._read(self.humidity_value, 60.0)
+
+    def exit(self):
+        pass
+
+class SensorSession:
+    def __init__(self, name: str, open_device, interval: float = 2.0, buffer_size: int = 30,
+                 method: str = "hampel", k: float = 3.0):
+        self.name = name
+        self.open_device = open_device
+        self.interval = interval
+        self.method = method
+        self.k = k
+        self.readings = deque(maxlen=max(1, buffer_size))  # (monotonic time, humidity, temperature)
+        self.reads = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.error = None  # Why the device could not be opened
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name=f"sensor-{self.name}", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        try:
+            device = self.open_device()
+        except Exception as e:
+            self.error = e
+            logging.error(f"Failed to open sensor {self.name}: {e}")
+            return
+        try:
+            while not self._stop.is_set():
+                self.sample(device)
+                self._stop.wait(self.interval)
+        finally:
+            if hasattr(device, "exit"):
+                device.exit()
+
+    def sample(self, device):
+        """Reads the device once and buffers the reading."""
+        try:
+            humidity, temperature = device.humidity, device.temperature
+        except RuntimeError:  # DHT reads fail routinely, the next one usually succeeds
+            humidity, temperature = None, None
+        with self._lock:
+            self.reads += 1
+            if humidity is None or temperature is None:
+                self.failures += 1
+                self.consecutive_failures += 1
+                return
+            self.consecutive_failures = 0
+            self.readings.append((time.monotonic(), humidity, temperature))
+
+    def reading(self, max_age: float = None) -> tuple:
+        """Returns the filtered (humidity, temperature), or (None, None) without a reading newer than max_age seconds."""
+        with self._lock:
+            readings = list(self.readings)
+        if not readings or (max_age is not None and time.monotonic() - readings[-1][0] > max_age):
+            return None, None
+        humidity = apply_filter([r[1] for r in readings], self.method, self.k)
+        temperature = apply_filter([r[2] for r in readings], self.method, self.k)
+        return round(humidity, 1), round(temperature, 1)
+
+    def status(self) -> dict:
+        return {"reads": self.reads, "failures": self.failures, "buffered": len(self.readings),
+                "error": str(self.error) if self.error else None}
@@ -0,0 +1,186 @@
+"""
+Benchmark of the self-healing API.
+
+The FastAPI app runs in-process on a throwaway alert store, served by uvicorn
+over a local socket in the benchmark's event loop, and forwards to a local
+stub Trust Manager. Going through a real socket makes the requests overlap
+even when a handler never awaits, which they do not under httpx's ASGI
+transport. For every store size and concurrency level it drives POST /alerts
+and GET /alerts?since= and reports throughput and p50/p99 latency.
+
+    python tests/benchmarks/alerts_api_benchmark.py                  # compare with the baselines
+    python tests/benchmarks/alerts_api_benchmark.py --record         # record new baselines
+    python tests/benchmarks/alerts_api_benchmark.py --concurrency 1 64 --store-size 0 50000
+    python tests/benchmarks/alerts_api_benchmark.py --backend log sqlite     # compare the store backends
+
+The comparison exits with status 1 when throughput drops, or p99 latency
+rises, by more than the tolerance. Baselines depend on the machine, so
+record them on the machine that checks them.
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import datetime
+import socket
+import tempfile
+
+TESTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+API_DIR = os.path.join(os.path.dirname(TESTS_DIR), "src", "self_healing_api")
+sys.path.insert(0, API_DIR)
+sys.path.insert(0, TESTS_DIR)
+os.chdir(API_DIR)  # The API reads config.ini from its working directory
+
+import httpx
+import uvicorn
+
+import alerts_api
+import alerts_service
+from trust_manager_stub import TrustManagerStub
+
+BASELINES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+
+def percentile(values: list, q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+def make_alert(i: int) -> dict:
+    return {"timestamp": datetime.datetime.now().isoformat(), "scenario": f"Scenario {i % 5}", "message": f"Benchmark alert {i}"}
+
+async def drive(base_url: str, requests: int, concurrency: int, request) -> dict:
+    """Runs `requests` calls of `request(client, i)` with `concurrency` in flight, returning the statistics."""
+    latencies = []
+    errors = 0
+    counter = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        # One connection per worker: a shared httpx pool scans every connection on each request
+        async with httpx.AsyncClient(base_url=base_url, limits=httpx.Limits(max_connections=1), timeout=30) as client:
+            for i in counter:
+                start = time.perf_counter()
+                response = await request(client, i)
+                latencies.append(time.perf_counter() - start)
+                if response.status_code >= 400:
+                    errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {
+        "throughput": round(requests / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "errors": errors,
+    }
+
+async def run_case(store_size: int, concurrency: int, requests: int, directory: str, trust_manager_url: str,
+                   backend: str = "log") -> dict:
+    """Benchmarks both routes against a fresh store holding `store_size` alerts."""
+    alerts_service.BACKEND = backend
+    alerts_service.DATABASE_PATH = os.path.join(directory, "alerts.db")
+    alerts_service.SEGMENT_PATH = os.path.join(directory, "alerts.d")
+    alerts_service.FILE_PATH = os.path.join(directory, "alerts.json")
+    alerts_service.OUTBOX_PATH = os.path.join(directory, "outbox.jsonl")
+    alerts_service.MAX_ALERTS = max(alerts_service.MAX_ALERTS, store_size + requests)
+    alerts_service.tm_client.health_url = trust_manager_url
+
+    results = {}
+    async with alerts_api.lifespan(alerts_api.app):
+        preload = [alerts_service.create_alert_object(f"Scenario {i % 5}", f"Stored alert {i}") for i in range(store_size)]
+        for chunk in range(0, store_size, 1000):
+            await alerts_service.add_alerts(preload[chunk:chunk + 1000])
+
+        sock = socket.socket()
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)  # Inherited by the accepted connections
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+        server = uvicorn.Server(uvicorn.Config(alerts_api.app, log_level="warning", access_log=False, lifespan="off"))
+        serving = asyncio.create_task(server.serve(sockets=[sock]))
+        while not server.started:
+            await asyncio.sleep(0.01)
+
+        base_url = f"http://127.0.0.1:{port}"
+        try:
+            results["POST /alerts"] = await drive(
+                base_url, requests, concurrency, lambda client, i: client.post("/alerts", json=make_alert(i)))
+            # Reads ask for about the newest 100 alerts, whatever the store size
+            stored = alerts_service.load_alerts()
+            since = stored[-101]["timestamp"] if len(stored) > 100 else "1970-01-01T00:00:00"
+            results["GET /alerts?since="] = await drive(
+                base_url, requests, concurrency, lambda client, i: client.get("/alerts", params={"since": since}))
+        finally:
+            server.should_exit = True
+            await serving
+    alerts_service.store = None
+    alerts_service.outbox = None
+    return results
+
+def compare(results: dict, baselines: dict, tolerance: float, latency_tolerance: float) -> list:
+    """Returns a description of every measurement that regressed against its baseline."""
+    regressions = []
+    for key, result in results.items():
+        baseline = baselines.get(key)
+        if baseline is None:
+            continue
+        if result["throughput"] < baseline["throughput"] * (1 - tolerance):
+            regressions.append(f"{key}: throughput {result['throughput']}/s, baseline {baseline['throughput']}/s")
+        if result["p99_ms"] > baseline["p99_ms"] * (1 + latency_tolerance):
+            regressions.append(f"{key}: p99 {result['p99_ms']} ms, baseline {baseline['p99_ms']} ms")
+        if result["errors"]:
+            regressions.append(f"{key}: {result['errors']} failed requests")
+    return regressions
+
+async def main(args) -> int:
+    results = {}
+    with TrustManagerStub() as trust_manager:
+        for backend in args.backend:
+            for store_size in args.store_size:
+                for concurrency in args.concurrency:
+                    with tempfile.TemporaryDirectory() as directory:
+                        case = await run_case(store_size, concurrency, args.requests, directory, trust_manager.url, backend)
+                    for route, result in case.items():
+                        key = f"{route} store={store_size} concurrency={concurrency}"
+                        if backend != "log":
+                            key += f" backend={backend}"
+                        results[key] = result
+                        print(f"{key:<65} {result['throughput']:>10.1f} req/s  p50 {result['p50_ms']:>8.3f} ms  p99 {result['p99_ms']:>8.3f} ms")
+
+    if args.record:
+        baselines = {}
+        if os.path.exists(args.baselines):
+            with open(args.baselines, "r") as file:
+                baselines = json.load(file)
+        baselines.update(results)
+        with open(args.baselines, "w") as file:
+            json.dump(baselines, file, indent=2, sort_keys=True)
+            file.write("\n")
+        print(f"Recorded {len(results)} baselines in {args.baselines}")
+        return 0
+
+    if not os.path.exists(args.baselines):
+        print(f"No baselines in {args.baselines}, run with --record first.")
+        return 0
+    with open(args.baselines, "r") as file:
+        regressions = compare(results, json.load(file), args.tolerance, args.latency_tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the self-healing API.")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64], help="Requests in flight")
+    parser.add_argument("--store-size", type=int, nargs="+", default=[0, 10000], help="Alerts stored before the run")
+    parser.add_argument("--backend", nargs="+", default=["log"], choices=["log", "sqlite"], help="Alert store backends")
+    parser.add_argument("--requests", type=int, default=1000, help="Requests per route and case")
+    parser.add_argument("--baselines", default=BASELINES, help="Baselines JSON file")
+    parser.add_argument("--record", action="store_true", help="Record the results as the new baselines")
+    parser.add_argument("--tolerance", type=float, default=0.3, help="Allowed relative throughput drop")
+    parser.add_argument("--latency-tolerance", type=float, default=1.0, help="Allowed relative p99 latency rise")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(parse_args())))
@@ -0,0 +1,22 @@
+import os
+import sys
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Both services are run from their own directory and use flat imports
+for service in ("self_healing_api", "self_healing_app"):
+    sys.path.insert(0, os.path.join(ROOT_DIR, "src", service))
+
+@pytest.fixture
+def api_service(tmp_path, monkeypatch):
+    """Points the API's alert store and outbox at a temporary directory; the module is restored afterwards."""
+    import alerts_service
+
+    for name, file_name in (("SEGMENT_PATH", "alerts.d"), ("FILE_PATH", "alerts.json"),
+                            ("DATABASE_PATH", "alerts.db"), ("OUTBOX_PATH", "outbox.jsonl")):
+        monkeypatch.setattr(alerts_service, name, str(tmp_path / file_name))
+    for name in ("store", "stats", "outbox"):
+        monkeypatch.setattr(alerts_service, name, None)
+    return alerts_service
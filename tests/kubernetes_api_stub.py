@@ -0,0 +1,126 @@
+"""
+Local stand-in for the Kubernetes API server, served by uvicorn in a background thread.
+
+It serves the pods of one namespace: list, watch (streamed JSON lines) and
+delete, checks the bearer token, and can expire watches with a 410 error
+event to make clients list again.
+"""
+
+import time
+import json
+import socket
+import asyncio
+import threading
+
+import uvicorn
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import StreamingResponse
+
+class KubernetesApiStub:
+    def __init__(self, token: str = "token", namespace: str = "default"):
+        self.token = token
+        self.namespace = namespace
+        self.pods = {}  # name -> pod object
+        self.events = []  # (resource version, watch event)
+        self.resource_version = 0
+        self.expired_before = 0  # Watches from an older resource version get 410 Gone
+        self.requests = []  # (method, query) of every request
+        self.app = FastAPI()
+        self.app.get("/api/v1/namespaces/{namespace}/pods")(self.get_pods)
+        self.app.delete("/api/v1/namespaces/{namespace}/pods/{name}")(self.delete_pod_request)
+        self.port = None
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def _event(self, kind: str, pod: dict):
+        self.resource_version += 1
+        pod["metadata"]["resourceVersion"] = str(self.resource_version)
+        self.events.append((self.resource_version, {"type": kind, "object": pod}))
+
+    def add_pod(self, name: str, phase: str = "Running", labels: dict = None):
+        pod = {"metadata": {"name": name, "namespace": self.namespace, "labels": labels or {"app": "self-healing"},
+                            "creationTimestamp": f"2025-01-01T00:00:{len(self.events):02d}Z"},
+               "status": {"phase": phase}}
+        kind = "MODIFIED" if name in self.pods else "ADDED"
+        self.pods[name] = pod
+        self._event(kind, json.loads(json.dumps(pod)))
+
+    def remove_pod(self, name: str):
+        pod = self.pods.pop(name)
+        self._event("DELETED", json.loads(json.dumps(pod)))
+
+    def expire_watches(self):
+        self.expired_before = self.resource_version + 1
+
+    def authorized(self, request: Request) -> bool:
+        return request.headers.get("authorization") == f"Bearer {self.token}"
+
+    def matches(self, pod: dict, selector: str) -> bool:
+        labels = pod["metadata"].get("labels", {})
+        for requirement in filter(None, (selector or "").split(",")):
+            key, _, value = requirement.partition("=")
+            if labels.get(key) != value:
+                return False
+        return True
+
+    async def get_pods(self, namespace: str, request: Request):
+        params = request.query_params
+        self.requests.append(("GET", dict(params)))
+        if not self.authorized(request):
+            return Response(status_code=401)
+        selector = params.get("labelSelector")
+        if params.get("watch") != "1":
+            items = [pod for pod in self.pods.values() if self.matches(pod, selector)]
+            return {"kind": "PodList", "metadata": {"resourceVersion": str(self.resource_version)}, "items": items}
+        return StreamingResponse(self.watch(int(params.get("resourceVersion") or 0), selector,
+                                            float(params.get("timeoutSeconds", 300))))
+
+    async def watch(self, resource_version: int, selector: str, timeout: float):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if resource_version < self.expired_before:
+                yield json.dumps({"type": "ERROR", "object": {"kind": "Status", "code": 410, "message": "too old resource version"}}) + "\n"
+                return
+            for version, event in self.events:
+                if version > resource_version:
+                    resource_version = version
+                    if self.matches(event["object"], selector):
+                        yield json.dumps(event) + "\n"
+            await asyncio.sleep(0.01)
+
+    async def delete_pod_request(self, namespace: str, name: str, request: Request):
+        self.requests.append(("DELETE", {"name": name}))
+        if not self.authorized(request):
+            return Response(status_code=401)
+        if name not in self.pods:
+            return Response(status_code=404)
+        pod = self.pods[name]
+        self.remove_pod(name)
+        return pod
+
+    def start(self):
+        sock = socket.socket()
+        sock.bind(("127.0.0.1", 0))
+        self.port = sock.getsockname()[1]
+        config = uvicorn.Config(self.app, log_level="warning", lifespan="off")
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, kwargs={"sockets": [sock]}, daemon=True)
+        self._thread.start()
+        while not self._server.started:
+            time.sleep(0.01)
+        return self
+
+    def stop(self):
+        self._server.should_exit = True
+        self._server.force_exit = True  # Open watches would otherwise hold the shutdown
+        self._thread.join(timeout=5)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
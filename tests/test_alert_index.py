@@ -0,0 +1,79 @@
+"""
+Tests the module 'alert_index.py'.
+"""
+
+import pytest
+
+from alert_index import AlertIndex
+
+def build_index():
+    index = AlertIndex()
+    for i in range(10):
+        index.add(i, {
+            "timestamp": f"2025-01-01T00:00:{i:02d}",
+            "scenario": "Sensor Failure" if i % 2 else "Device Power Alert",
+            "message": f"alert {i}",
+            "mac_address": "aa" if i < 5 else "bb",
+        })
+    return index
+
+def messages(alerts):
+    return [a["message"] for a in alerts]
+
+def test_time_range():
+    """Tests that since is exclusive and until is exclusive."""
+    index = build_index()
+    alerts, cursor = index.query(since="2025-01-01T00:00:03", until="2025-01-01T00:00:06")
+    assert messages(alerts) == ["alert 4", "alert 5"]
+    assert cursor is None
+
+    alerts, _ = index.query(since="2025-01-01")
+    assert len(alerts) == 9  # Midnight itself is excluded
+
+def test_secondary_indexes():
+    """Tests filtering by scenario and MAC address."""
+    index = build_index()
+    alerts, _ = index.query(scenario="Sensor Failure")
+    assert messages(alerts) == ["alert 1", "alert 3", "alert 5", "alert 7", "alert 9"]
+
+    alerts, _ = index.query(scenario="Sensor Failure", mac_address="bb")
+    assert messages(alerts) == ["alert 5", "alert 7", "alert 9"]
+
+    alerts, _ = index.query(scenario="Unknown")
+    assert alerts == []
+
+def test_cursor_pagination():
+    """Tests that pages returned through the cursor cover every alert once."""
+    index = build_index()
+    seen, cursor = [], None
+    while True:
+        alerts, cursor = index.query(mac_address="aa", limit=2, cursor=cursor)
+        seen += messages(alerts)
+        if cursor is None:
+            break
+    assert seen == ["alert 0", "alert 1", "alert 2", "alert 3", "alert 4"]
+
+    seen, cursor = [], None
+    while True:
+        alerts, cursor = index.query(scenario="Device Power Alert", mac_address="bb", limit=1, cursor=cursor)
+        seen += messages(alerts)
+        if cursor is None:
+            break
+    assert seen == ["alert 6", "alert 8"]
+
+def test_evict_before():
+    """Tests that evicted alerts disappear from every index."""
+    index = build_index()
+    index.evict_before(8)
+    assert len(index) == 2
+    alerts, _ = index.query(mac_address="aa")
+    assert alerts == []
+    assert "aa" not in index.by_mac
+
+def test_invalid_parameters():
+    """Tests that malformed timestamps and cursors are rejected."""
+    index = build_index()
+    with pytest.raises(ValueError):
+        index.query(since="yesterday")
+    with pytest.raises(ValueError):
+        index.query(cursor="abc")
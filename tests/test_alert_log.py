@@ -0,0 +1,86 @@
+"""
+Tests the module 'alert_log.py'.
+"""
+
+import json
+import os
+
+import pytest
+
+from alert_log import AlertLog
+
+def make_alert(i):
+    return {"timestamp": f"2025-01-01T00:00:{i:02d}", "scenario": "Sensor Failure", "message": f"alert {i}"}
+
+def test_append_and_read(tmp_path):
+    """Tests that appended alerts are read back in order with their sequence numbers."""
+    log = AlertLog(str(tmp_path), segment_records=3, max_records=100)
+    assert log.append([make_alert(0)]) == 0
+    assert log.append([make_alert(1), make_alert(2), make_alert(3)]) == 1
+
+    records = list(log.read())
+    assert [seq for seq, _ in records] == [0, 1, 2, 3]
+    assert records[3][1] == make_alert(3)
+    assert len(log.segments) == 2
+
+def test_retention_drops_whole_segments(tmp_path):
+    """Tests that the oldest segment is dropped only when the rest still hold max_records alerts."""
+    log = AlertLog(str(tmp_path), segment_records=2, max_records=3)
+    log.append([make_alert(i) for i in range(7)])
+
+    seqs = [seq for seq, _ in log.read()]
+    assert seqs == [2, 3, 4, 5, 6]
+    assert log.records == 5
+    assert len(os.listdir(tmp_path)) == len(log.segments)
+
+def test_failed_append_writes_nothing(tmp_path):
+    """Tests that an append failing part-way is undone, so that retrying it stores every record once."""
+    log = AlertLog(str(tmp_path), segment_records=3, max_records=100)
+    log.append([make_alert(0), make_alert(1)])
+    rotate = log._rotate
+    rotations = []
+
+    def failing_rotate():
+        rotations.append(log.next_seq)
+        if len(rotations) == 2:
+            raise OSError("No space left on device")
+        rotate()
+
+    log._rotate = failing_rotate
+    batch = [make_alert(i) for i in range(2, 9)]
+    with pytest.raises(OSError):
+        log.append(batch)  # Fails after alerts 2 to 5 were written
+    assert log.next_seq == 2
+    assert [seq for seq, _ in log.read()] == [0, 1]
+
+    log._rotate = rotate
+    assert log.append(batch) == 2
+    assert [alert["message"] for _, alert in log.read()] == [f"alert {i}" for i in range(9)]
+    log.close()
+    assert AlertLog(str(tmp_path)).next_seq == 9
+
+def test_reopen_recovers_partial_record(tmp_path):
+    """Tests that a partially written record is discarded when the log is reopened."""
+    log = AlertLog(str(tmp_path), segment_records=10, max_records=100)
+    log.append([make_alert(0), make_alert(1)])
+    log.close()
+
+    path = os.path.join(str(tmp_path), os.listdir(tmp_path)[0])
+    with open(path, "a") as file:
+        file.write('{"timestamp": "2025')
+
+    log = AlertLog(str(tmp_path), segment_records=10, max_records=100)
+    assert log.next_seq == 2
+    log.append([make_alert(2)])
+    assert [alert["message"] for _, alert in log.read()] == ["alert 0", "alert 1", "alert 2"]
+
+def test_migrate_legacy_file(tmp_path):
+    """Tests that a legacy alerts.json list is imported once."""
+    legacy = tmp_path / "alerts.json"
+    legacy.write_text(json.dumps([make_alert(0), make_alert(1)], indent=4))
+
+    log = AlertLog(str(tmp_path / "alerts.d"), segment_records=10, max_records=100)
+    assert log.migrate(str(legacy)) == 2
+    assert log.migrate(str(legacy)) == 0
+    assert (tmp_path / "alerts.json.migrated").exists()
+    assert len(list(log.read())) == 2
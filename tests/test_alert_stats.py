@@ -0,0 +1,40 @@
+"""
+Tests the module 'alert_stats.py'.
+"""
+
+import datetime
+
+from alert_stats import AlertStats
+
+NOW = datetime.datetime(2025, 1, 1, 12, 0, 0).timestamp()
+
+def make_alert(minutes_ago, scenario="Sensor Failure", mac_address="node0"):
+    timestamp = datetime.datetime.fromtimestamp(NOW - minutes_ago * 60).isoformat()
+    return {"timestamp": timestamp, "scenario": scenario, "message": "alert", "mac_address": mac_address}
+
+def test_counts_per_scenario_node_and_bucket():
+    """Tests the aggregates, filters and time range of a stats query."""
+    stats = AlertStats(bucket_seconds=600, retention=86400)
+    for alert in (make_alert(5), make_alert(5, mac_address="node1"), make_alert(15),
+                  make_alert(15, scenario="CPU Power"), make_alert(90)):
+        stats.add(alert, now=NOW)
+
+    result = stats.query(now=NOW)
+    assert result["total"] == 5
+    assert result["scenarios"] == {"Sensor Failure": 4, "CPU Power": 1}
+    assert result["mac_addresses"] == {"node0": 4, "node1": 1}
+    assert [bucket["total"] for bucket in result["buckets"]] == [1, 2, 2]
+
+    last_hour = datetime.datetime.fromtimestamp(NOW - 3600).isoformat()
+    result = stats.query(since=last_hour, scenario="Sensor Failure", now=NOW)
+    assert result["mac_addresses"] == {"node0": 2, "node1": 1}
+    assert result["buckets"][0]["start"] == datetime.datetime(2025, 1, 1, 11, 40).isoformat()
+
+def test_buckets_roll_off():
+    """Tests that buckets leave the statistics with the retention window."""
+    stats = AlertStats(bucket_seconds=60, retention=3600)
+    stats.add(make_alert(30), now=NOW)
+    stats.add(make_alert(120), now=NOW)  # Already outside the window
+    assert stats.query(now=NOW)["total"] == 1
+    assert stats.query(now=NOW + 3600)["total"] == 0
+    assert stats.buckets == {}
@@ -0,0 +1,105 @@
+"""
+Tests the module 'alert_store.py'.
+"""
+
+import asyncio
+
+from alert_log import AlertLog
+from alert_store import AlertStore
+
+def make_alert(i):
+    return {"timestamp": f"2025-01-01T00:00:{i:02d}", "scenario": "Sensor Failure", "message": f"alert {i}"}
+
+def test_write_through_without_flusher(tmp_path):
+    """Tests that alerts are written immediately when no flusher is running."""
+    store = AlertStore(AlertLog(str(tmp_path)))
+    store.add([make_alert(0)])
+    assert store.status()["pending"] == 0
+    assert len(list(store.log.read())) == 1
+
+def test_write_behind(tmp_path):
+    """Tests that reads are served from memory while writes are deferred and flushed on close."""
+    async def scenario():
+        store = AlertStore(AlertLog(str(tmp_path)), flush_interval=60, flush_max_pending=5)
+        await store.start()
+
+        store.add([make_alert(i) for i in range(3)])
+        assert len(store.all()) == 3
+        assert store.status()["pending"] == 3
+        assert list(store.log.read()) == []
+
+        store.add([make_alert(i) for i in range(3, 6)])
+        await asyncio.sleep(0.01)  # Threshold reached, the flusher wakes up
+        assert store.status()["pending"] == 0
+        assert len(list(store.log.read())) == 6
+
+        store.add([make_alert(6)])
+        await store.close()
+        return len(list(AlertLog(str(tmp_path)).read()))
+
+    assert asyncio.run(scenario()) == 7
+
+def test_reload_from_log(tmp_path):
+    """Tests that a new store indexes the alerts already in the log."""
+    store = AlertStore(AlertLog(str(tmp_path)))
+    store.add([make_alert(i) for i in range(4)])
+    store.log.close()
+
+    store = AlertStore(AlertLog(str(tmp_path)))
+    alerts, _ = store.query(since="2025-01-01T00:00:01")
+    assert [a["message"] for a in alerts] == ["alert 2", "alert 3"]
+    assert store.add([make_alert(4)]) == 4
+
+def test_group_commit(tmp_path):
+    """Tests that concurrent commits are acknowledged once written, and share few writes."""
+    async def scenario():
+        store = AlertStore(AlertLog(str(tmp_path), fsync=True), flush_interval=60, flush_max_pending=1000)
+        appends = []
+        append = store.log.append
+        store.log.append = lambda alerts: appends.append(len(alerts)) or append(alerts)
+        await store.start()
+
+        async def request(i):
+            await asyncio.sleep(i * 0.0002)  # Requests keep arriving while writes are in progress
+            seq = await store.commit([make_alert(i % 60)])
+            return store.log.next_seq > seq  # Already in the log when acknowledged
+
+        acknowledged = await asyncio.gather(*(request(i) for i in range(300)))
+        status = store.status()
+        await store.close()
+        return acknowledged, appends, status
+
+    acknowledged, appends, status = asyncio.run(scenario())
+    assert all(acknowledged)
+    assert sum(appends) == 300
+    assert 1 < len(appends) < 300
+    assert status["waiting"] == 0
+    assert len(list(AlertLog(str(tmp_path)).read())) == 300
+
+def test_failed_write_holds_the_waiters(tmp_path):
+    """Tests that a failed write keeps its alerts pending and acknowledges them once a retry writes them."""
+    async def scenario():
+        store = AlertStore(AlertLog(str(tmp_path)), flush_interval=60, flush_max_pending=1000)
+        append = store.log.append
+        failures = [OSError("No space left on device")]
+
+        def failing_append(alerts):
+            if failures:
+                raise failures.pop()
+            return append(alerts)
+
+        store.log.append = failing_append
+        await store.start()
+        first = asyncio.create_task(store.commit([make_alert(0)]))
+        await asyncio.sleep(0.05)
+        held = not first.done()
+        status = store.status()
+        await store.commit([make_alert(1)])
+        await first
+        await store.close()
+        return held, status
+
+    held, status = asyncio.run(scenario())
+    assert held
+    assert (status["pending"], status["waiting"], status["records"]) == (1, 1, 1)
+    assert [alert["message"] for _, alert in AlertLog(str(tmp_path)).read()] == ["alert 0", "alert 1"]
@@ -0,0 +1,98 @@
+"""
+Tests the broadcaster ('broadcaster.py') and the GET /alerts/stream endpoint.
+"""
+
+import json
+import time
+import socket
+import asyncio
+import threading
+
+import httpx
+import uvicorn
+
+from broadcaster import Broadcaster
+from trust_manager_stub import TrustManagerStub
+
+def test_broadcaster_filters_and_bounded_buffers():
+    """Tests that subscribers only get matching alerts and that slow ones drop the oldest."""
+    async def scenario():
+        broadcaster = Broadcaster(buffer_size=3)
+        everything = broadcaster.subscribe()
+        sensors = broadcaster.subscribe(scenario="Sensor Failure")
+        node = broadcaster.subscribe(scenario="Sensor Failure", mac_address="aa")
+        idle = [broadcaster.subscribe(scenario="Link Quality Issues") for _ in range(500)]
+
+        broadcaster.publish([
+            ("c1", {"scenario": "Sensor Failure", "mac_address": "aa"}),
+            ("c2", {"scenario": "Sensor Failure", "mac_address": "bb"}),
+            ("c3", {"scenario": "Device Power Alert", "mac_address": "aa"}),
+            ("c4", {"scenario": "Device Power Alert", "mac_address": "bb"}),
+        ])
+        results = {name: await subscription.get(timeout=0) for name, subscription in
+                   (("everything", everything), ("sensors", sensors), ("node", node), ("idle", idle[0]))}
+        for subscription in idle:
+            broadcaster.unsubscribe(subscription)
+        return results, len(broadcaster)
+
+    results, subscribers = asyncio.run(scenario())
+    assert [cursor for cursor, _ in results["everything"][0]] == ["c2", "c3", "c4"]
+    assert results["everything"][1] == 1
+    assert [cursor for cursor, _ in results["sensors"][0]] == ["c1", "c2"]
+    assert [cursor for cursor, _ in results["node"][0]] == ["c1"]
+    assert results["idle"] == ([], 0)
+    assert subscribers == 3
+
+def test_stream_endpoint_resumes_from_cursor(api_service, monkeypatch):
+    """Tests that a stream replays the alerts after its cursor and then pushes new ones."""
+    import alerts_api
+
+    with TrustManagerStub() as trust_manager:
+        monkeypatch.setattr(api_service.tm_client, "health_url", trust_manager.url)
+        sock = socket.socket()
+        sock.bind(("127.0.0.1", 0))
+        base_url = f"http://127.0.0.1:{sock.getsockname()[1]}"
+        server = uvicorn.Server(uvicorn.Config(alerts_api.app, log_level="warning"))
+        thread = threading.Thread(target=server.run, kwargs={"sockets": [sock]}, daemon=True)
+        thread.start()
+        while not server.started:
+            time.sleep(0.01)
+        try:
+            def post(message, scenario="Sensor Failure"):
+                httpx.post(f"{base_url}/alerts", json={"timestamp": "2025-01-01T00:00:00", "scenario": scenario, "message": message})
+
+            post("first")
+            post("second")
+            first_cursor = httpx.get(f"{base_url}/alerts", params={"limit": 1}).json()["next_cursor"]
+
+            with httpx.stream("GET", f"{base_url}/alerts/stream", params={"cursor": first_cursor, "scenario": "Sensor Failure"},
+                              headers={"Accept": "text/event-stream"}, timeout=5) as response:
+                assert response.headers["content-type"].startswith("text/event-stream")
+                lines = response.iter_lines()
+                events = []
+
+                def read_event():
+                    event = {}
+                    for line in lines:
+                        if not line:
+                            return event
+                        field, _, value = line.partition(": ")
+                        event[field] = value
+
+                events.append(read_event())
+                post("ignored", scenario="Device Power Alert")
+                post("third")
+                events.append(read_event())
+
+            assert [json.loads(event["data"])["message"] for event in events] == ["second", "third"]
+            assert all(event["event"] == "alert" for event in events)
+            assert events[0]["id"] != first_cursor
+
+            assert httpx.get(f"{base_url}/alerts/stream", params={"cursor": "bogus"}).status_code == 400
+        finally:
+            server.should_exit = True
+            thread.join(timeout=5)
+        # The server's shutdown closes the store and the outbox
+        assert not thread.is_alive()
+        assert api_service.store is None
+        assert api_service.outbox is None
@@ -0,0 +1,31 @@
+"""
+Tests the routes of 'alerts_api.py' that store and forward alerts.
+"""
+
+import asyncio
+
+from fastapi.testclient import TestClient
+
+def test_alerts_are_stored_when_the_outbox_is_full(api_service, monkeypatch):
+    """Tests that alerts are stored first and that a full outbox only skips forwarding them."""
+    import alerts_api
+
+    async def unreachable(alerts):
+        await asyncio.sleep(0)
+        return list(alerts)  # Nothing delivered, everything is retried later
+
+    monkeypatch.setattr(api_service, "send_alerts_to_trust_manager", unreachable)
+    monkeypatch.setattr(api_service, "OUTBOX_HIGH_WATER_MARK", 1)
+    monkeypatch.setattr(api_service, "OUTBOX_ENQUEUE_TIMEOUT", 0.05)
+
+    alert = {"timestamp": "2025-01-01T00:00:00", "scenario": "Sensor Failure", "message": "sensor D4 failed"}
+    with TestClient(alerts_api.app) as client:
+        first = client.post("/alerts", json=alert)
+        second = client.post("/alerts", json=alert)
+        stored = client.get("/alerts").json()["alerts"]
+        pending = api_service.outbox_status()["pending"]
+
+    assert (first.status_code, first.json()["forwarded"]) == (201, True)
+    assert (second.status_code, second.json()["forwarded"]) == (201, False)
+    assert len(stored) == 2
+    assert pending == 1
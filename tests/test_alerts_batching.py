@@ -0,0 +1,124 @@
+"""
+Tests the alert batching in 'utils/alerts_service.py'.
+"""
+
+import asyncio
+import datetime
+
+from utils.alerts_service import AlertBatcher, AlertDeduplicator
+
+class RecordingClient:
+    def __init__(self):
+        self.single = []
+        self.batches = []
+
+    def build_payload(self, scenario, message, **details):
+        return {"timestamp": "2025-01-01T00:00:00", "scenario": scenario, "message": message, **details}
+
+    async def post_alert_async(self, scenario, message, **details):
+        self.single.append((scenario, message, {"count": details["count"]} if details else {}))
+
+    async def post_alerts_async(self, payloads):
+        self.batches.append(payloads)
+
+def make_batcher(window, max_size):
+    batcher = AlertBatcher(window=window, max_size=max_size)
+    batcher.client = RecordingClient()
+    return batcher
+
+def test_alerts_within_window_are_coalesced():
+    """Tests that alerts raised within the window are sent as one batch."""
+    async def scenario():
+        batcher = make_batcher(window=0.05, max_size=100)
+        for i in range(5):
+            batcher.add("Sensor Failure", f"alert {i}")
+        await asyncio.sleep(0.1)
+        await batcher.flush()
+        return batcher.client
+
+    client = asyncio.run(scenario())
+    assert client.single == []
+    assert len(client.batches) == 1
+    assert [p["message"] for p in client.batches[0]] == [f"alert {i}" for i in range(5)]
+
+def test_size_threshold_sends_immediately():
+    """Tests that a full batch is sent without waiting for the window."""
+    async def scenario():
+        batcher = make_batcher(window=60, max_size=2)
+        batcher.add("Sensor Failure", "a")
+        batcher.add("Sensor Failure", "b")
+        batcher.add("Sensor Failure", "c")
+        await asyncio.sleep(0)
+        sent = list(batcher.client.batches)
+        await batcher.flush()
+        return sent, batcher.client
+
+    sent, client = asyncio.run(scenario())
+    assert len(sent) == 1
+    assert client.single == [("Sensor Failure", "c", {})]
+
+def test_repeated_alerts_are_collapsed():
+    """Tests that repeats within the window are reported once, with their count and first/last seen times."""
+    deduplicator = AlertDeduplicator(window=300, rate=1, burst=5)
+    assert deduplicator.add("Device Power Alert", "CPU usage 91.2% HIGH", now=1000) == [
+        {"scenario": "Device Power Alert", "alert_msg": "CPU usage 91.2% HIGH"}
+    ]
+    for tick in range(1, 100):
+        assert deduplicator.add("Device Power Alert", f"CPU usage {90 + tick % 5}.0% HIGH", now=1000 + tick) == []
+    assert deduplicator.due(now=1299) == []
+
+    collapsed = deduplicator.due(now=1300)
+    assert len(collapsed) == 1
+    assert collapsed[0]["count"] == 99
+    assert collapsed[0]["first_seen"] == datetime.datetime.fromtimestamp(1001).isoformat()
+    assert collapsed[0]["last_seen"] == datetime.datetime.fromtimestamp(1099).isoformat()
+
+    # A quiet window forgets the alert, so the next occurrence is sent at once
+    assert deduplicator.due(now=1600) == []
+    assert deduplicator.entries == {}
+    assert len(deduplicator.add("Device Power Alert", "CPU usage 95.0% HIGH", now=1601)) == 1
+
+def test_different_targets_are_not_collapsed():
+    """Tests that alerts for different devices or interfaces in the same window are all sent."""
+    deduplicator = AlertDeduplicator(window=300, rate=1, burst=5)
+    scenario = "Communication Failure Indication"
+    sent = [deduplicator.add(scenario, f"Communication failure detected for device node{n} at 10.0.0.{n}.", now=1000)
+            for n in (1, 7)]
+    assert [alert["alert_msg"] for alerts in sent for alert in alerts] == [
+        "Communication failure detected for device node1 at 10.0.0.1.",
+        "Communication failure detected for device node7 at 10.0.0.7.",
+    ]
+
+    scenario = "Network Protocol Violation"
+    sent = [deduplicator.add(scenario, f"Duty Cycle violation detected on {interface} (0.2{n} %).", now=1000, dedup_key=interface)
+            for n, interface in enumerate(("wlan0", "wlan1", "wlan0"))]
+    assert [len(alerts) for alerts in sent] == [1, 1, 0]
+    assert deduplicator.entries[(scenario, "wlan0")]["count"] == 1
+
+def test_rate_limit_per_scenario():
+    """Tests that distinct alerts of one scenario are limited by its token bucket, not the others'."""
+    deduplicator = AlertDeduplicator(window=60, rate=0.1, burst=2)
+    sent = [deduplicator.add("Sensor Failure", f"sensor {name} failed", now=0) for name in "abcd"]
+    assert [len(alerts) for alerts in sent] == [1, 1, 0, 0]
+    assert len(deduplicator.add("Link Quality Issues", "rssi dropped", now=0)) == 1
+
+    held = deduplicator.due(now=60)  # Six tokens refilled, the two held back alerts are sent
+    assert sorted(alert["alert_msg"] for alert in held) == ["sensor c failed", "sensor d failed"]
+    assert all(alert["count"] == 1 for alert in held)
+
+def test_batcher_sends_collapsed_alerts_on_flush():
+    """Tests that repeats still being collapsed are sent when the batcher is flushed."""
+    async def scenario():
+        batcher = AlertBatcher(window=0.01, max_size=100, deduplicator=AlertDeduplicator(window=300, rate=1, burst=5))
+        batcher.client = RecordingClient()
+        for _ in range(50):
+            batcher.add("Device Power Alert", "Test connection between services")
+        await asyncio.sleep(0.05)
+        await batcher.flush()
+        return batcher.client
+
+    client = asyncio.run(scenario())
+    assert client.single == [
+        ("Device Power Alert", "Test connection between services", {}),
+        ("Device Power Alert", "Test connection between services", {"count": 49}),
+    ]
@@ -0,0 +1,47 @@
+"""
+Tests the module 'utils/cpu_detector.py'.
+"""
+
+from utils.cpu_detector import CpuStateDetector, NORMAL, LOW, HIGH
+
+def feed(detector, values, start=0.0, step=1.0):
+    states = []
+    for i, value in enumerate(values):
+        state, _ = detector.update(value, start + i * step)
+        states.append(state)
+    return states
+
+def test_spikes_do_not_change_the_state():
+    """Tests that samples above the thresholds for less than min_duration are ignored."""
+    detector = CpuStateDetector(80, 85, window=100, min_duration=10)
+    states = feed(detector, [50] * 20 + [99] * 5 + [50] * 20)
+    assert set(states) == {NORMAL}
+
+def test_hysteresis_band():
+    """Tests the escalation, the band that keeps HIGH and the margin below LOW."""
+    detector = CpuStateDetector(80, 85, window=100, min_duration=10, hysteresis=5)
+    assert feed(detector, [90] * 11)[-1] == HIGH
+    assert feed(detector, [82] * 30, start=11)[-1] == HIGH  # Inside the band
+    assert feed(detector, [78] * 11, start=41)[-1] == LOW
+    assert feed(detector, [77] * 30, start=52)[-1] == LOW  # Not below the margin
+    assert feed(detector, [70] * 11, start=82)[-1] == NORMAL
+
+def test_decisions_do_not_depend_on_the_sampling_rate():
+    """Tests that the state changes after the same time at 1 and 100 samples per second."""
+    slow = CpuStateDetector(80, 85, window=100, min_duration=10)
+    fast = CpuStateDetector(80, 85, window=2000, min_duration=10)
+    slow_states = feed(slow, [90] * 12)
+    fast_states = feed(fast, [90] * 1200, step=0.01)
+    assert slow_states.index(HIGH) == 10
+    assert fast_states.index(HIGH) == 1000
+
+def test_statistics():
+    """Tests the window statistics."""
+    detector = CpuStateDetector(80, 85, window=4)
+    feed(detector, [10, 90, 90, 82, 50])  # The first sample leaves the window
+    stats = detector.statistics()
+    assert stats["samples"] == 4
+    assert stats["mean"] == 78.0
+    assert stats["max"] == 90.0
+    assert stats["seconds_above_high"] == 2.0
+    assert stats["seconds_above_low"] == 3.0
@@ -0,0 +1,40 @@
+"""
+Tests the module 'utils/cpu_sampler.py'.
+"""
+
+from utils.cpu_sampler import CpuSampler
+
+def write_stat(path, aggregate, cores):
+    lines = ["cpu  " + " ".join(map(str, aggregate))]
+    lines += [f"cpu{i} " + " ".join(map(str, core)) for i, core in enumerate(cores)]
+    lines += ["intr 12345 0 0 0", "ctxt 42"]
+    path.write_text("\n".join(lines) + "\n")
+
+def test_usage_from_deltas(tmp_path):
+    """Tests that usage, iowait and steal are computed between two samples."""
+    stat, loadavg = tmp_path / "stat", tmp_path / "loadavg"
+    loadavg.write_text("0.50 0.40 0.30 1/100 1234\n")
+    #                user nice sys idle iowait irq softirq steal guest guest_nice
+    write_stat(stat, [100, 0, 100, 800, 0, 0, 0, 0, 0, 0],
+               [[50, 0, 50, 400, 0, 0, 0, 0, 0, 0], [50, 0, 50, 400, 0, 0, 0, 0, 0, 0]])
+    sampler = CpuSampler(str(stat), str(loadavg))
+    first = sampler.sample()
+    assert first["usage"] == 20.0  # Since boot
+    assert first["load_average"] == (0.5, 0.4, 0.3)
+
+    write_stat(stat, [250, 0, 150, 850, 40, 0, 0, 10, 0, 0],
+               [[200, 0, 100, 450, 0, 0, 0, 0, 0, 0], [50, 0, 50, 400, 40, 0, 0, 10, 0, 0]])
+    second = sampler.sample()
+    # Deltas: busy 200 + steal 10 out of 300 jiffies, 40 of them iowait
+    assert second["usage"] == 70.0
+    assert second["iowait"] == round(100 * 40 / 300, 2)
+    assert second["steal"] == round(100 * 10 / 300, 2)
+    assert second["per_core"] == [80.0, 20.0]
+
+def test_no_elapsed_jiffies(tmp_path):
+    """Tests that two samples within the same jiffy do not divide by zero."""
+    stat = tmp_path / "stat"
+    write_stat(stat, [1, 0, 1, 8, 0, 0, 0, 0, 0, 0], [[1, 0, 1, 8, 0, 0, 0, 0, 0, 0]])
+    sampler = CpuSampler(str(stat), str(tmp_path / "missing"))
+    sampler.sample()
+    assert sampler.sample()["usage"] == 0.0
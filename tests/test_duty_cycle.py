@@ -0,0 +1,76 @@
+"""
+Tests the module 'utils/duty_cycle.py'.
+"""
+
+import asyncio
+import threading
+
+from utils.duty_cycle import DutyCycleRing, DutyCycleTracker
+
+class FixedBitrateStats:
+    """Interface statistics stand-in with a 1000 bytes per second link."""
+
+    def bitrate(self, interface):
+        return 1000.0
+
+def sample(tx_bytes, timestamp):
+    return {"tx_packets": 0, "tx_bytes": tx_bytes, "timestamp": timestamp}
+
+def test_ring_keeps_running_totals():
+    """Tests that the running totals only cover the slots still in the ring."""
+    ring = DutyCycleRing(3)
+    for active in (1.0, 2.0, 3.0, 4.0):
+        ring.push(active, 10.0)
+    assert ring.totals() == (9.0, 30.0)
+    assert ring.totals(1) == (4.0, 10.0)
+    assert ring.totals(2) == (7.0, 20.0)
+
+def test_duty_cycle_over_sliding_windows():
+    """Tests the duty cycle computed from byte counter deltas."""
+    tracker = DutyCycleTracker(["wlan0", "eth0"], window=10.0, resolution=1.0, stats=FixedBitrateStats())
+    tx_bytes = 0
+    for second in range(11):
+        tracker.record({"wlan0": sample(tx_bytes, float(second)), "eth0": sample(0, float(second))})
+        tx_bytes += 100 if second < 5 else 500  # 10 % then 50 % of the link
+
+    assert tracker.duty_cycle("wlan0") == 0.3
+    assert tracker.duty_cycle("wlan0", window=5.0) == 0.5
+    assert tracker.duty_cycles()["eth0"] == 0.0
+
+def test_active_time_is_capped_and_counter_resets_ignored():
+    """Tests that a burst cannot exceed the elapsed time and a counter reset counts as idle."""
+    tracker = DutyCycleTracker(["wlan0"], window=10.0, resolution=1.0, stats=FixedBitrateStats())
+    tracker.record({"wlan0": sample(0, 0.0)})
+    tracker.record({"wlan0": sample(50000, 1.0)})
+    tracker.record({"wlan0": sample(10, 2.0)})
+    assert tracker.duty_cycle("wlan0") == 0.5
+
+def test_no_samples_yet():
+    tracker = DutyCycleTracker(["wlan0"], stats=FixedBitrateStats())
+    assert tracker.duty_cycle("wlan0") is None
+
+def test_bitrates_are_read_off_the_event_loop():
+    """Tests that run() reads the bit rates in a worker thread and refreshes them periodically."""
+    class ThreadRecordingStats(FixedBitrateStats):
+        def __init__(self):
+            self.threads = []
+
+        def bitrate(self, interface):
+            self.threads.append(threading.current_thread())
+            return 1000.0
+
+        def sample(self, interfaces):
+            return {interface: sample(0, 0.0) for interface in interfaces}
+
+    async def run():
+        stats = ThreadRecordingStats()
+        tracker = DutyCycleTracker(["wlan0"], resolution=0.01, stats=stats, bitrate_interval=0.02)
+        tracker.start()
+        await asyncio.sleep(0.1)
+        await tracker.stop()
+        return stats.threads, tracker.bitrates
+
+    threads, bitrates = asyncio.run(run())
+    assert len(threads) > 1
+    assert threading.main_thread() not in threads
+    assert bitrates == {"wlan0": 1000.0}
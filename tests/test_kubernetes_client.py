@@ -0,0 +1,89 @@
+"""
+Tests the module 'api_clients/kubernetes_client.py' against a local fake API server.
+"""
+
+import asyncio
+
+from api_clients.kubernetes_client import KubernetesClient, PodCache
+from kubernetes_api_stub import KubernetesApiStub
+
+async def wait_until(condition, timeout=5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "condition not reached"
+        await asyncio.sleep(0.01)
+
+def make_client(stub, tmp_path):
+    token_path = tmp_path / "token"
+    token_path.write_text(stub.token)
+    return KubernetesClient(stub.url, token_path=str(token_path))
+
+def test_pod_cache_follows_the_watch(tmp_path):
+    """Tests that the cache is filled by one list and then kept current by the watch, without listing again."""
+    with KubernetesApiStub() as stub:
+        stub.add_pod("self-healing-a")
+        stub.add_pod("other", labels={"app": "other"})
+
+        async def scenario():
+            cache = PodCache(make_client(stub, tmp_path), "app=self-healing")
+            cache.start()
+            await asyncio.wait_for(cache.synced.wait(), 5)
+            assert cache.get_pod_name() == "self-healing-a"
+
+            stub.add_pod("self-healing-b", phase="Pending")
+            stub.remove_pod("self-healing-a")
+            await wait_until(lambda: "self-healing-a" not in cache.pods)
+            assert cache.get_pod_name() is None  # b is not running yet
+
+            stub.add_pod("self-healing-b")
+            await wait_until(lambda: cache.get_pod_name() == "self-healing-b")
+            relists = cache.relists
+            await cache.stop()
+            await cache.client.close()
+            return relists
+
+        assert asyncio.run(scenario()) == 1
+        assert sum(1 for method, query in stub.requests if method == "GET" and "watch" not in query) == 1
+
+def test_pod_cache_relists_when_the_watch_expires(tmp_path):
+    """Tests that a 410 Gone watch error makes the cache list the pods again."""
+    with KubernetesApiStub() as stub:
+        stub.add_pod("self-healing-a")
+
+        async def scenario():
+            cache = PodCache(make_client(stub, tmp_path), "app=self-healing")
+            cache.start()
+            await asyncio.wait_for(cache.synced.wait(), 5)
+            await wait_until(lambda: any("watch" in query for _, query in stub.requests))
+            stub.expire_watches()
+            stub.add_pod("self-healing-b")
+            await wait_until(lambda: cache.relists == 2)
+            names = cache.running()
+            await cache.stop()
+            await cache.client.close()
+            return names
+
+        assert asyncio.run(scenario()) == ["self-healing-a", "self-healing-b"]
+
+def test_delete_pod_and_token_rotation(tmp_path):
+    """Tests deleting pods and that a rotated token file is picked up."""
+    with KubernetesApiStub() as stub:
+        stub.add_pod("self-healing-a")
+
+        async def scenario():
+            client = make_client(stub, tmp_path)
+            try:
+                deleted = await client.delete_pod("self-healing-a")
+                missing = await client.delete_pod("self-healing-a")
+                stub.token = "rotated"
+                (tmp_path / "token").write_text("rotated")
+                client._token_mtime = None  # The rewrite may land within the same mtime tick
+                pods, _ = await client.list_pods()
+                return deleted, missing, pods
+            finally:
+                await client.close()
+
+        deleted, missing, pods = asyncio.run(scenario())
+        assert deleted is True
+        assert missing is False
+        assert pods == []
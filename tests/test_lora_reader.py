@@ -0,0 +1,57 @@
+"""
+Tests the module 'utils/lora_reader.py', using a pseudo-terminal as the serial port.
+"""
+
+import os
+import asyncio
+
+from utils.lora_reader import LoRaReader, parse_packet
+
+def test_parse_packet():
+    """Tests that RSSI, SNR and SF are extracted in a single pass."""
+    packet = parse_packet("Received packet 'hello' with RSSI: -97 dBm SNR: -7.25 dB SF: 9")
+    assert packet == {"rssi": -97, "snr": -7.25, "sf": 9}
+    assert parse_packet("garbage") == {"rssi": None, "snr": None, "sf": None}
+
+def test_streams_packets_from_serial_port():
+    """Tests that packets are read as they arrive, including lines split across reads."""
+    async def scenario():
+        master, slave = os.openpty()
+        reader = LoRaReader(os.ttyname(slave), queue_size=10)
+        await reader.start()
+        try:
+            os.write(master, b"RSSI: -80 dBm SNR: 5.5 dB SF: 7\nRSSI: -9")
+            first = await asyncio.wait_for(reader.get(), 1)
+            os.write(master, b"0 dBm SNR: 1 dB SF: 8\n")
+            second = await asyncio.wait_for(reader.get(), 1)
+        finally:
+            await reader.stop()
+            os.close(master)
+            os.close(slave)
+        return first, second, reader.packets
+
+    first, second, packets = asyncio.run(scenario())
+    assert (first["rssi"], first["snr"], first["sf"]) == (-80, 5.5, 7)
+    assert (second["rssi"], second["snr"], second["sf"]) == (-90, 1.0, 8)
+    assert packets == 2
+
+def test_drops_oldest_packets_when_queue_is_full():
+    """Tests that a slow consumer loses the oldest packets and that they are counted."""
+    async def scenario():
+        master, slave = os.openpty()
+        reader = LoRaReader(os.ttyname(slave), queue_size=3)
+        await reader.start()
+        try:
+            os.write(master, b"".join(f"RSSI: -{60 + i} dBm\n".encode() for i in range(5)))
+            while reader.packets < 5:
+                await asyncio.sleep(0.01)
+            received = [(await reader.get())["rssi"] for _ in range(3)]
+        finally:
+            await reader.stop()
+            os.close(master)
+            os.close(slave)
+        return received, reader.dropped
+
+    received, dropped = asyncio.run(asyncio.wait_for(scenario(), 5))
+    assert received == [-62, -63, -64]
+    assert dropped == 2
@@ -0,0 +1,52 @@
+"""
+Tests the module 'metrics.py' of the self-healing API.
+"""
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from metrics import Registry, Counter, Histogram, Callback, MetricsMiddleware, http_requests
+
+def test_render_counters_histograms_and_callbacks():
+    """Tests the Prometheus text format of every metric type."""
+    registry = Registry()
+    counter = registry.register(Counter("alerts_total", "Alerts.", ("scenario",)))
+    histogram = registry.register(Histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0)))
+    registry.register(Callback("pending", "Pending alerts.", lambda: 7))
+    registry.register(Callback("missing", "Not available yet.", lambda: None))
+
+    counter.inc('Sensor "A"')
+    counter.inc('Sensor "A"', amount=2)
+    for value in (0.05, 0.5, 0.5, 3.0):
+        histogram.observe(value)
+
+    lines = registry.render().splitlines()
+    assert "# TYPE alerts_total counter" in lines
+    assert 'alerts_total{scenario="Sensor \\"A\\""} 3' in lines
+    assert 'latency_seconds_bucket{le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{le="1.0"} 3' in lines
+    assert 'latency_seconds_bucket{le="+Inf"} 4' in lines
+    assert "latency_seconds_sum 4.05" in lines
+    assert "latency_seconds_count 4" in lines
+    assert "pending 7" in lines
+    assert "# TYPE missing gauge" in lines
+    assert not any(line.startswith("missing ") for line in lines)
+
+def test_middleware_labels_requests_by_route_template():
+    """Tests that requests are counted per route template and status code."""
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/things/{thing_id}")
+    async def get_thing(thing_id: int):
+        return {"id": thing_id}
+
+    client = TestClient(app)
+    client.get("/things/1")
+    client.get("/things/2")
+    client.get("/things/not-a-number")
+    client.get("/unknown")
+
+    assert http_requests.values[("GET", "/things/{thing_id}", "200")] == 2
+    assert http_requests.values[("GET", "/things/{thing_id}", "422")] == 1
+    assert http_requests.values[("GET", "unmatched", "404")] == 1
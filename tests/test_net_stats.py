@@ -0,0 +1,37 @@
+"""
+Tests the module 'utils/net_stats.py'.
+"""
+
+from utils.net_stats import InterfaceStats, DEFAULT_BITRATE
+
+def make_interface(root, name, tx_packets, tx_bytes, speed=None, wireless=False):
+    statistics = root / name / "statistics"
+    statistics.mkdir(parents=True)
+    (statistics / "tx_packets").write_text(f"{tx_packets}\n")
+    (statistics / "tx_bytes").write_text(f"{tx_bytes}\n")
+    if speed is not None:
+        (root / name / "speed").write_text(f"{speed}\n")
+    if wireless:
+        (root / name / "wireless").mkdir()
+
+def test_sample_many_interfaces(tmp_path):
+    """Tests that the counters of several interfaces are read in one pass."""
+    make_interface(tmp_path, "eth0", 10, 15000)
+    make_interface(tmp_path, "wlan0", 3, 900, wireless=True)
+    stats = InterfaceStats(str(tmp_path))
+
+    assert stats.interfaces() == ["eth0", "wlan0"]
+    samples = stats.sample(["eth0", "wlan0", "missing0"])
+    assert samples["eth0"]["tx_bytes"] == 15000
+    assert samples["wlan0"]["tx_packets"] == 3
+    assert samples["missing0"]["tx_bytes"] is None
+    assert samples["eth0"]["timestamp"] == samples["wlan0"]["timestamp"]
+
+def test_bitrate_fallbacks(tmp_path):
+    """Tests the wired link speed and the default bit rate."""
+    make_interface(tmp_path, "eth0", 0, 0, speed=100)
+    make_interface(tmp_path, "eth1", 0, 0, speed=-1)
+    stats = InterfaceStats(str(tmp_path))
+
+    assert stats.bitrate("eth0") == 100 * 1e6 / 8
+    assert stats.bitrate("eth1") == DEFAULT_BITRATE
@@ -0,0 +1,140 @@
+"""
+Tests the module 'outbox.py'.
+"""
+
+import asyncio
+
+import pytest
+
+from outbox import Outbox, OutboxFull
+from trust_manager_client import TrustManagerClient
+from trust_manager_stub import TrustManagerStub
+
+def make_alert(i):
+    return {"timestamp": "2025-01-01T00:00:00", "scenario": "Sensor Failure", "message": f"alert {i}"}
+
+async def wait_until(condition, timeout=5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "Timed out waiting for the outbox"
+        await asyncio.sleep(0.01)
+
+def test_retries_with_backoff(tmp_path):
+    """Tests that failed deliveries are retried until they succeed."""
+    delivered = []
+    failures = {"left": 3}
+
+    async def deliver(alerts):
+        if failures["left"] > 0:
+            failures["left"] -= 1
+            return alerts
+        delivered.extend(alerts)
+        return []
+
+    async def scenario():
+        outbox = Outbox(str(tmp_path / "outbox.jsonl"), deliver, workers=2, base_backoff=0.01, max_backoff=0.05)
+        await outbox.start()
+        await outbox.put([make_alert(i) for i in range(5)])
+        await wait_until(lambda: len(outbox) == 0)
+        status = outbox.status()
+        await outbox.close()
+        return status
+
+    status = asyncio.run(scenario())
+    assert sorted(a["message"] for a in delivered) == [f"alert {i}" for i in range(5)]
+    assert status["delivered"] == 5
+    assert status["failed_attempts"] >= 3
+
+def test_undelivered_alerts_survive_restart(tmp_path):
+    """Tests that alerts still in the journal are delivered after a restart."""
+    path = str(tmp_path / "outbox.jsonl")
+    delivered = []
+
+    async def unreachable(alerts):
+        return alerts
+
+    async def deliver(alerts):
+        delivered.extend(alerts)
+        return []
+
+    async def first_run():
+        outbox = Outbox(path, unreachable, base_backoff=10)
+        await outbox.start()
+        await outbox.put([make_alert(i) for i in range(3)])
+        await asyncio.sleep(0.05)
+        await outbox.close()
+
+    async def second_run():
+        outbox = Outbox(path, deliver)
+        assert len(outbox) == 3
+        await outbox.start()
+        await wait_until(lambda: len(outbox) == 0)
+        await outbox.close()
+
+    asyncio.run(first_run())
+    asyncio.run(second_run())
+    assert len(delivered) == 3
+    assert len(Outbox(path, deliver)) == 0
+
+def test_high_water_mark_applies_backpressure(tmp_path):
+    """Tests that producers are rejected while a slow Trust Manager keeps the outbox full."""
+    async def slow(alerts):
+        await asyncio.sleep(10)
+        return []
+
+    async def scenario():
+        outbox = Outbox(str(tmp_path / "outbox.jsonl"), slow, workers=1, high_water_mark=3, enqueue_timeout=0.05)
+        await outbox.start()
+        await outbox.put([make_alert(i) for i in range(3)])
+        with pytest.raises(OutboxFull):
+            await outbox.put([make_alert(3)])
+        await outbox.close()
+
+    asyncio.run(scenario())
+
+def test_woken_producers_do_not_overfill(tmp_path):
+    """Tests that producers woken together by an ack only take the room that was freed."""
+    async def scenario():
+        gate = asyncio.Semaphore(0)
+
+        async def gated(alerts):
+            await gate.acquire()
+            return []
+
+        outbox = Outbox(str(tmp_path / "outbox.jsonl"), gated, workers=1, batch_size=2, high_water_mark=4, enqueue_timeout=0.2)
+        await outbox.start()
+        await outbox.put([make_alert(i) for i in range(4)])
+        producers = [asyncio.create_task(outbox.put([make_alert(4 + i)])) for i in range(4)]
+        await asyncio.sleep(0.05)
+        gate.release()  # Two alerts are delivered, which leaves room for two more
+        results = await asyncio.gather(*producers, return_exceptions=True)
+        pending = len(outbox.pending)
+        for _ in range(10):
+            gate.release()
+        await outbox.close()
+        return results, pending
+
+    results, pending = asyncio.run(scenario())
+    assert sum(result is None for result in results) == 2
+    assert sum(isinstance(result, OutboxFull) for result in results) == 2
+    assert pending == 4
+
+def test_delivery_to_stub_trust_manager(tmp_path):
+    """Tests delivery through the Trust Manager client to a failing, then recovering, stand-in."""
+    with TrustManagerStub(delay=0.01) as stub:
+        stub.fail_next = 4
+        client = TrustManagerClient()
+        client.health_url = stub.url
+
+        async def scenario():
+            outbox = Outbox(str(tmp_path / "outbox.jsonl"), client.post_alerts_async, batch_size=5,
+                            base_backoff=0.01, max_backoff=0.05)
+            await outbox.start()
+            await outbox.put([make_alert(i) for i in range(10)])
+            await wait_until(lambda: len(outbox) == 0)
+            await outbox.close()
+            await client.close()
+
+        asyncio.run(scenario())
+        assert sorted(a["message"] for a in stub.alerts) == sorted(f"alert {i}" for i in range(10))
+        assert stub.requests == 14
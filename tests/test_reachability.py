@@ -0,0 +1,93 @@
+"""
+Tests the module 'utils/reachability.py'.
+"""
+
+import time
+import socket
+import asyncio
+
+from utils.reachability import ReachabilityProber, parse_targets, REACHABLE, UNREACHABLE, UNKNOWN
+
+def test_parse_targets():
+    """Tests the supported target notations."""
+    assert parse_targets("node1=10.0.0.1, 10.0.0.2:22,,") == [
+        {"name": "node1", "host": "10.0.0.1", "port": None},
+        {"name": "10.0.0.2", "host": "10.0.0.2", "port": 22},
+    ]
+
+def test_tcp_probe():
+    """Tests that listening and refusing hosts are reachable through a TCP connect."""
+    async def scenario():
+        server = await asyncio.start_server(lambda reader, writer: writer.close(), "127.0.0.1", 0)
+        open_port = server.sockets[0].getsockname()[1]
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            closed_port = sock.getsockname()[1]
+        prober = ReachabilityProber([], timeout=1)
+        try:
+            return await prober.probe_tcp("127.0.0.1", open_port), await prober.probe_tcp("127.0.0.1", closed_port)
+        finally:
+            server.close()
+            await server.wait_closed()
+
+    open_rtt, refused_rtt = asyncio.run(scenario())
+    assert open_rtt is not None
+    assert refused_rtt is not None
+
+def test_sweep_is_concurrent_and_reports_transitions():
+    """Tests that 500 targets are probed in about one timeout and that only state changes are reported."""
+    targets = [{"name": f"node{i}", "host": f"10.0.{i // 256}.{i % 256}", "port": None} for i in range(500)]
+    prober = ReachabilityProber(targets, timeout=0.2, down_after=2)
+    down = {"node7"}
+
+    async def fake_probe(target):
+        async with prober.semaphore:
+            await asyncio.sleep(0.2)
+            return None if target["name"] in down else 0.001
+
+    prober.probe = fake_probe
+
+    async def scenario():
+        start = time.monotonic()
+        first = await prober.sweep()
+        elapsed = time.monotonic() - start
+        second = await prober.sweep()
+        third = await prober.sweep()
+        down.clear()
+        fourth = await prober.sweep()
+        return elapsed, first, second, third, fourth
+
+    elapsed, first, second, third, fourth = asyncio.run(scenario())
+    assert elapsed < 0.6
+    assert len(first) == 499  # node7 needs two failed sweeps before it is down
+    assert prober.history["node7"].loss == 0.75
+    assert [(t["name"], old, new) for t, old, new in second] == [("node7", UNKNOWN, UNREACHABLE)]
+    assert third == []
+    assert [(t["name"], old, new) for t, old, new in fourth] == [("node7", UNREACHABLE, REACHABLE)]
+    assert prober.status()["node7"]["state"] == REACHABLE
+    assert prober.status()["node0"]["average_rtt"] == 0.001
+
+def test_reload_keeps_the_state_of_kept_targets():
+    """Tests that a reload only rebuilds the prober for its own settings, keeping the history of kept targets."""
+    from dataclasses import replace
+    from config.loader import get_settings
+    from scenarios import communication_failure_indication as communication
+
+    settings = replace(get_settings(), communication=replace(get_settings().communication, targets="a=10.0.0.1, b=10.0.0.2"))
+    communication.apply_settings(settings)
+    prober = communication.get_prober()
+    prober.update({"name": "a", "host": "10.0.0.1", "port": None}, None)
+    prober.update({"name": "a", "host": "10.0.0.1", "port": None}, None)
+    assert prober.history["a"].state == UNREACHABLE
+
+    communication.apply_settings(replace(settings, cpu=replace(settings.cpu, high_threshold=95.0)))
+    assert communication.prober is prober
+
+    settings = replace(settings, communication=replace(settings.communication, targets="a=10.0.0.1, c=10.0.0.3", history_size=5))
+    communication.apply_settings(settings)
+    assert communication.prober is not prober
+    assert communication.prober.history["a"].state == UNREACHABLE
+    assert communication.prober.history["a"].rtts.maxlen == 5
+    assert communication.prober.history["c"].state == UNKNOWN
+    assert "b" not in communication.prober.history
+    communication.apply_settings(get_settings())
@@ -0,0 +1,50 @@
+"""
+Tests the module 'utils/rolling_stats.py'.
+"""
+
+import random
+import statistics
+
+import pytest
+
+from utils.rolling_stats import RollingStats
+
+def test_matches_exact_statistics_over_the_window():
+    """Tests the windowed mean and variance against a full recomputation."""
+    rng = random.Random(7)
+    stats = RollingStats(50, low=-150, high=0)
+    values = [rng.uniform(-90, -40) for _ in range(500)]
+    for value in values:
+        stats.add(value)
+
+    window = values[-50:]
+    assert len(stats) == 50
+    assert stats.mean == pytest.approx(statistics.mean(window))
+    assert stats.variance == pytest.approx(statistics.variance(window))
+
+def test_quantiles_and_ewma():
+    """Tests the histogram quantiles and the EWMA."""
+    stats = RollingStats(100, low=0, high=100, alpha=0.5)
+    for value in range(100):
+        stats.add(value)
+    assert stats.quantile(0.05) == pytest.approx(5, abs=1)
+    assert stats.quantile(0.5) == pytest.approx(50, abs=1)
+    assert stats.ewma == pytest.approx(98, abs=1)
+
+def test_percentile_threshold_resists_outliers():
+    """Tests that a single bad sample does not drag the percentile threshold down."""
+    stats = RollingStats(100, low=-150, high=0)
+    for _ in range(99):
+        stats.add(-60)
+    stats.add(-140)
+
+    assert stats.quantile(0.05) == pytest.approx(-60, abs=1)
+    # The margin keeps the threshold at least 5 below the mean (-60.8)
+    assert stats.lower_threshold("percentile", percentile=0.05, margin=5) == pytest.approx(-65.8)
+    assert stats.lower_threshold("sigma", k=2.0, margin=5) < -65
+    assert stats.upper_threshold("percentile", percentile=0.95, margin=1) == pytest.approx(-59, abs=1)
+
+def test_empty_window():
+    stats = RollingStats(10, low=0, high=10)
+    assert stats.quantile(0.5) is None
+    assert stats.lower_threshold() is None
@@ -0,0 +1,60 @@
+"""
+Tests the lazy loading of the 'scenarios' package.
+"""
+
+import os
+import sys
+import json
+import subprocess
+
+from conftest import ROOT_DIR
+from utils.net_stats import get_primary_network_interface
+
+APP_DIR = os.path.join(ROOT_DIR, "src", "self_healing_app")
+
+def run_in_app(code: str) -> dict:
+    """Runs code in a fresh interpreter, so modules imported by other tests do not count."""
+    output = subprocess.check_output([sys.executable, "-c", code], cwd=APP_DIR, text=True)
+    return json.loads(output.strip().splitlines()[-1])
+
+def test_only_enabled_scenarios_are_imported():
+    """Tests that scenarios are discovered without importing them and that only the enabled ones are loaded."""
+    result = run_in_app("""
+import sys, json
+import scenarios
+available = scenarios.available()
+timings = scenarios.load_scenarios(["cpu_power", "missing"])
+print(json.dumps({
+    "available": available,
+    "loaded": sorted(name for name in sys.modules if name.startswith("scenarios.")),
+    "timed": sorted(timings),
+    "hardware": [name for name in ("serial", "board", "adafruit_dht") if name in sys.modules],
+}))
+""")
+    assert result["available"] == ["communication_failure_indication", "cpu_power", "link_quality_issues",
+                                   "network_protocol_violation", "sensor_failure"]
+    assert result["loaded"] == ["scenarios.cpu_power"]
+    assert result["timed"] == ["cpu_power"]
+    assert result["hardware"] == []
+
+def test_network_scenarios_do_not_look_up_the_interface_on_import():
+    """Tests that the default route is only read when a check first needs it."""
+    result = run_in_app("""
+import json
+import scenarios
+from utils import net_stats
+scenarios.load_scenarios(["network_protocol_violation", "link_quality_issues"])
+print(json.dumps({"lookups": net_stats.get_primary_network_interface.cache_info().misses}))
+""")
+    assert result["lookups"] == 0
+
+def test_primary_interface_from_the_route_table(tmp_path):
+    """Tests that the interface of the default route is found in the routing table."""
+    route_table = tmp_path / "route"
+    route_table.write_text(
+        "Iface\tDestination\tGateway\tFlags\tRefCnt\tUse\tMetric\tMask\n"
+        "eth1\t000200C0\t00000000\t0001\t0\t0\t0\t00FFFFFF\n"
+        "wlan0\t00000000\t010200C0\t0003\t0\t0\t600\t00000000\n"
+    )
+    assert get_primary_network_interface(str(route_table)) == "wlan0"
+    assert get_primary_network_interface(str(tmp_path / "missing")) == "eth0"
@@ -0,0 +1,115 @@
+"""
+Tests the module 'utils/scheduler.py'.
+"""
+
+import asyncio
+import configparser
+
+from config.settings import Settings
+from utils import scheduler
+from utils.scheduler import Job, Scheduler, register
+
+def make_settings(text: str) -> Settings:
+    config = configparser.ConfigParser()
+    config.read_string(text)
+    return Settings.from_config(config)
+
+def test_from_settings_uses_enabled_scenarios_and_intervals():
+    """Tests that only enabled, registered scenarios are scheduled, with their section's interval."""
+    @register("test_fast", section="Link_Quality")
+    async def fast():
+        pass
+
+    @register("test_default")
+    async def default():
+        pass
+
+    try:
+        built = Scheduler.from_settings(make_settings("""
+[Monitoring]
+interval = 30
+[Scenarios]
+enabled = test_fast, test_default, missing
+jitter = 0
+[Link_Quality]
+check_interval = 2.5
+"""))
+        assert [(job.name, job.interval) for job in built.jobs] == [("test_fast", 2.5), ("test_default", 30.0)]
+        assert built.jitter == 0
+
+        built.reconfigure(make_settings("""
+[Monitoring]
+interval = 20
+[Scenarios]
+enabled = test_fast, test_default
+jitter = 0.5
+stagger = false
+[Link_Quality]
+check_interval = 1
+"""))
+        assert [(job.name, job.interval) for job in built.jobs] == [("test_fast", 1.0), ("test_default", 20.0)]
+        assert (built.jitter, built.stagger) == (0.5, False)
+    finally:
+        scheduler.scenarios.pop("test_fast")
+        scheduler.scenarios.pop("test_default")
+
+def test_ticks_do_not_drift_and_overruns_are_skipped():
+    """Tests that ticks stay on the grid despite slow checks, and that overruns skip ticks."""
+    ticks = []
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+
+        async def steady():
+            ticks.append(loop.time() - start)
+            await asyncio.sleep(0.03)  # Must not shift the following ticks
+
+        async def slow():
+            await asyncio.sleep(0.25)
+
+        steady_job, slow_job = Job("steady", steady, 0.1), Job("slow", slow, 0.1)
+        runner = Scheduler([steady_job, slow_job], jitter=0, stagger=False)
+        task = asyncio.create_task(runner.run())
+        await asyncio.sleep(0.58)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        return steady_job, slow_job
+
+    steady_job, slow_job = asyncio.run(scenario())
+    assert steady_job.runs == 6
+    for index, tick in enumerate(ticks):
+        assert abs(tick - index * 0.1) < 0.02
+    assert steady_job.overruns == 0
+    assert slow_job.runs == 2
+    assert slow_job.overruns == 2
+    assert slow_job.skipped == 4
+
+def test_stagger_spreads_first_ticks():
+    """Tests that the first tick of each job is offset across the interval."""
+    first = {}
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+
+        def make(name):
+            async def check():
+                first.setdefault(name, loop.time() - start)
+            return check
+
+        jobs = [Job(name, make(name), 0.2) for name in ("a", "b", "c", "d")]
+        task = asyncio.create_task(Scheduler(jobs, jitter=0, stagger=True).run())
+        await asyncio.sleep(0.19)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    asyncio.run(scenario())
+    for index, name in enumerate("abcd"):
+        assert abs(first[name] - index * 0.05) < 0.02
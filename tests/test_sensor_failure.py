@@ -1,48 +1,43 @@
-import numpy as np
-from src.utils.sensor_outliers_detection import SensorDataHandler
-from config import settings as set
+from scenarios import sensor_failure
 
 def test_no_measurement():
     """Tests the detect_abnormanl_state for no measurements"""
-    sensor_handler = SensorDataHandler()
-    report = sensor_handler.get_abnormal_state_report_message(None, None)
-    assert report == set.NO_MEASUREMENT_MSG
-    report = sensor_handler.get_abnormal_state_report_message(set.HIGH_HUMIDITY_THRESHOLD -1, set.HIGH_TEMPERATURE_THRESHOLD - 1)
-    assert report != set.NO_MEASUREMENT_MSG
-    report = sensor_handler.get_abnormal_state_report_message(set.HIGH_HUMIDITY_THRESHOLD + 1, set.HIGH_TEMPERATURE_THRESHOLD + 1)
-    assert report != set.NO_MEASUREMENT_MSG
+    report = sensor_failure.status_report(None, None)
+    assert report == sensor_failure.NO_MEASUREMENT_MSG
+    report = sensor_failure.status_report(sensor_failure.HIGH_HUMIDITY_THRESHOLD -1, sensor_failure.HIGH_TEMPERATURE_THRESHOLD - 1)
+    assert report != sensor_failure.NO_MEASUREMENT_MSG
+    report = sensor_failure.status_report(sensor_failure.HIGH_HUMIDITY_THRESHOLD + 1, sensor_failure.HIGH_TEMPERATURE_THRESHOLD + 1)
+    assert report != sensor_failure.NO_MEASUREMENT_MSG
 
 def test_outlier_value_detection():
     """Tests the detect_abnormanl_state for no measurements"""
-    sensor_handler = SensorDataHandler()
 
     # Test with No measurement values
-    report = sensor_handler.get_abnormal_state_report_message(None, None)
-    assert report != set.OUTLIER_DETECTED_MSG
+    report = sensor_failure.status_report(None, None)
+    assert report != sensor_failure.OUTLIER_DETECTED_MSG
 
     # Test with valid values
-    report = sensor_handler.get_abnormal_state_report_message(set.HIGH_HUMIDITY_THRESHOLD -1, set.HIGH_TEMPERATURE_THRESHOLD - 1)
-    assert report != set.OUTLIER_DETECTED_MSG
+    report = sensor_failure.status_report(sensor_failure.HIGH_HUMIDITY_THRESHOLD -1, sensor_failure.HIGH_TEMPERATURE_THRESHOLD - 1)
+    assert report != sensor_failure.OUTLIER_DETECTED_MSG
 
     # Tests with thresholds ouliers values
-    report = sensor_handler.get_abnormal_state_report_message(set.HIGH_HUMIDITY_THRESHOLD + 1, set.HIGH_TEMPERATURE_THRESHOLD + 1)
-    assert report == set.OUTLIER_DETECTED_MSG
+    report = sensor_failure.status_report(sensor_failure.HIGH_HUMIDITY_THRESHOLD + 1, sensor_failure.HIGH_TEMPERATURE_THRESHOLD + 1)
+    assert report == sensor_failure.OUTLIER_DETECTED_MSG
 
 def test_normal_state():
     """Tests the detect_abnormanl_state for no measurements"""
-    sensor_handler = SensorDataHandler()
 
     # Test with No measurement values
-    report = sensor_handler.get_abnormal_state_report_message(None, None)
-    assert report != set.SENSOR_OK_MSG
+    report = sensor_failure.status_report(None, None)
+    assert report != sensor_failure.SENSOR_OK_MSG
 
     # Test with valid values
-    report = sensor_handler.get_abnormal_state_report_message(set.HIGH_HUMIDITY_THRESHOLD -1, set.HIGH_TEMPERATURE_THRESHOLD - 1)
-    assert report == set.SENSOR_OK_MSG
+    report = sensor_failure.status_report(sensor_failure.HIGH_HUMIDITY_THRESHOLD -1, sensor_failure.HIGH_TEMPERATURE_THRESHOLD - 1)
+    assert report == sensor_failure.SENSOR_OK_MSG
 
     # Tests with thresholds ouliers values
-    report = sensor_handler.get_abnormal_state_report_message(set.HIGH_HUMIDITY_THRESHOLD + 1, set.HIGH_TEMPERATURE_THRESHOLD + 1)
-    assert report != set.SENSOR_OK_MSG
+    report = sensor_failure.status_report(sensor_failure.HIGH_HUMIDITY_THRESHOLD + 1, sensor_failure.HIGH_TEMPERATURE_THRESHOLD + 1)
+    assert report != sensor_failure.SENSOR_OK_MSG
 
 
 
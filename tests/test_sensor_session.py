@@ -0,0 +1,51 @@
+"""
+Tests the module 'utils/sensor_session.py'.
+"""
+
+import time
+
+from utils.sensor_session import SensorSession, SimulatedDHT22, hampel, parse_sensors
+
+def test_parse_sensors():
+    """Tests the supported sensor notations."""
+    assert parse_sensors("4, greenhouse=17,,") == [("D4", 4), ("greenhouse", 17)]
+
+def test_hampel_rejects_spikes():
+    """Tests that a single glitched reading is replaced by the window median."""
+    readings = [22.1, 22.0, 22.2, 21.9, 22.1]
+    assert hampel(readings + [102.0]) == 22.1
+    assert hampel(readings + [22.3]) == 22.3
+
+def test_session_buffers_filtered_readings():
+    """Tests that a session opens its device once and serves filtered readings from its buffer."""
+    opened = []
+
+    def open_device():
+        device = SimulatedDHT22(failure_rate=0.3, spike_rate=0.1, seed=1)
+        opened.append(device)
+        return device
+
+    session = SensorSession("D4", open_device, interval=0.001, buffer_size=20)
+    assert session.reading() == (None, None)
+    session.start()
+    deadline = time.monotonic() + 5
+    while len(session.readings) < 20 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    session.stop()
+
+    humidity, temperature = session.reading()
+    assert len(opened) == 1
+    assert session.failures > 0
+    assert abs(humidity - 45.0) < 2
+    assert abs(temperature - 22.0) < 2
+    assert session.reading(max_age=0) == (None, None)
+
+def test_session_reports_open_errors():
+    """Tests that a sensor that cannot be opened is reported instead of retried."""
+    def open_device():
+        raise NotImplementedError("not a Raspberry Pi")
+
+    session = SensorSession("D4", open_device)
+    session.start()
+    session._thread.join(timeout=5)
+    assert isinstance(session.error, NotImplementedError)
@@ -0,0 +1,97 @@
+"""
+Tests the modules 'config/settings.py' and 'config/loader.py'.
+"""
+
+import os
+import configparser
+
+import pytest
+
+from config import loader
+from config.settings import Settings, SettingsError
+
+def parse(text: str) -> Settings:
+    config = configparser.ConfigParser(inline_comment_prefixes=("#",))
+    config.read_string(text)
+    return Settings.from_config(config)
+
+def test_settings_are_typed_with_defaults():
+    """Tests typed parsing, fallbacks, inline comments and the monitoring interval default."""
+    settings = parse("""
+[Monitoring]
+interval = 30
+[Scenarios]
+enabled = cpu_power, sensor_failure
+[CPU_Monitoring]
+high_threshold = 90  # percent
+[Network_Protocol]
+check_interval =
+""")
+    assert settings.scenarios.enabled == ("cpu_power", "sensor_failure")
+    assert settings.cpu.high_threshold == 90.0
+    assert settings.cpu.check_interval == 30.0
+    assert settings.sensor.check_interval == 30.0
+    assert settings.network_protocol.check_interval == 5.0
+    assert settings.alerts.batch_max_size == 50
+
+def test_invalid_settings_list_every_error():
+    """Tests that every invalid value is reported at once."""
+    with pytest.raises(SettingsError) as error:
+        parse("""
+[CPU_Monitoring]
+low_threshold = 90
+high_threshold = 80
+[Sensor_Monitoring]
+backend = serial
+[alerts]
+batch_max_size = many
+""")
+    message = str(error.value)
+    assert "low_threshold (90.0) must be lower than high_threshold (80.0)" in message
+    assert "backend must be one of dht22, simulated" in message
+    assert "[alerts] batch_max_size" in message
+
+def test_rate_limit_must_be_positive():
+    """Tests that a token bucket that would never refill is rejected."""
+    with pytest.raises(SettingsError) as error:
+        parse("""
+[alerts]
+rate_limit = 0
+rate_burst = -1
+""")
+    assert "rate_limit must be positive" in str(error.value)
+    assert "rate_burst must be positive" in str(error.value)
+
+@pytest.fixture
+def config_file(tmp_path, monkeypatch):
+    path = tmp_path / "config.ini"
+    path.write_text("[CPU_Monitoring]\nhigh_threshold = 85\n")
+    monkeypatch.setattr(loader, "CONFIG_PATH", str(path))
+    monkeypatch.setattr(loader, "config", None)
+    monkeypatch.setattr(loader, "settings", None)
+    monkeypatch.setattr(loader, "config_version", None)
+    monkeypatch.setattr(loader, "subscribers", [])
+    return path
+
+def rewrite(path, text: str):
+    path.write_text(text)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))  # Rewrites can land within one mtime tick
+
+def test_reload_calls_subscribers_and_keeps_valid_settings(config_file):
+    """Tests that a changed file is applied to the subscribers and that an invalid one is rejected."""
+    applied = []
+    loader.subscribe(lambda settings: applied.append(settings.cpu.high_threshold))
+    assert applied == [85.0]
+    assert loader.reload_config() is False  # Unchanged
+
+    rewrite(config_file, "[CPU_Monitoring]\nhigh_threshold = 95\n")
+    assert loader.reload_config() is True
+    assert applied == [85.0, 95.0]
+    assert loader.load_config().getfloat("CPU_Monitoring", "high_threshold") == 95.0
+
+    rewrite(config_file, "[CPU_Monitoring]\nhigh_threshold = 95\nlow_threshold = 99\n")
+    assert loader.reload_config() is False
+    assert loader.get_settings().cpu.high_threshold == 95.0
+    assert loader.get_settings().cpu.low_threshold == 80.0
+    assert applied == [85.0, 95.0]
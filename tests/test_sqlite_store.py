@@ -0,0 +1,145 @@
+"""
+Tests the module 'sqlite_store.py'.
+"""
+
+import json
+import sqlite3
+import asyncio
+
+import pytest
+
+from alert_index import AlertIndex
+from sqlite_store import AlertDatabase, SQLiteAlertStore
+
+def make_alert(i):
+    return {"timestamp": f"2025-01-01T00:{i // 60:02d}:{i % 60:02d}", "scenario": f"Scenario {i % 3}",
+            "message": f"alert {i}", "mac_address": f"node{i % 2}"}
+
+def test_queries_match_the_index(tmp_path):
+    """Tests that the SQL queries return the same pages and cursors as the in-memory index."""
+    alerts = [make_alert(i) for i in range(200)]
+    alerts[50]["timestamp"] = alerts[10]["timestamp"]  # Equal timestamps are ordered by sequence number
+    index = AlertIndex()
+    for seq, alert in enumerate(alerts):
+        index.add(seq, alert)
+    store = SQLiteAlertStore(AlertDatabase(str(tmp_path / "alerts.db"), max_records=1000))
+    store.add(alerts)
+
+    for filters in ({}, {"since": "2025-01-01T00:01:00"}, {"until": "2025-01-01T00:00:30"},
+                    {"scenario": "Scenario 1"}, {"mac_address": "node0", "since": "2025-01-01T00:00:10"},
+                    {"scenario": "Scenario 2", "mac_address": "node1", "limit": 7}):
+        cursor, pages = None, 0
+        while True:
+            expected = index.query(cursor=cursor, limit=filters.get("limit", 25),
+                                   **{k: v for k, v in filters.items() if k != "limit"})
+            page = store.query(cursor=cursor, limit=filters.get("limit", 25),
+                               **{k: v for k, v in filters.items() if k != "limit"})
+            assert page == expected
+            pages += 1
+            cursor = page[1]
+            if cursor is None:
+                break
+        assert store.count(**{k: v for k, v in filters.items() if k != "limit"}) == \
+            len(index.query(**{k: v for k, v in filters.items() if k != "limit"})[0])
+    assert pages > 1
+
+def test_retention_and_reopen(tmp_path):
+    """Tests that only the newest max_records alerts are kept across restarts."""
+    path = str(tmp_path / "alerts.db")
+    store = SQLiteAlertStore(AlertDatabase(path, max_records=10))
+    store.add([make_alert(i) for i in range(25)])
+    assert len(store) == 10
+    asyncio.run(store.close())
+
+    store = SQLiteAlertStore(AlertDatabase(path, max_records=10))
+    assert [alert["message"] for alert in store.all()] == [f"alert {i}" for i in range(15, 25)]
+    assert store.next_seq == 25
+
+def test_group_commit(tmp_path):
+    """Tests that added alerts are visible at once and committed in one transaction by the writer task."""
+    path = str(tmp_path / "alerts.db")
+
+    async def scenario():
+        store = SQLiteAlertStore(AlertDatabase(path), flush_interval=60, flush_max_pending=1000)
+        await store.start()
+        store.add([make_alert(0)])
+        assert store.count() == 1
+        assert AlertDatabase(path).count() == 0  # Not committed yet
+
+        await asyncio.gather(*(store.commit([make_alert(i)]) for i in range(1, 6)))
+        status = store.status()
+        await store.close()
+        return status
+
+    status = asyncio.run(scenario())
+    assert status["backend"] == "sqlite"
+    assert status["commits"] == 1
+    assert status["pending"] == 0
+    assert AlertDatabase(path).count() == 6
+
+class FailingCommit:
+    """Connection wrapper whose next COMMIT fails, rolling the transaction back like SQLITE_FULL can."""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.fail = True
+
+    def __getattr__(self, name):
+        return getattr(self.connection, name)
+
+    def execute(self, sql, *args):
+        if sql == "COMMIT" and self.fail:
+            self.fail = False
+            self.connection.execute("ROLLBACK")
+            raise sqlite3.OperationalError("database or disk is full")
+        return self.connection.execute(sql, *args)
+
+def test_failed_commit_is_written_by_the_retry(tmp_path):
+    """Tests that alerts whose commit failed are inserted again and committed by the next commit."""
+    path = str(tmp_path / "alerts.db")
+
+    async def scenario():
+        database = AlertDatabase(path)
+        database.connection = FailingCommit(database.connection)
+        store = SQLiteAlertStore(database, flush_interval=60, flush_max_pending=1000)
+        await store.start()
+        first = asyncio.create_task(store.commit([make_alert(0), make_alert(1)]))
+        await asyncio.sleep(0.05)
+        assert not first.done()  # Held until a write succeeds
+        assert store.status()["pending"] == 2
+        await store.commit([make_alert(2)])
+        await first
+        await store.close()
+
+    asyncio.run(scenario())
+    assert [alert["message"] for alert in SQLiteAlertStore(AlertDatabase(path)).all()] == ["alert 0", "alert 1", "alert 2"]
+
+def test_migrate(tmp_path):
+    """Tests that a legacy JSON file is imported once."""
+    legacy = tmp_path / "alerts.json"
+    legacy.write_text(json.dumps([make_alert(i) for i in range(3)]))
+    database = AlertDatabase(str(tmp_path / "alerts.db"))
+    assert database.migrate(str(legacy)) == 3
+    assert database.migrate(str(legacy)) == 0
+    assert database.count(scenario="Scenario 0") == 1
+
+def test_requests_read_in_a_worker_thread(tmp_path):
+    """Tests that request queries run on the read-only connection and see the committed alerts."""
+    async def run():
+        database = AlertDatabase(str(tmp_path / "alerts.db"))
+        store = SQLiteAlertStore(database, flush_interval=60, flush_max_pending=1000)
+        await store.start()
+        await store.commit([make_alert(i) for i in range(5)])
+        store.add([make_alert(5)])  # Not committed yet
+        alerts, _ = await store.query_async(since="2025-01-01T00:00:01")
+        count = await store.count_async(scenario="Scenario 0")
+        reader = database.reader
+        await store.close()
+        return alerts, count, reader
+
+    alerts, count, reader = asyncio.run(run())
+    assert [alert["message"] for alert in alerts] == ["alert 2", "alert 3", "alert 4"]
+    assert count == 2
+    assert reader is not None
+    with pytest.raises(sqlite3.ProgrammingError):  # Closed with the database
+        reader.execute("SELECT 1")
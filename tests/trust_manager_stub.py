@@ -0,0 +1,64 @@
+"""
+Local stand-in for the Trust Manager, served by uvicorn in a background thread.
+
+It records the alerts posted to /health and can be made slow (`delay`) or
+failing (`fail_next` requests answered with `failure_status`).
+"""
+
+import time
+import socket
+import asyncio
+import threading
+
+import uvicorn
+from fastapi import FastAPI, Request, Response
+
+class TrustManagerStub:
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.fail_next = 0
+        self.failure_status = 503
+        self.alerts = []
+        self.requests = 0
+        self.app = FastAPI()
+        self.app.post("/health")(self.health)
+        self.port = None
+        self._server = None
+        self._thread = None
+
+    async def health(self, request: Request):
+        self.requests += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.fail_next > 0:
+            self.fail_next -= 1
+            return Response(status_code=self.failure_status)
+        payload = await request.json()
+        self.alerts.extend(payload if isinstance(payload, list) else [payload])
+        return {"result": "ok"}
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/health"
+
+    def start(self):
+        sock = socket.socket()
+        sock.bind(("127.0.0.1", 0))
+        self.port = sock.getsockname()[1]
+        config = uvicorn.Config(self.app, log_level="warning", lifespan="off")
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, kwargs={"sockets": [sock]}, daemon=True)
+        self._thread.start()
+        while not self._server.started:
+            time.sleep(0.01)
+        return self
+
+    def stop(self):
+        self._server.should_exit = True
+        self._thread.join(timeout=5)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()